@@ -2,25 +2,119 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from bson import ObjectId
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from database import users_collection, revoked_tokens_collection
+import asyncio
+import hashlib
 import os
+import time
+import uuid
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "mixamo-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30 days
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Verified token cache configuration
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))  # seconds; bounds how late other processes see a logout
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+# Password hashing configuration
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # work factor; stored hashes using another are upgraded at login
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))  # bcrypt calls running at once
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))  # calls waiting beyond this are rejected
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    # Hashes with any other work factor are flagged for rehashing
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
 security = HTTPBearer()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt takes hundreds of milliseconds of CPU per call; running it here
+    keeps the event loop free, caps how many calls run at once and sheds
+    load (503) once PASSWORD_HASH_MAX_QUEUE calls are already waiting.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.in_flight = 0  # submitted and not yet finished
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting for a free worker"""
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, function, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        submitted_at = time.monotonic()
+
+        def timed_call():
+            started_at = time.monotonic()
+            return started_at - submitted_at, function(*args)
+
+        self.in_flight += 1
+        try:
+            wait, result = await asyncio.get_running_loop().run_in_executor(self._executor, timed_call)
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return result
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+    def stats(self) -> dict:
+        """Queue depth and wait times, for monitoring"""
+        return {
+            "workers": self.workers,
+            "running": min(self.in_flight, self.workers),
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "average_wait_ms": round(1000 * self.total_wait / self.completed, 1) if self.completed else 0.0,
+            "max_wait_ms": round(1000 * self.max_wait, 1)
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+password_hasher = PasswordHasher()
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    return await password_hasher.run(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the password hashing pool.
+
+    Also returns a replacement hash when the stored one was made with
+    outdated parameters (e.g. a different BCRYPT_ROUNDS), else None.
+    """
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
@@ -30,31 +124,120 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # A unique ID keeps tokens issued in the same second distinct, so revoking one leaves the others valid
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def credentials_error() -> HTTPException:
+    """Build the error raised for a missing, invalid, expired or revoked token"""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 def verify_token(token: str) -> dict:
     """Verify JWT token and return payload"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            raise credentials_error()
         return payload
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise credentials_error()
+
+def get_token_key(token: str) -> str:
+    """Key identifying a token in the cache and the revocation list; the token itself is never stored"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenCache:
+    """LRU cache of verified token payloads.
+
+    Entries live for at most TOKEN_CACHE_TTL and never past the token's own
+    expiry, so a cached token is re-verified (and re-checked against the
+    revocation list) regularly.
+    """
+
+    def __init__(self, ttl: float = TOKEN_CACHE_TTL, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, key: str, payload: dict) -> None:
+        expires_at = time.time() + self.ttl
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+token_cache = TokenCache()
+
+async def authenticate_token(token: str) -> dict:
+    """Payload of a valid, unrevoked token, served from the cache when possible"""
+    key = get_token_key(token)
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = verify_token(token)
+    if await revoked_tokens_collection.find_one({"_id": key}, {"_id": 1}):
+        raise credentials_error()
+
+    token_cache.set(key, payload)
+    return payload
+
+async def revoke_token(token: str, payload: dict) -> None:
+    """Put a token on the revocation list until it would have expired anyway"""
+    key = get_token_key(token)
+    expires_at = datetime.utcfromtimestamp(payload["exp"]) if "exp" in payload else (
+        datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    await revoked_tokens_collection.update_one(
+        {"_id": key},
+        {"$set": {"user_id": payload.get("sub"), "expires_at": expires_at, "revoked_at": datetime.utcnow()}},
+        upsert=True
+    )
+    token_cache.discard(key)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current authenticated user"""
-    token = credentials.credentials
-    payload = verify_token(token)
-    return payload
\ No newline at end of file
+    return await authenticate_token(credentials.credentials)
+
+async def get_current_user_doc(current_user: dict = Depends(get_current_user)) -> dict:
+    """The authenticated user's document.
+
+    FastAPI caches dependencies per request, so every handler and dependency
+    asking for it within a request shares a single lookup.
+    """
+    try:
+        user = await users_collection.find_one({"_id": ObjectId(current_user.get("sub"))})
+    except Exception:
+        raise credentials_error()
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
\ No newline at end of file
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import os
+import re
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from bson import ObjectId
+from database import characters_collection, animations_collection, processing_jobs_collection
+from job_queue import job_task, update_job, report_progress, raise_if_cancelled
+from job_events import publish_job_event
+from result_cache import (
+    PROCESSED_DIR, normalize_settings, get_content_hash, build_result_key, lookup_result, get_result_path, record_result
+)
+from bulk_import import apply_changes
+from retarget import load_skeleton, retarget_skeletons, export_result
+from storage import run_storage
+from thumbnail_renderer import THUMBNAIL_WORKERS
+
+# Batch retarget configuration
+BATCH_RETARGET_MAX_ITEMS = int(os.getenv("BATCH_RETARGET_MAX_ITEMS", "500"))
+BATCH_RETARGET_CONCURRENCY = THUMBNAIL_WORKERS * 2  # pairs queued on the render pool at once
+BATCH_MANIFEST_NAME = "manifest.json"
+
+async def create_batch_job(user_id: str, pairs: List[Tuple[str, str]], settings: dict) -> dict:
+    """Insert the job record that tracks a batch of (character ID, animation ID) pairs"""
+    job_doc = {
+        "_id": ObjectId(),
+        "kind": "batch_retarget",
+        "user_id": ObjectId(user_id),
+        "status": "pending",
+        "progress": 0,
+        "settings": settings,
+        "items": [
+            {
+                "character_id": character_id,
+                "animation_id": animation_id,
+                "status": "pending",
+                "cached": False,
+                "result_file": None,
+                "matched_bones": None,
+                "error": None
+            }
+            for character_id, animation_id in pairs
+        ],
+        "total_items": len(pairs),
+        "completed": 0,
+        "failed": 0,
+        "result_file": None,
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    await processing_jobs_collection.insert_one(job_doc)
+    await publish_job_event(job_doc)
+    return job_doc
+
+async def load_sources(collection, ids: Set[str], file_field: str) -> Dict[str, dict]:
+    """Documents by ID, fetched with one query however many pairs share them"""
+    documents = await collection.find(
+        {"_id": {"$in": [ObjectId(id) for id in ids]}}, {"name": 1, file_field: 1}
+    ).to_list(None)
+    return {str(document["_id"]): document for document in documents}
+
+async def hash_sources(documents: Dict[str, dict], file_field: str) -> Dict[str, str]:
+    """Content hash of each source, for the result cache keys"""
+    hashes = await asyncio.gather(*(get_content_hash(document, file_field) for document in documents.values()))
+    return dict(zip(documents.keys(), hashes))
+
+async def load_skeletons(file_paths: Iterable[Optional[str]]) -> Dict[str, Optional[List[str]]]:
+    """Parse each distinct source file once, in the render pool"""
+    paths = sorted({path for path in file_paths if path})
+    skeletons = await asyncio.gather(*(load_skeleton(path) for path in paths))
+    return dict(zip(paths, skeletons))
+
+def count_batch_items(items: List[dict]) -> dict:
+    """Job counters for a list of item statuses"""
+    completed = sum(1 for item in items if item["status"] == "completed")
+    failed = sum(1 for item in items if item["status"] == "failed")
+    return {
+        "completed": completed,
+        "failed": failed,
+        "progress": (completed + failed) * 100 // len(items) if items else 100
+    }
+
+def item_completed(index: int, result_file: str, cached: bool = False, matched_bones: Optional[int] = None) -> dict:
+    prefix = f"items.{index}"
+    return {
+        f"{prefix}.status": "completed",
+        f"{prefix}.result_file": result_file,
+        f"{prefix}.cached": cached,
+        f"{prefix}.matched_bones": matched_bones,
+        f"{prefix}.error": None
+    }
+
+def item_failed(index: int, error: str) -> dict:
+    return {f"items.{index}.status": "failed", f"items.{index}.error": error}
+
+async def retarget_item(
+    index: int,
+    result_key: str,
+    character_bones: Optional[List[str]],
+    animation_bones: Optional[List[str]],
+    settings: dict,
+    job_id: str
+) -> dict:
+    """Retarget one pair in the render pool and return the job fields it changed"""
+    try:
+        result = await retarget_skeletons(character_bones, animation_bones, settings)
+    except Exception as e:
+        return item_failed(index, str(e))
+
+    # Results are named by their cache key so identical pairs in later jobs share them
+    result_file = get_result_path(result_key, settings)
+    try:
+        await export_result(result_file, result, settings)
+    except OSError as e:
+        return item_failed(index, f"Could not write result: {e}")
+    await record_result(result_key, result_file, job_id)
+    return item_completed(index, result_file, matched_bones=result["matched_bones"])
+
+def get_entry_name(index: int, character: dict, animation: dict, result_file: str) -> str:
+    """File name of a result inside the batch archive"""
+    def clean(name: str) -> str:
+        return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_") or "item"
+    return f"{index + 1:04d}_{clean(character['name'])}_{clean(animation['name'])}{Path(result_file).suffix}"
+
+def write_batch_archive(archive_path: str, manifest: dict, entries: List[Tuple[str, str]]) -> None:
+    """Write the manifest and the (file path, entry name) results that exist to a zip"""
+    temporary_path = f"{archive_path}.tmp"
+    with zipfile.ZipFile(temporary_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(BATCH_MANIFEST_NAME, json.dumps(manifest, indent=2))
+        for file_path, entry_name in entries:
+            archive.write(file_path, entry_name)
+    os.replace(temporary_path, archive_path)
+
+async def build_batch_archive(
+    job_id: str,
+    items: List[dict],
+    characters: Dict[str, dict],
+    animations: Dict[str, dict],
+    settings: dict
+) -> str:
+    """Pack a finished batch into one zip with a manifest.json of per-item status"""
+    manifest_items = []
+    entries = []
+    for index, item in enumerate(items):
+        character = characters.get(item["character_id"], {"name": item["character_id"]})
+        animation = animations.get(item["animation_id"], {"name": item["animation_id"]})
+        entry_name = None
+        result_file = item.get("result_file")
+        if item["status"] == "completed" and result_file and await run_storage(os.path.isfile, result_file):
+            entry_name = get_entry_name(index, character, animation, result_file)
+            entries.append((result_file, entry_name))
+
+        manifest_items.append({
+            "character_id": item["character_id"],
+            "character_name": character["name"],
+            "animation_id": item["animation_id"],
+            "animation_name": animation["name"],
+            "status": item["status"],
+            "cached": item.get("cached", False),
+            "matched_bones": item.get("matched_bones"),
+            "error": item.get("error"),
+            "file": entry_name
+        })
+
+    archive_path = str(PROCESSED_DIR / f"batch_{job_id}.zip")
+    manifest = {"job_id": job_id, "settings": normalize_settings(settings), "items": manifest_items}
+    await run_storage(write_batch_archive, archive_path, manifest, entries)
+    return archive_path
+
+@job_task("batch_retarget")
+async def run_batch_retarget_job(job_id: str):
+    """Retarget every pair of a batch and pack the results into one archive.
+
+    Each distinct character and animation is loaded, hashed and parsed once
+    however many pairs use it. Pairs finished by an earlier attempt are skipped.
+    """
+    job = await update_job(job_id, {"status": "processing"})
+    if not job:
+        return
+
+    items = job["items"]
+    settings = job.get("settings", {})
+    characters = await load_sources(characters_collection, {item["character_id"] for item in items}, "model_file")
+    animations = await load_sources(animations_collection, {item["animation_id"] for item in items}, "animation_file")
+    character_hashes = await hash_sources(characters, "model_file")
+    animation_hashes = await hash_sources(animations, "animation_file")
+
+    # Pairs already in the result cache finish without any work
+    changes = {}
+    pending = []
+    for index, item in enumerate(items):
+        if item["status"] != "pending":
+            continue
+        character_id, animation_id = item["character_id"], item["animation_id"]
+        if character_id not in characters or animation_id not in animations:
+            changes.update(item_failed(index, "Character or animation no longer exists"))
+            continue
+
+        result_key = build_result_key(character_hashes[character_id], animation_hashes[animation_id], settings)
+        cached_result = await lookup_result(result_key)
+        if cached_result:
+            changes.update(item_completed(index, cached_result["result_file"], cached=True))
+        else:
+            pending.append((index, result_key))
+
+    if changes:
+        apply_changes(items, changes)
+        await report_progress(job, {**changes, **count_batch_items(items)})
+
+    skeletons = await load_skeletons(
+        [characters[items[index]["character_id"]].get("model_file") for index, _ in pending] +
+        [animations[items[index]["animation_id"]].get("animation_file") for index, _ in pending]
+    )
+
+    for start in range(0, len(pending), BATCH_RETARGET_CONCURRENCY):
+        await raise_if_cancelled(job_id)
+        results = await asyncio.gather(*(
+            retarget_item(
+                index,
+                result_key,
+                skeletons.get(characters[items[index]["character_id"]].get("model_file")),
+                skeletons.get(animations[items[index]["animation_id"]].get("animation_file")),
+                settings,
+                job_id
+            )
+            for index, result_key in pending[start:start + BATCH_RETARGET_CONCURRENCY]
+        ))
+        changes = {key: value for item_changes in results for key, value in item_changes.items()}
+        apply_changes(items, changes)
+        await report_progress(job, {**changes, **count_batch_items(items)})
+
+    result_file = await build_batch_archive(job_id, items, characters, animations, settings)
+    await update_job(job_id, {"status": "completed", **count_batch_items(items), "progress": 100, "result_file": result_file})
@@ -0,0 +1,90 @@
+"""Thumbnail rendering time by polygon count.
+
+Run from the backend directory:
+
+    python benchmarks/thumbnail_benchmark.py [triangle counts...]
+"""
+import json
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from thumbnail_renderer import THUMBNAIL_MAX_TRIANGLES, load_mesh, decimate_mesh, render_mesh
+
+DEFAULT_TRIANGLE_COUNTS = [1_000, 10_000, 100_000, 500_000, 1_000_000, 4_000_000]
+
+def make_sphere(triangles: int):
+    """UV sphere with roughly the requested number of triangles"""
+    rings = max(int(np.sqrt(triangles / 2)), 3)
+    theta, phi = np.meshgrid(np.linspace(0, np.pi, rings), np.linspace(0, 2 * np.pi, rings), indexing="ij")
+    vertices = np.stack([
+        np.sin(theta) * np.cos(phi), np.cos(theta), np.sin(theta) * np.sin(phi)
+    ], axis=-1).reshape(-1, 3).astype(np.float32)
+
+    corner = (np.arange(rings - 1)[:, None] * rings + np.arange(rings - 1)[None, :]).ravel()
+    faces = np.concatenate([
+        np.stack([corner, corner + 1, corner + rings], axis=1),
+        np.stack([corner + 1, corner + rings + 1, corner + rings], axis=1)
+    ]).astype(np.uint32)
+    return vertices, faces
+
+def write_glb(path: Path, vertices: np.ndarray, faces: np.ndarray) -> None:
+    """Minimal single-mesh GLB"""
+    positions = vertices.tobytes()
+    indices = faces.tobytes()
+    gltf = {
+        "asset": {"version": "2.0"},
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1}]}],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": len(vertices), "type": "VEC3",
+             "min": vertices.min(axis=0).tolist(), "max": vertices.max(axis=0).tolist()},
+            {"bufferView": 1, "componentType": 5125, "count": faces.size, "type": "SCALAR"}
+        ],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": len(positions)},
+            {"buffer": 0, "byteOffset": len(positions), "byteLength": len(indices)}
+        ],
+        "buffers": [{"byteLength": len(positions) + len(indices)}]
+    }
+    document = json.dumps(gltf).encode()
+    document += b" " * (-len(document) % 4)
+    binary = positions + indices
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(document) + 8 + len(binary)))
+        f.write(struct.pack("<II", len(document), 0x4E4F534A) + document)
+        f.write(struct.pack("<II", len(binary), 0x004E4942) + binary)
+
+def main() -> None:
+    counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_TRIANGLE_COUNTS
+    print(f"max triangles after decimation: {THUMBNAIL_MAX_TRIANGLES}")
+    print(f"{'triangles':>10} {'rendered':>10} {'load':>8} {'decimate':>9} {'render':>8} {'total':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            path = Path(directory) / f"sphere_{count}.glb"
+            write_glb(path, *make_sphere(count))
+
+            started = time.perf_counter()
+            vertices, faces = load_mesh(str(path))
+            loaded = time.perf_counter()
+            vertices, decimated = decimate_mesh(vertices, faces, THUMBNAIL_MAX_TRIANGLES)
+            reduced = time.perf_counter()
+            render_mesh(vertices, decimated)
+            rendered = time.perf_counter()
+
+            print(
+                f"{len(faces):>10} {len(decimated):>10} "
+                f"{loaded - started:>7.3f}s {reduced - loaded:>8.3f}s "
+                f"{rendered - reduced:>7.3f}s {rendered - started:>7.3f}s"
+            )
+
+if __name__ == "__main__":
+    main()
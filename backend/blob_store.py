@@ -0,0 +1,108 @@
+import uuid
+from datetime import datetime
+from pathlib import Path
+from pymongo import ReturnDocument
+from database import files_collection
+from file_index import file_index, BLOB_NAME_PATTERN
+from storage import remove_file, replace_file, create_directory
+
+# Content-addressed storage configuration
+BLOB_DIR = Path("uploads") / "blobs"
+INCOMING_DIR = BLOB_DIR / "incoming"
+
+INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+
+def get_blob_name(sha256: str, extension: str) -> str:
+    """Blob filename for content with the given hash and extension"""
+    return f"{sha256}{extension.lower()}"
+
+def is_blob_name(filename: str) -> bool:
+    """Whether a filename is a content-addressed blob name"""
+    return bool(BLOB_NAME_PATTERN.match(filename))
+
+def get_blob_path(blob_name: str) -> Path:
+    """Sharded location of a blob, e.g. blobs/ab/cd/abcd...glb"""
+    return BLOB_DIR / blob_name[:2] / blob_name[2:4] / blob_name
+
+def is_blob_path(file_path: str) -> bool:
+    """Whether a stored file path points into the blob store"""
+    path = Path(file_path)
+    return is_blob_name(path.name) and path == get_blob_path(path.name)
+
+def get_incoming_path(extension: str) -> Path:
+    """Temporary location for content that is still being received"""
+    return INCOMING_DIR / f"{uuid.uuid4().hex}{extension.lower()}"
+
+async def store_blob(temp_path: Path, sha256: str, extension: str, size: int) -> str:
+    """Move received content into the blob store and take a reference to it.
+
+    Identical content is stored once; uploading it again only increments the
+    reference count. Returns the blob path.
+    """
+    blob_name = get_blob_name(sha256, extension)
+    blob_path = get_blob_path(blob_name)
+    now = datetime.utcnow()
+
+    await files_collection.update_one(
+        {"_id": blob_name},
+        {
+            "$inc": {"refcount": 1},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {
+                "sha256": sha256,
+                "extension": extension.lower(),
+                "path": str(blob_path),
+                "size": size,
+                "created_at": now
+            }
+        },
+        upsert=True
+    )
+
+    # Replacing is atomic and the bytes are identical, so this is safe even
+    # when the blob already exists or another upload is placing it concurrently
+    await create_directory(blob_path.parent)
+    await replace_file(temp_path, blob_path)
+    file_index.register(str(blob_path))
+
+    return str(blob_path)
+
+async def release_blob(file_path: str) -> bool:
+    """Drop a reference to a blob, deleting it when no references remain.
+
+    Returns True if the blob's bytes were removed from disk.
+    """
+    blob_name = Path(file_path).name
+
+    blob = await files_collection.find_one_and_update(
+        {"_id": blob_name},
+        {"$inc": {"refcount": -1}, "$set": {"updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not blob or blob["refcount"] > 0:
+        return False
+
+    # Move the bytes aside before dropping the record. A store_blob of the same
+    # content in between re-references the record, and then gets them back.
+    blob_path = get_blob_path(blob_name)
+    tombstone_path = get_incoming_path(Path(blob_name).suffix)
+    try:
+        await replace_file(blob_path, tombstone_path)
+    except FileNotFoundError:
+        tombstone_path = None
+    file_index.unregister(str(blob_path))
+
+    # Only the caller that removes the record deletes the bytes
+    result = await files_collection.delete_one({"_id": blob_name, "refcount": {"$lte": 0}})
+    if result.deleted_count == 0:
+        if tombstone_path:
+            # Identical bytes, so this is safe even if the new upload placed its own copy
+            await replace_file(tombstone_path, blob_path)
+        file_index.register(str(blob_path))
+        return False
+
+    if tombstone_path:
+        await remove_file(tombstone_path)
+
+    return True
@@ -0,0 +1,387 @@
+import asyncio
+import json
+import os
+import tarfile
+import zipfile
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import AsyncIterator, IO, List, Optional, Tuple
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from database import characters_collection, animations_collection, processing_jobs_collection
+from job_queue import job_task, update_job, report_progress, raise_if_cancelled
+from job_events import publish_job_event
+from file_handler import (
+    UPLOAD_DIR, UPLOAD_CHUNK_SIZE, MAX_FILE_SIZE,
+    ALLOWED_MODEL_EXTENSIONS, ALLOWED_ANIMATION_EXTENSIONS, ALLOWED_IMAGE_EXTENSIONS,
+    get_file_extension, save_file_stream, save_thumbnail_bytes, release_file
+)
+from thumbnail_renderer import THUMBNAIL_WORKERS, describe_model_async
+from count_cache import invalidate_list_totals
+from response_cache import invalidate_catalog_responses
+from search_index import character_search_index, animation_search_index
+from models.imports import ImportManifest, CharacterImportItem
+from routes.character_routes import build_character_document
+from routes.animation_routes import build_animation_document
+from storage import run_storage, remove_file
+
+# Bulk import configuration
+IMPORT_DIR = UPLOAD_DIR / "imports"
+IMPORT_MAX_ARCHIVE_SIZE = int(os.getenv("IMPORT_MAX_ARCHIVE_SIZE", str(10 * 1024 * 1024 * 1024)))  # 10GB
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "100"))  # documents per insert_many
+IMPORT_ANALYSIS_CONCURRENCY = THUMBNAIL_WORKERS * 2  # models queued on the render pool at once
+# Compressed tars are not accepted: they can only be read front to back, so
+# opening entries in manifest order would re-decompress the archive each time
+ARCHIVE_EXTENSIONS = (".zip", ".tar")
+MANIFEST_NAME = "manifest.json"
+
+IMPORT_DIR.mkdir(exist_ok=True)
+
+def get_archive_extension(filename: str) -> Optional[str]:
+    """Archive suffix of a filename, if it is a supported archive"""
+    lowered = filename.lower()
+    for extension in ARCHIVE_EXTENSIONS:
+        if lowered.endswith(extension):
+            return extension
+    return None
+
+def normalize_entry_name(name: str) -> str:
+    """Archive member path without leading ./ or / and with forward slashes"""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    return "/".join(part for part in parts if part not in ("", ".", "/"))
+
+class ImportArchive:
+    """Read-only access to the files in a zip or uncompressed tar archive.
+
+    Entries are opened as streams and never extracted to disk under their
+    archive names. Both formats allow seeking straight to any entry.
+    """
+
+    def __init__(self, path: str):
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        if zipfile.is_zipfile(path):
+            self._zip = zipfile.ZipFile(path)
+            members = [(info.filename, info) for info in self._zip.infolist() if not info.is_dir()]
+        else:
+            self._tar = tarfile.open(path, "r:")
+            members = [(member.name, member) for member in self._tar.getmembers() if member.isfile()]
+        self._entries = {normalize_entry_name(name): member for name, member in members}
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_entry_name(name) in self._entries
+
+    def size(self, name: str) -> int:
+        """Uncompressed size of an entry"""
+        member = self._entries[normalize_entry_name(name)]
+        return member.file_size if self._zip else member.size
+
+    def open(self, name: str) -> IO[bytes]:
+        """Stream over an entry's uncompressed bytes"""
+        member = self._entries[normalize_entry_name(name)]
+        if self._zip:
+            return self._zip.open(member)
+        return self._tar.extractfile(member)
+
+    def close(self) -> None:
+        if self._zip:
+            self._zip.close()
+        if self._tar:
+            self._tar.close()
+
+async def iter_archive_entry(stream: IO[bytes]) -> AsyncIterator[bytes]:
+    """Yield an archive entry in UPLOAD_CHUNK_SIZE pieces, decompressing off the event loop"""
+    while True:
+        chunk = await run_storage(stream.read, UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+async def store_archive_entry(archive: ImportArchive, name: str, allowed_extensions: set) -> str:
+    """Stream an archive entry into the content-addressed store"""
+    if name not in archive:
+        raise ValueError(f"{name} not found in archive")
+    extension = get_file_extension(name)
+    if extension not in allowed_extensions:
+        raise ValueError(f"Unsupported file type {extension or '(none)'}")
+    if archive.size(name) > MAX_FILE_SIZE:
+        raise ValueError(f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB")
+
+    stream = archive.open(name)
+    try:
+        return await save_file_stream(iter_archive_entry(stream), name)
+    finally:
+        stream.close()
+
+def read_archive_manifest(archive: ImportArchive) -> ImportManifest:
+    """The manifest.json shipped inside an archive"""
+    if MANIFEST_NAME not in archive:
+        raise ValueError(f"No manifest given and no {MANIFEST_NAME} in archive")
+    stream = archive.open(MANIFEST_NAME)
+    try:
+        return ImportManifest.model_validate(json.load(stream))
+    finally:
+        stream.close()
+
+def build_import_items(manifest: ImportManifest) -> List[dict]:
+    """Initial per-item statuses, characters first"""
+    items = [
+        {"kind": "character", "file": item.file, "name": item.name, "status": "pending", "id": None, "error": None}
+        for item in manifest.characters
+    ]
+    items.extend(
+        {"kind": "animation", "file": item.file, "name": item.name, "status": "pending", "id": None, "error": None}
+        for item in manifest.animations
+    )
+    return items
+
+async def create_import_job(
+    user_id: str,
+    archive_path: str,
+    manifest: Optional[ImportManifest],
+    delete_archive: bool = True
+) -> dict:
+    """Insert the job record that tracks an import"""
+    job_doc = {
+        "_id": ObjectId(),
+        "kind": "import",
+        "user_id": ObjectId(user_id),
+        "status": "pending",
+        "progress": 0,
+        "archive_file": archive_path,
+        "delete_archive": delete_archive,
+        "manifest": manifest.model_dump() if manifest else None,
+        "total_items": 0,
+        "imported": 0,
+        "failed": 0,
+        "items": [],
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    await processing_jobs_collection.insert_one(job_doc)
+    await publish_job_event(job_doc)
+    return job_doc
+
+class PreparedItem:
+    """An import item whose files are stored and whose document is being built"""
+
+    def __init__(self, index: int, kind: str):
+        self.index = index
+        self.kind = kind
+        self.files: List[str] = []
+        self.document: Optional[dict] = None
+        self.error: Optional[str] = None
+
+    async def release(self) -> None:
+        """Drop the references taken on this item's stored files"""
+        for file_path in self.files:
+            await release_file(file_path)
+        self.files = []
+
+async def prepare_character(
+    prepared: PreparedItem,
+    item: CharacterImportItem,
+    model_path: str,
+    thumbnail_path: Optional[str],
+    user_id: str,
+    analysis_slots: asyncio.Semaphore
+) -> None:
+    """Analyse a stored model in the render pool and build its document"""
+    async with analysis_slots:
+        try:
+            metadata, rendered = await describe_model_async(model_path, thumbnail_path is None)
+        except Exception as e:
+            print(f"Error analysing imported model: {e}")
+            metadata, rendered = None, None
+
+    if thumbnail_path is None:
+        thumbnail_path = await save_thumbnail_bytes(rendered)
+        if thumbnail_path:
+            prepared.files.append(thumbnail_path)
+
+    prepared.document = build_character_document(item, model_path, thumbnail_path, user_id, metadata)
+
+async def prepare_batch(
+    archive: ImportArchive,
+    batch: List[Tuple[int, dict, object]],
+    user_id: str,
+    analysis_slots: asyncio.Semaphore
+) -> List[PreparedItem]:
+    """Store a batch's files and build its documents.
+
+    Entries are read one at a time (archive streams share one file handle)
+    while the models already stored are analysed in the render pool.
+    """
+    prepared_items = []
+    analyses = []
+    for index, status, item in batch:
+        prepared = PreparedItem(index, status["kind"])
+        prepared_items.append(prepared)
+        try:
+            allowed = ALLOWED_MODEL_EXTENSIONS if prepared.kind == "character" else ALLOWED_ANIMATION_EXTENSIONS
+            file_path = await store_archive_entry(archive, item.file, allowed)
+            prepared.files.append(file_path)
+
+            thumbnail_path = None
+            if item.thumbnail:
+                thumbnail_path = await store_archive_entry(archive, item.thumbnail, ALLOWED_IMAGE_EXTENSIONS)
+                prepared.files.append(thumbnail_path)
+        except Exception as e:
+            prepared.error = str(e)
+            continue
+
+        if prepared.kind == "character":
+            analyses.append(asyncio.ensure_future(
+                prepare_character(prepared, item, file_path, thumbnail_path, user_id, analysis_slots)
+            ))
+        else:
+            prepared.document = build_animation_document(item, file_path, thumbnail_path, user_id)
+
+    results = await asyncio.gather(*analyses, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Error preparing imported character: {result}")
+
+    for prepared in prepared_items:
+        if prepared.document is None and prepared.error is None:
+            prepared.error = "Could not prepare item"
+    return prepared_items
+
+async def insert_batch(collection, prepared_items: List[PreparedItem]) -> None:
+    """Insert a batch's documents with one insert_many, recording per-item failures"""
+    ready = [prepared for prepared in prepared_items if prepared.document is not None]
+    if not ready:
+        return
+
+    try:
+        await collection.insert_many([prepared.document for prepared in ready], ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            prepared = ready[write_error["index"]]
+            prepared.error = write_error.get("errmsg", "Insert failed")
+            prepared.document = None
+
+async def import_batch(
+    archive: ImportArchive,
+    batch: List[Tuple[int, dict, object]],
+    user_id: str,
+    analysis_slots: asyncio.Semaphore
+) -> dict:
+    """Import one batch of same-kind items and return the job fields it changed"""
+    prepared_items = await prepare_batch(archive, batch, user_id, analysis_slots)
+
+    kind = batch[0][1]["kind"]
+    collection = characters_collection if kind == "character" else animations_collection
+    search_index = character_search_index if kind == "character" else animation_search_index
+    try:
+        await insert_batch(collection, prepared_items)
+    except Exception:
+        # Nothing of the batch is recorded as imported, so a retry stores its files again
+        for prepared in prepared_items:
+            await prepared.release()
+        raise
+
+    changes = {}
+    for prepared in prepared_items:
+        prefix = f"items.{prepared.index}"
+        if prepared.document is not None:
+            search_index.add(prepared.document)
+            changes[f"{prefix}.status"] = "imported"
+            changes[f"{prefix}.id"] = str(prepared.document["_id"])
+            changes[f"{prefix}.error"] = None
+        else:
+            await prepared.release()
+            changes[f"{prefix}.status"] = "failed"
+            changes[f"{prefix}.error"] = prepared.error
+
+    if any(prepared.document is not None for prepared in prepared_items):
+        invalidate_list_totals(collection)
+        await invalidate_catalog_responses(collection.name)
+    return changes
+
+def pending_batches(items: List[dict], manifest: ImportManifest) -> List[List[Tuple[int, dict, object]]]:
+    """Items still to import, grouped into same-kind batches of IMPORT_BATCH_SIZE"""
+    manifest_items = list(manifest.characters) + list(manifest.animations)
+    batches = []
+    for kind in ("character", "animation"):
+        pending = [
+            (index, status, manifest_items[index])
+            for index, status in enumerate(items)
+            if status["kind"] == kind and status["status"] != "imported"
+        ]
+        batches.extend(pending[i:i + IMPORT_BATCH_SIZE] for i in range(0, len(pending), IMPORT_BATCH_SIZE))
+    return batches
+
+def count_items(items: List[dict]) -> dict:
+    """Job counters for a list of item statuses"""
+    imported = sum(1 for item in items if item["status"] == "imported")
+    failed = sum(1 for item in items if item["status"] == "failed")
+    return {
+        "imported": imported,
+        "failed": failed,
+        "progress": (imported + failed) * 100 // len(items) if items else 100
+    }
+
+def apply_changes(items: List[dict], changes: dict) -> None:
+    """Mirror dotted items.N.field updates onto the in-memory item list"""
+    for key, value in changes.items():
+        _, index, field = key.split(".")
+        items[int(index)][field] = value
+
+async def remove_import_archive(job: dict) -> None:
+    """Delete an uploaded archive once its import has finished"""
+    archive_path = job.get("archive_file")
+    if job.get("delete_archive", True) and archive_path:
+        try:
+            await remove_file(archive_path)
+        except OSError as e:
+            print(f"Error removing import archive: {e}")
+
+@job_task("import")
+async def run_import_job(job_id: str):
+    """Import every item of an archive's manifest.
+
+    Items already imported by an earlier attempt are skipped, so a retried
+    job picks up where it stopped.
+    """
+    job = await update_job(job_id, {"status": "processing"})
+    if not job:
+        return
+
+    try:
+        archive = await run_storage(ImportArchive, job["archive_file"])
+    except Exception as e:
+        await update_job(job_id, {"status": "failed", "error": f"Unreadable archive: {e}"})
+        await remove_import_archive(job)
+        return
+
+    try:
+        try:
+            if job.get("manifest"):
+                manifest = ImportManifest.model_validate(job["manifest"])
+            else:
+                manifest = await run_storage(read_archive_manifest, archive)
+        except (ValueError, ValidationError) as e:
+            await update_job(job_id, {"status": "failed", "error": f"Invalid manifest: {e}"})
+            await remove_import_archive(job)
+            return
+
+        items = job.get("items") or build_import_items(manifest)
+        if not job.get("items"):
+            await update_job(job_id, {"items": items, "total_items": len(items), **count_items(items)})
+
+        user_id = str(job["user_id"])
+        analysis_slots = asyncio.Semaphore(IMPORT_ANALYSIS_CONCURRENCY)
+        for batch in pending_batches(items, manifest):
+            # Items imported before a cancel are kept
+            await raise_if_cancelled(job_id)
+            changes = await import_batch(archive, batch, user_id, analysis_slots)
+            apply_changes(items, changes)
+            await report_progress(job, {**changes, **count_items(items)})
+    finally:
+        archive.close()
+
+    await update_job(job_id, {"status": "completed", **count_items(items), "progress": 100})
+    await remove_import_archive(job)
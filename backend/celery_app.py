@@ -0,0 +1,48 @@
+import asyncio
+import os
+from celery import Celery
+from job_queue import (
+    JOB_MAX_RETRIES, PRIORITY_LANES, DEFAULT_PRIORITY,
+    get_lane_queue_name, get_retry_delay, run_job, mark_job_retrying, mark_job_failed
+)
+
+# Import modules that register job tasks
+import retarget  # noqa: F401
+import bulk_import  # noqa: F401
+import batch_retarget  # noqa: F401
+
+# Celery configuration
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+celery_app = Celery("mixamo_clone", broker=REDIS_URL)
+celery_app.conf.update(
+    task_default_queue=get_lane_queue_name(DEFAULT_PRIORITY),
+    # Acknowledge after the job ran so a crashed worker's job is redelivered
+    task_acks_late=True,
+    # Fetch one job at a time so higher priority lanes aren't starved
+    worker_prefetch_multiplier=1,
+    # The Redis transport polls queues round-robin by default; "priority"
+    # drains them in the order given to -Q, so a lower lane waits for higher ones
+    broker_transport_options={"queue_order_strategy": "priority"},
+)
+
+# Start workers with: celery -A celery_app worker -Q <JOB_QUEUES>
+# The lanes must be listed highest priority first, as JOB_QUEUES is
+JOB_QUEUES = ",".join(get_lane_queue_name(priority) for priority in PRIORITY_LANES)
+
+# Each worker process runs jobs on one long-lived event loop so the Motor
+# client stays bound to a single loop
+worker_loop = asyncio.new_event_loop()
+
+@celery_app.task(bind=True, name="jobs.run", max_retries=JOB_MAX_RETRIES)
+def run_job_task(self, task_name: str, job_id: str):
+    """Run a registered job handler, retrying with exponential backoff"""
+    try:
+        worker_loop.run_until_complete(run_job(task_name, job_id))
+    except Exception as e:
+        attempt = self.request.retries
+        if attempt >= JOB_MAX_RETRIES:
+            worker_loop.run_until_complete(mark_job_failed(job_id, e))
+            raise
+        worker_loop.run_until_complete(mark_job_retrying(job_id, e, attempt))
+        raise self.retry(exc=e, countdown=get_retry_delay(attempt))
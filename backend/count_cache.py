@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Listing total cache configuration
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "60"))  # seconds
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "5000"))
+
+# The public listing with no filters is counted from collection metadata
+UNFILTERED_QUERY = {"is_public": True}
+
+def normalize_search(search: str) -> str:
+    """Text search terms are matched case-insensitively, so only these are case-folded"""
+    return " ".join(search.lower().split())
+
+def normalize_value(value):
+    """Canonical form of a filter value: unordered lists sorted, $text searches lowercased.
+
+    Equality and $in values are compared exactly by MongoDB and kept as-is.
+    """
+    if isinstance(value, dict):
+        normalized = {key: normalize_value(item) for key, item in value.items()}
+        text = normalized.get("$text")
+        if isinstance(text, dict) and isinstance(text.get("$search"), str) and not text.get("$caseSensitive"):
+            normalized["$text"] = {**text, "$search": normalize_search(text["$search"])}
+        return normalized
+    if isinstance(value, list):
+        return sorted((normalize_value(item) for item in value), key=str)
+    return value
+
+def normalize_filter(query: dict) -> str:
+    """Cache key for a list filter; equivalent filters map to the same key"""
+    return json.dumps(normalize_value(query), sort_keys=True, default=str)
+
+class CountCache:
+    """TTL cache of listing totals, invalidated when a collection is written.
+
+    Each API process keeps its own cache, so writes made through another
+    process show up once the TTL expires.
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_entries: int = COUNT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float]]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+
+    def get(self, collection_name: str, key: str) -> Optional[int]:
+        entry = self._entries.get((collection_name, key))
+        if entry is None:
+            return None
+        count, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[(collection_name, key)]
+            return None
+        self._entries.move_to_end((collection_name, key))
+        return count
+
+    def set(self, collection_name: str, key: str, count: int) -> None:
+        self._entries[(collection_name, key)] = (count, time.monotonic() + self.ttl)
+        self._entries.move_to_end((collection_name, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, collection_name: str) -> None:
+        """Forget every cached total for a collection"""
+        self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == collection_name]:
+            del self._entries[entry_key]
+
+    async def count(self, collection, query: dict) -> int:
+        """Cached count_documents; concurrent misses for one filter share a query"""
+        collection_name = collection.name
+        key = normalize_filter(query)
+        count = self.get(collection_name, key)
+        if count is not None:
+            return count
+
+        pending = self._pending.get((collection_name, key))
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        generation = self._generations.get(collection_name, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(collection_name, key)] = future
+        try:
+            count = await collection.count_documents(query)
+            # A write during the count may have made it stale; don't cache it
+            if self._generations.get(collection_name, 0) == generation:
+                self.set(collection_name, key, count)
+            future.set_result(count)
+            return count
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            del self._pending[(collection_name, key)]
+
+count_cache = CountCache()
+
+async def get_list_total(collection, query: dict, include_total: bool = True) -> Tuple[Optional[int], bool]:
+    """Total for a listing and whether it is an estimate.
+
+    The unfiltered public listing uses the collection's metadata count,
+    which is instant but also counts private documents.
+    """
+    if not include_total:
+        return None, False
+
+    if query == UNFILTERED_QUERY:
+        return await collection.estimated_document_count(), True
+
+    return await count_cache.count(collection, query), False
+
+def invalidate_list_totals(collection) -> None:
+    """Call after inserting, updating or deleting documents in a listed collection"""
+    count_cache.invalidate(collection.name)
@@ -1,7 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel
 import os
 from dotenv import load_dotenv
+from indexes import ensure_indexes
 
 load_dotenv()
 
@@ -16,41 +16,14 @@ characters_collection = db.characters
 animations_collection = db.animations
 processing_jobs_collection = db.processing_jobs
 files_collection = db.files
+upload_sessions_collection = db.upload_sessions
+retarget_results_collection = db.retarget_results
+revoked_tokens_collection = db.revoked_tokens
 
 async def init_database():
     """Initialize database with indexes"""
     try:
-        # Users indexes
-        await users_collection.create_indexes([
-            IndexModel([("email", 1)], unique=True),
-            IndexModel([("created_at", -1)])
-        ])
-        
-        # Characters indexes
-        await characters_collection.create_indexes([
-            IndexModel([("name", "text"), ("description", "text"), ("tags", "text")]),
-            IndexModel([("type", 1)]),
-            IndexModel([("uploaded_by", 1)]),
-            IndexModel([("is_public", 1)]),
-            IndexModel([("created_at", -1)])
-        ])
-        
-        # Animations indexes
-        await animations_collection.create_indexes([
-            IndexModel([("name", "text"), ("description", "text"), ("tags", "text")]),
-            IndexModel([("category", 1)]),
-            IndexModel([("uploaded_by", 1)]),
-            IndexModel([("is_public", 1)]),
-            IndexModel([("created_at", -1)])
-        ])
-        
-        # Processing jobs indexes
-        await processing_jobs_collection.create_indexes([
-            IndexModel([("user_id", 1)]),
-            IndexModel([("status", 1)]),
-            IndexModel([("created_at", -1)])
-        ])
-        
+        await ensure_indexes(db)
         print("Database indexes created successfully")
         
     except Exception as e:
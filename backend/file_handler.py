@@ -1,15 +1,19 @@
-import aiofiles
-import os
+import hashlib
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional, Set
 from fastapi import UploadFile, HTTPException
 from PIL import Image
 import io
+from blob_store import get_incoming_path, store_blob, release_blob, is_blob_path
+from file_index import file_index
+from thumbnail_renderer import render_thumbnail_async
+from storage import run_storage, open_file, stat_file, remove_file, replace_file
 
 # File upload configuration
 UPLOAD_DIR = Path("uploads")
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 ALLOWED_MODEL_EXTENSIONS = {".fbx", ".obj", ".dae", ".gltf", ".glb"}
 ALLOWED_ANIMATION_EXTENSIONS = {".fbx", ".bvh", ".anim"}
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
@@ -31,106 +35,184 @@ def generate_unique_filename(original_filename: str) -> str:
     unique_id = str(uuid.uuid4())
     return f"{unique_id}{extension}"
 
+def file_too_large_error() -> HTTPException:
+    """Build the error raised when an upload exceeds MAX_FILE_SIZE"""
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+    )
+
 async def validate_file_size(file: UploadFile) -> None:
-    """Validate file size"""
-    # Read file to check size
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
+    """Reject uploads whose declared size is already over the limit"""
+    # The multipart parser records the spooled size, so this costs no read.
+    # Uploads without a known size are checked while streaming to disk.
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise file_too_large_error()
+
+def validate_file_extension(filename: str, allowed_extensions: Set[str]) -> None:
+    """Reject filenames whose extension is not in the allowed set"""
+    extension = get_file_extension(filename)
+    if extension not in allowed_extensions:
         raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(allowed_extensions)}"
         )
+
+async def iter_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    """Yield an upload in UPLOAD_CHUNK_SIZE pieces"""
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+async def write_chunks_to_disk(
+    chunks: AsyncIterator[bytes],
+    file_path: Path,
+    max_size: int = MAX_FILE_SIZE
+) -> dict:
+    """Copy a stream of chunks to disk, hashing as it goes.
+
+    Returns the number of bytes written and the SHA-256 hex digest. The data is
+    written to a temporary ``.part`` file that is moved into place only once
+    the whole stream has been received within ``max_size``.
+    """
+    temp_path = file_path.with_name(file_path.name + ".part")
+    digest = hashlib.sha256()
+    size = 0
     
-    # Reset file pointer
-    await file.seek(0)
+    try:
+        async with open_file(temp_path, 'wb') as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise file_too_large_error()
+                digest.update(chunk)
+                await f.write(chunk)
+        await replace_file(temp_path, file_path)
+    except BaseException:
+        await remove_file(temp_path)
+        raise
+    
+    return {"size": size, "sha256": digest.hexdigest()}
 
-async def save_uploaded_file(file: UploadFile, subdirectory: str) -> str:
-    """Save uploaded file and return the file path"""
-    await validate_file_size(file)
+async def save_file_stream(chunks: AsyncIterator[bytes], original_filename: str) -> str:
+    """Save a stream of chunks into the content-addressed store and return the file path"""
+    extension = get_file_extension(original_filename)
+    temp_path = get_incoming_path(extension)
     
-    # Generate unique filename
-    unique_filename = generate_unique_filename(file.filename)
-    file_path = UPLOAD_DIR / subdirectory / unique_filename
+    info = await write_chunks_to_disk(chunks, temp_path)
     
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await file.read()
-        await f.write(content)
+    try:
+        return await store_blob(temp_path, info["sha256"], extension, info["size"])
+    except BaseException:
+        await remove_file(temp_path)
+        raise
+
+async def save_file_bytes(data: bytes, extension: str) -> str:
+    """Save in-memory content into the content-addressed store and return the file path"""
+    temp_path = get_incoming_path(extension)
+    
+    async with open_file(temp_path, 'wb') as f:
+        await f.write(data)
+    
+    return await store_blob(temp_path, hashlib.sha256(data).hexdigest(), extension, len(data))
+
+async def save_uploaded_file(file: UploadFile) -> str:
+    """Save uploaded file and return the file path"""
+    await validate_file_size(file)
     
-    return str(file_path)
+    return await save_file_stream(iter_upload_file(file), file.filename)
 
 async def save_character_file(file: UploadFile) -> str:
     """Save character 3D model file"""
-    extension = get_file_extension(file.filename)
-    if extension not in ALLOWED_MODEL_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_MODEL_EXTENSIONS)}"
-        )
+    validate_file_extension(file.filename, ALLOWED_MODEL_EXTENSIONS)
     
-    return await save_uploaded_file(file, "characters")
+    return await save_uploaded_file(file)
 
 async def save_animation_file(file: UploadFile) -> str:
     """Save animation file"""
-    extension = get_file_extension(file.filename)
-    if extension not in ALLOWED_ANIMATION_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_ANIMATION_EXTENSIONS)}"
-        )
+    validate_file_extension(file.filename, ALLOWED_ANIMATION_EXTENSIONS)
     
-    return await save_uploaded_file(file, "animations")
+    return await save_uploaded_file(file)
 
 async def save_thumbnail_file(file: UploadFile) -> str:
     """Save thumbnail image file"""
-    extension = get_file_extension(file.filename)
-    if extension not in ALLOWED_IMAGE_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}"
-        )
+    validate_file_extension(file.filename, ALLOWED_IMAGE_EXTENSIONS)
     
-    return await save_uploaded_file(file, "thumbnails")
+    return await save_uploaded_file(file)
 
-async def generate_thumbnail_from_model(model_path: str) -> Optional[str]:
-    """Generate thumbnail from 3D model (placeholder implementation)"""
-    # This is a placeholder - in production you would use a 3D rendering library
-    # to generate thumbnails from 3D models
+def render_placeholder_thumbnail() -> bytes:
+    """Plain JPEG used when a model can't be rendered"""
+    img = Image.new('RGB', (300, 300), color='lightgray')
+    
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG")
+    return buffer.getvalue()
+
+async def save_thumbnail_bytes(data: Optional[bytes]) -> Optional[str]:
+    """Store a rendered JPEG thumbnail, or a plain placeholder if there is none"""
     try:
-        # Create a placeholder thumbnail
-        img = Image.new('RGB', (300, 300), color='lightgray')
-        
-        thumbnail_filename = f"thumb_{uuid.uuid4().hex}.jpg"
-        thumbnail_path = UPLOAD_DIR / "thumbnails" / thumbnail_filename
+        if data is None:
+            # Formats the renderer can't read (FBX, DAE) get a placeholder
+            data = await run_storage(render_placeholder_thumbnail)
         
-        img.save(thumbnail_path, "JPEG")
-        return str(thumbnail_path)
+        return await save_file_bytes(data, ".jpg")
     except Exception as e:
         print(f"Error generating thumbnail: {e}")
         return None
 
+async def generate_thumbnail_from_model(model_path: str) -> Optional[str]:
+    """Render a thumbnail from a 3D model, falling back to a plain placeholder"""
+    try:
+        data = await render_thumbnail_async(model_path)
+    except Exception as e:
+        print(f"Error rendering thumbnail: {e}")
+        data = None
+    
+    return await save_thumbnail_bytes(data)
+
 async def delete_file(file_path: str) -> bool:
     """Delete file from storage"""
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            return True
-        return False
+        file_index.unregister(file_path)
+        return await remove_file(file_path)
     except Exception as e:
         print(f"Error deleting file {file_path}: {e}")
         return False
 
-def get_file_url(file_path: str) -> str:
+async def release_file(file_path: Optional[str]) -> bool:
+    """Release a stored file that a deleted document referenced.
+
+    Content-addressed files are only removed once nothing else references
+    them; legacy per-upload files are deleted directly. Paths outside the
+    upload directory (e.g. external thumbnail URLs) are left alone.
+    """
+    if not file_path:
+        return False
+    
+    if is_blob_path(file_path):
+        return await release_blob(file_path)
+    
+    if UPLOAD_DIR.resolve() not in Path(file_path).resolve().parents:
+        return False
+    
+    return await delete_file(file_path)
+
+def get_file_url(file_path: Optional[str]) -> Optional[str]:
     """Convert file path to URL"""
+    # Documents without a file get no URL rather than a dangling "/api/files/"
+    if not file_path:
+        return None
     # In production, this would return a proper URL (CDN, S3, etc.)
     return f"/api/files/{Path(file_path).name}"
 
-def get_file_info(file_path: str) -> dict:
+async def get_file_info(file_path: str) -> dict:
     """Get file information"""
-    if not os.path.exists(file_path):
+    stat = await stat_file(file_path)
+    if stat is None:
         return {}
     
-    stat = os.stat(file_path)
     return {
         "size": stat.st_size,
         "created": stat.st_ctime,
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+# File index configuration
+UPLOAD_DIR = Path("uploads")
+# Kept outside UPLOAD_DIR: anything in there can be served by name
+INDEX_PATH = Path(os.getenv("FILE_INDEX_PATH", "file_index.json"))
+LEGACY_INDEX_PATH = UPLOAD_DIR / "file_index.json"  # where older versions saved it; deleted at startup
+SERVED_SUBDIRECTORIES = ["characters", "animations", "thumbnails", "processed"]
+BLOB_SUBDIRECTORY = "blobs"
+BLOB_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]+)?$")
+
+class FileIndex:
+    """In-memory filename -> path index for served upload files.
+
+    Lookups are a single dictionary access. Misses are not cached: files
+    written by other API processes or by job workers must be found by the
+    probe as soon as they exist.
+    """
+
+    def __init__(self, root: Path = UPLOAD_DIR, index_path: Path = INDEX_PATH):
+        self.root = root
+        self.index_path = index_path
+        self._paths: Dict[str, str] = {}
+        # Changes made while a rebuild scan is running, replayed onto its result
+        self._changes_during_scan: Optional[Dict[str, Optional[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """Return the indexed path for a filename, if any"""
+        return self._paths.get(filename)
+
+    def register(self, file_path: str) -> None:
+        """Add a stored file to the index"""
+        filename = Path(file_path).name
+        self._paths[filename] = str(file_path)
+        if self._changes_during_scan is not None:
+            self._changes_during_scan[filename] = str(file_path)
+
+    def unregister(self, file_path: str) -> None:
+        """Remove a deleted file from the index"""
+        filename = Path(file_path).name
+        if self._paths.get(filename) == str(file_path):
+            del self._paths[filename]
+        if self._changes_during_scan is not None:
+            self._changes_during_scan[filename] = None
+
+    def probe(self, filename: str) -> Optional[str]:
+        """Search the upload directories for a file the index doesn't know"""
+        if BLOB_NAME_PATTERN.match(filename):
+            potential_path = self.root / BLOB_SUBDIRECTORY / filename[:2] / filename[2:4] / filename
+            if potential_path.is_file():
+                return str(potential_path)
+
+        for subdir in SERVED_SUBDIRECTORIES:
+            potential_path = self.root / subdir / filename
+            if potential_path.is_file():
+                return str(potential_path)
+
+        potential_path = self.root / filename
+        if potential_path.is_file() and potential_path.resolve() != self.index_path.resolve():
+            return str(potential_path)
+
+        return None
+
+    def scan(self) -> Dict[str, str]:
+        """Walk the upload directories and collect every served file"""
+        paths = {}
+
+        for entry in os.scandir(self.root):
+            if entry.is_file() and Path(entry.path).resolve() != self.index_path.resolve():
+                paths[entry.name] = entry.path
+
+        for subdir in SERVED_SUBDIRECTORIES:
+            directory = self.root / subdir
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    paths[entry.name] = entry.path
+
+        for dirpath, dirnames, filenames in os.walk(self.root / BLOB_SUBDIRECTORY):
+            # Skip content that is still being received
+            dirnames[:] = [name for name in dirnames if name != "incoming"]
+            for filename in filenames:
+                paths[filename] = os.path.join(dirpath, filename)
+
+        return paths
+
+    def _apply_changes(self, paths: Dict[str, str]) -> None:
+        """Replay registrations made during a rebuild scan onto its result"""
+        for filename, file_path in list(self._changes_during_scan.items()):
+            if file_path is None:
+                paths.pop(filename, None)
+            else:
+                paths[filename] = file_path
+
+    def rebuild(self) -> int:
+        """Replace the index with a fresh scan of the upload directories.
+
+        Safe to run in a worker thread while the index keeps serving lookups.
+        """
+        self._changes_during_scan = {}
+        try:
+            paths = self.scan()
+            self._apply_changes(paths)
+            self._paths = paths
+            # Catch changes that landed between the replay and the swap
+            self._apply_changes(paths)
+        finally:
+            self._changes_during_scan = None
+
+        return len(paths)
+
+    def load(self) -> bool:
+        """Load the persisted index; returns False if there is none"""
+        try:
+            with open(self.index_path) as f:
+                paths = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+
+        paths.update(self._paths)
+        self._paths = paths
+        return True
+
+    def save(self) -> None:
+        """Persist the index atomically"""
+        temp_path = self.index_path.with_name(self.index_path.name + ".part")
+        with open(temp_path, "w") as f:
+            json.dump(dict(self._paths), f)
+        os.replace(temp_path, self.index_path)
+
+file_index = FileIndex()
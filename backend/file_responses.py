@@ -0,0 +1,144 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from hashlib import md5
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from file_index import BLOB_NAME_PATTERN
+from storage import open_file
+
+# HTTP caching configuration
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+RANGE_CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def get_etag(filename: str, stat_result: os.stat_result) -> str:
+    """Strong ETag from the content hash for blobs, weak mtime/size ETag otherwise"""
+    if BLOB_NAME_PATTERN.match(filename):
+        return f'"{Path(filename).stem}"'
+    etag_base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return f'W/"{md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+def not_modified_since(header: str, stat_result: os.stat_result) -> bool:
+    """Whether the file is unchanged since an If-Modified-Since date"""
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(stat_result.st_mtime) <= since
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns None when the header should be ignored (malformed or multiple
+    ranges) and raises ValueError when the range is unsatisfiable.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if size == 0:
+        raise ValueError("Range not satisfiable")
+
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+
+    return start, min(end, size - 1)
+
+async def iter_file_range(file_path: str, start: int, end: int):
+    """Yield the inclusive byte range of a file"""
+    remaining = end - start + 1
+    async with open_file(file_path, 'rb') as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def build_file_response(
+    request: Request,
+    file_path: str,
+    filename: str,
+    stat_result: os.stat_result
+) -> Response:
+    """Serve a stored file with validators, conditional GET and Range support"""
+    size = stat_result.st_size
+    etag = get_etag(filename, stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL if BLOB_NAME_PATTERN.match(filename)
+            else REVALIDATE_CACHE_CONTROL
+        ),
+        "Content-Disposition": f"inline; filename={filename}"
+    }
+
+    # Conditional GET; If-None-Match takes precedence over If-Modified-Since
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif if_modified_since and not_modified_since(if_modified_since, stat_result):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if_range_valid = if_range == last_modified or (if_range == etag and not etag.startswith("W/"))
+    if range_header and if_range and not if_range_valid:
+        # The client's partial copy is stale; send the whole file
+        range_header = None
+
+    if range_header:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+
+        if byte_range:
+            start, end = byte_range
+            media_type = guess_type(filename)[0] or "application/octet-stream"
+            return StreamingResponse(
+                iter_file_range(file_path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1)
+                }
+            )
+
+    return FileResponse(file_path, stat_result=stat_result, headers=headers)
@@ -0,0 +1,61 @@
+"""Import a character/animation library archive from the command line.
+
+Run from the backend directory:
+
+    python import_library.py library.zip --user-email artist@example.com [--manifest manifest.json]
+
+The archive is read in place (not copied or deleted) and imported the same
+way as an archive uploaded to POST /api/imports.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Optional
+from pathlib import Path
+from database import users_collection, processing_jobs_collection, init_database, close_database
+from models.imports import ImportManifest
+from bulk_import import create_import_job, run_import_job
+from thumbnail_renderer import shutdown_render_pool
+
+async def import_library(archive: str, user_email: str, manifest_path: Optional[str] = None) -> int:
+    """Run an import to completion and print its per-item results"""
+    await init_database()
+    try:
+        user = await users_collection.find_one({"email": user_email})
+        if not user:
+            print(f"No user with email {user_email}")
+            return 1
+
+        manifest = None
+        if manifest_path:
+            manifest = ImportManifest.model_validate(json.loads(Path(manifest_path).read_text()))
+
+        job = await create_import_job(str(user["_id"]), str(Path(archive).resolve()), manifest, delete_archive=False)
+        await run_import_job(str(job["_id"]))
+        job = await processing_jobs_collection.find_one({"_id": job["_id"]})
+    finally:
+        await close_database()
+
+    for item in job.get("items", []):
+        detail = item["id"] if item["status"] == "imported" else item["error"]
+        print(f"{item['status']:<9} {item['kind']:<10} {item['file']}: {detail}")
+    if job.get("error"):
+        print(f"Import failed: {job['error']}")
+    print(f"{job.get('imported', 0)} imported, {job.get('failed', 0)} failed")
+    return 0 if job["status"] == "completed" and not job.get("failed") else 1
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import a character/animation library archive")
+    parser.add_argument("archive", help="zip or uncompressed tar archive of models and animations")
+    parser.add_argument("--user-email", required=True, help="owner of the imported items")
+    parser.add_argument("--manifest", help="manifest JSON, if not shipped as manifest.json in the archive")
+    args = parser.parse_args()
+
+    try:
+        return asyncio.run(import_library(args.archive, args.user_email, args.manifest))
+    finally:
+        shutdown_render_pool()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Tuple
+from bson import ObjectId
+from pymongo import IndexModel
+
+# Query plan check configuration
+INDEX_PLAN_CHECK = os.getenv("INDEX_PLAN_CHECK", "true").lower() == "true"
+SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "100"))
+
+# Seconds past expires_at before Mongo deletes a job the sweeper missed
+JOB_TTL_GRACE = 24 * 60 * 60
+
+# Newest first; _id breaks ties between documents created in the same millisecond
+LIST_SORT = [("created_at", -1), ("_id", -1)]
+
+def listing_index(*equality_fields: str) -> IndexModel:
+    """Compound index for a public listing: equality filters first, then the sort"""
+    return IndexModel([("is_public", 1)] + [(field, 1) for field in equality_fields] + LIST_SORT)
+
+# Indexes per collection, one per query shape the routes issue
+COLLECTION_INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", 1)], unique=True),
+        IndexModel([("created_at", -1)])
+    ],
+    "characters": [
+        IndexModel([("name", "text"), ("description", "text"), ("tags", "text")]),
+        listing_index(),
+        listing_index("type"),
+        listing_index("tags"),
+        IndexModel([("uploaded_by", 1)])
+    ],
+    "animations": [
+        IndexModel([("name", "text"), ("description", "text"), ("tags", "text")]),
+        listing_index(),
+        listing_index("category"),
+        listing_index("tags"),
+        IndexModel([("uploaded_by", 1)])
+    ],
+    "processing_jobs": [
+        IndexModel([("user_id", 1)] + LIST_SORT),
+        IndexModel([("status", 1)]),
+        IndexModel([("created_at", -1)]),
+        # Lets the sweeper check whether a result file is still referenced
+        IndexModel([("result_file", 1)], partialFilterExpression={"result_file": {"$type": "string"}}),
+        # The sweeper deletes expired jobs with their files; TTL is the backstop
+        IndexModel([("expires_at", 1)], expireAfterSeconds=JOB_TTL_GRACE)
+    ],
+    # Abandoned sessions expire via TTL
+    "upload_sessions": [
+        IndexModel([("user_id", 1)]),
+        IndexModel([("expires_at", 1)], expireAfterSeconds=0)
+    ],
+    # Revoked tokens are forgotten once they would have expired anyway
+    "revoked_tokens": [
+        IndexModel([("expires_at", 1)], expireAfterSeconds=0)
+    ],
+    # LRU eviction order of the retarget result cache
+    "retarget_results": [
+        IndexModel([("last_used_at", 1)])
+    ]
+}
+
+# Indexes made redundant by the compound indexes above
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    "characters": ["is_public_1", "type_1", "created_at_-1", "created_at_-1__id_-1"],
+    "animations": ["is_public_1", "category_1", "created_at_-1", "created_at_-1__id_-1"],
+    "processing_jobs": ["user_id_1"]
+}
+
+def after_cursor(query: dict) -> dict:
+    """A listing filter as it looks on a page fetched with a cursor"""
+    position = datetime.utcnow()
+    return {
+        **query,
+        "$or": [
+            {"created_at": {"$lt": position}},
+            {"created_at": position, "_id": {"$lt": ObjectId()}}
+        ]
+    }
+
+# (collection, filter) for every listing the routes can issue; all sort by LIST_SORT.
+# $text searches are left out: they are served by the text index and sorted in memory.
+LIST_QUERY_SHAPES: List[Tuple[str, dict]] = [
+    ("characters", {"is_public": True}),
+    ("characters", after_cursor({"is_public": True})),
+    ("characters", {"is_public": True, "type": "Humanoid"}),
+    ("characters", {"is_public": True, "tags": {"$in": ["tag"]}}),
+    ("animations", {"is_public": True}),
+    ("animations", after_cursor({"is_public": True, "category": "Basic"})),
+    ("animations", {"is_public": True, "category": "Basic"}),
+    ("animations", {"is_public": True, "tags": {"$in": ["tag"]}}),
+    ("processing_jobs", {"user_id": ObjectId()}),
+    ("processing_jobs", after_cursor({"user_id": ObjectId()}))
+]
+
+async def ensure_indexes(db) -> None:
+    """Create the declared indexes and drop ones they replace"""
+    for collection_name, indexes in COLLECTION_INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        for index_name in OBSOLETE_INDEXES.get(collection_name, []):
+            if index_name in existing:
+                await collection.drop_index(index_name)
+        await collection.create_indexes(indexes)
+
+def plan_stages(plan: dict) -> List[str]:
+    """Every stage name in an explain() plan tree"""
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+async def explain_list_query(db, collection_name: str, query: dict, limit: int = 21) -> dict:
+    """executionStats explain of a listing query"""
+    return await db.command({
+        "explain": {
+            "find": collection_name,
+            "filter": query,
+            "sort": dict(LIST_SORT),
+            "limit": limit
+        },
+        "verbosity": "executionStats"
+    })
+
+async def check_query_plans(db) -> List[str]:
+    """Problems with the plans of the listing queries (collection scans, in-memory sorts, slow runs)"""
+    problems = []
+    for collection_name, query in LIST_QUERY_SHAPES:
+        explain = await explain_list_query(db, collection_name, query)
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        stats = explain.get("executionStats", {})
+
+        if "COLLSCAN" in stages:
+            problems.append(f"{collection_name} {query}: unindexed (collection scan)")
+        if "SORT" in stages:
+            problems.append(f"{collection_name} {query}: sorted in memory")
+        if stats.get("executionTimeMillis", 0) >= SLOW_QUERY_MS:
+            problems.append(
+                f"{collection_name} {query}: slow ({stats['executionTimeMillis']}ms, "
+                f"{stats.get('totalDocsExamined', 0)} documents examined for {stats.get('nReturned', 0)})"
+            )
+    return problems
+
+async def report_query_plans(db) -> None:
+    """Log listing queries that aren't served well by an index"""
+    if not INDEX_PLAN_CHECK:
+        return
+
+    try:
+        problems = await check_query_plans(db)
+    except Exception as e:
+        print(f"Error checking query plans: {e}")
+        return
+
+    for problem in problems:
+        print(f"Query plan warning: {problem}")
+    if not problems:
+        print("All listing queries are served by indexes")
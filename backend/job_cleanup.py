@@ -0,0 +1,91 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+from database import processing_jobs_collection, retarget_results_collection
+from file_handler import release_file
+from result_cache import PROCESSED_DIR
+from bulk_import import remove_import_archive
+from storage import run_storage
+
+# Job cleanup configuration
+JOB_SWEEP_INTERVAL = 15 * 60  # seconds
+JOB_SWEEP_BATCH = 500  # expired jobs loaded per query
+JOB_ORPHAN_GRACE = timedelta(hours=1)
+
+def list_stale_result_files(cutoff: float) -> List[str]:
+    """Result files not modified since ``cutoff`` (a timestamp)"""
+    return [
+        entry.path for entry in os.scandir(PROCESSED_DIR)
+        if entry.is_file() and entry.stat().st_mtime < cutoff
+    ]
+
+async def find_unreferenced_result_files(result_files: List[str]) -> List[str]:
+    """The result files no job or cache entry points at, checked with one query per collection.
+
+    Cached results are named by their cache key and evicted by the cache itself.
+    """
+    referenced = set()
+    async for job in processing_jobs_collection.find({"result_file": {"$in": result_files}}, {"result_file": 1}):
+        referenced.add(job["result_file"])
+    cached_keys = set()
+    async for entry in retarget_results_collection.find(
+        {"_id": {"$in": [Path(path).stem for path in result_files]}}, {"_id": 1}
+    ):
+        cached_keys.add(entry["_id"])
+    return [
+        path for path in result_files
+        if path not in referenced and Path(path).stem not in cached_keys
+    ]
+
+async def delete_job(job: dict) -> None:
+    """Remove a job document, then any files only it was using"""
+    await processing_jobs_collection.delete_one({"_id": job["_id"]})
+
+    result_file = job.get("result_file")
+    if result_file and await find_unreferenced_result_files([result_file]):
+        await release_file(result_file)
+
+    # Archives of imports that were cancelled or crashed before cleaning up
+    if job.get("kind") == "import":
+        await remove_import_archive(job)
+
+async def cleanup_expired_jobs() -> int:
+    """Delete jobs past their expires_at and result files nothing references"""
+    now = datetime.utcnow()
+    removed = 0
+
+    projection = {"result_file": 1, "kind": 1, "archive_file": 1, "delete_archive": 1}
+    while True:
+        jobs = await processing_jobs_collection.find(
+            {"expires_at": {"$lt": now}}, projection
+        ).limit(JOB_SWEEP_BATCH).to_list(JOB_SWEEP_BATCH)
+        for job in jobs:
+            await delete_job(job)
+        removed += len(jobs)
+        if len(jobs) < JOB_SWEEP_BATCH:
+            break
+
+    # Results of jobs removed by the TTL index, or whose job never recorded them.
+    # Recently written files are skipped so running jobs aren't raced.
+    cutoff = (now - JOB_ORPHAN_GRACE).timestamp()
+    stale_files = await run_storage(list_stale_result_files, cutoff)
+    for start in range(0, len(stale_files), JOB_SWEEP_BATCH):
+        for path in await find_unreferenced_result_files(stale_files[start:start + JOB_SWEEP_BATCH]):
+            await release_file(path)
+            removed += 1
+
+    return removed
+
+async def run_job_sweeper() -> None:
+    """Periodically delete expired jobs and their result files"""
+    while True:
+        try:
+            removed = await cleanup_expired_jobs()
+            if removed:
+                print(f"Removed {removed} expired jobs and result files")
+        except Exception as e:
+            print(f"Error cleaning up jobs: {e}")
+
+        await asyncio.sleep(JOB_SWEEP_INTERVAL)
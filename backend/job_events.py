@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+# Job event configuration
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+# Workers in other processes can only reach API watchers through Redis
+JOB_EVENTS_BACKEND = os.getenv(
+    "JOB_EVENTS_BACKEND", "redis" if os.getenv("JOB_QUEUE_BACKEND") == "celery" else "local"
+)
+JOB_EVENTS_CHANNEL = "job-events"
+SUBSCRIBER_QUEUE_SIZE = 100
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+def build_job_event(job: dict) -> dict:
+    """JSON-serializable progress event for a job document"""
+    updated_at = job.get("updated_at") or datetime.utcnow()
+    return {
+        "job_id": str(job["_id"]),
+        "user_id": str(job["user_id"]),
+        "status": job.get("status"),
+        "progress": job.get("progress", 0),
+        "result_file": job.get("result_file"),
+        "error": job.get("error"),
+        "updated_at": updated_at.isoformat()
+    }
+
+class JobSubscription:
+    """A watcher's queue of job events; open/close it or use it as an async context manager"""
+
+    def __init__(self, bus: "JobEventBus", keys: List[str]):
+        self.bus = bus
+        self.keys = keys
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def open(self) -> "JobSubscription":
+        """Start receiving events"""
+        self.bus._add(self)
+        return self
+
+    def close(self) -> None:
+        """Stop receiving events"""
+        self.bus._remove(self)
+
+    async def __aenter__(self) -> "JobSubscription":
+        return self.open()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def put(self, event: dict) -> None:
+        # Slow watchers lose their oldest updates rather than blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next event, or None if nothing arrived within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class JobEventBus:
+    """Fans job progress events out to watchers of a job or of a user's jobs.
+
+    With the local backend events are dispatched in-process. With the Redis
+    backend they are published to a channel and every API process dispatches
+    what it receives to its own watchers, so workers anywhere can reach them.
+    """
+
+    def __init__(self, backend: str = JOB_EVENTS_BACKEND):
+        self.backend = backend
+        self._subscribers: Dict[str, Set[JobSubscription]] = {}
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe_job(self, job_id: str) -> JobSubscription:
+        return JobSubscription(self, [job_key(job_id)])
+
+    def subscribe_user(self, user_id: str) -> JobSubscription:
+        return JobSubscription(self, [user_key(user_id)])
+
+    def _add(self, subscription: JobSubscription) -> None:
+        for key in subscription.keys:
+            self._subscribers.setdefault(key, set()).add(subscription)
+
+    def _remove(self, subscription: JobSubscription) -> None:
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def dispatch(self, event: dict) -> None:
+        """Deliver an event to this process's watchers"""
+        keys: Iterable[str] = (job_key(event["job_id"]), user_key(event["user_id"]))
+        for key in keys:
+            for subscription in list(self._subscribers.get(key, ())):
+                subscription.put(event)
+
+    async def publish(self, event: dict) -> None:
+        """Publish a job event to every watcher"""
+        if self.backend != "redis":
+            self.dispatch(event)
+            return
+
+        try:
+            await self._get_redis().publish(JOB_EVENTS_CHANNEL, json.dumps(event))
+        except Exception as e:
+            # Progress events are best effort; the job document stays authoritative
+            print(f"Error publishing job event: {e}")
+
+    def _get_redis(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(REDIS_URL)
+        return self._redis
+
+    async def start(self) -> None:
+        """Start relaying Redis events to local watchers (API processes only)"""
+        if self.backend == "redis":
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._get_redis().pubsub()
+                await pubsub.subscribe(JOB_EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job event listener error, reconnecting: {e}")
+                await asyncio.sleep(1)
+
+job_event_bus = JobEventBus()
+
+async def publish_job_event(job: dict) -> None:
+    """Publish the current state of a job document"""
+    await job_event_bus.publish(build_job_event(job))
@@ -0,0 +1,348 @@
+import asyncio
+import itertools
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from database import processing_jobs_collection
+from job_events import publish_job_event, TERMINAL_STATUSES
+
+# Job queue configuration
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "local")  # "local" or "celery"
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "2.0"))  # seconds, doubled per retry
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL_MS", "500")) / 1000  # min seconds between writes per job
+JOB_RETENTION = timedelta(days=int(os.getenv("JOB_RETENTION_DAYS", "7")))  # finished jobs are kept this long
+
+# Statuses a job can be cancelled from
+CANCELLABLE_STATUSES = ["pending", "processing"]
+
+# Priority lanes: lower runs first
+SUBSCRIPTION_PRIORITIES = {"enterprise": 0, "pro": 1, "free": 2}
+DEFAULT_PRIORITY = 2
+PRIORITY_LANES = sorted(set(SUBSCRIPTION_PRIORITIES.values()))
+
+# Registered job handlers, looked up by name so workers can run them
+JobHandler = Callable[[str], Awaitable[None]]
+job_handlers: Dict[str, JobHandler] = {}
+
+def job_task(name: str) -> Callable[[JobHandler], JobHandler]:
+    """Register a coroutine function ``handler(job_id)`` as a job task"""
+    def decorator(handler: JobHandler) -> JobHandler:
+        job_handlers[name] = handler
+        return handler
+    return decorator
+
+def get_job_priority(subscription: Optional[str]) -> int:
+    """Priority lane for a user's subscription tier"""
+    return SUBSCRIPTION_PRIORITIES.get(subscription or "free", DEFAULT_PRIORITY)
+
+def get_lane_queue_name(priority: int) -> str:
+    """Broker queue name for a priority lane"""
+    return f"jobs-{priority}"
+
+def get_retry_delay(attempt: int) -> float:
+    """Exponential backoff before retry number ``attempt + 1``"""
+    return JOB_RETRY_BACKOFF * (2 ** attempt)
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when its job was cancelled"""
+
+def get_job_expiry(fields: dict, now: datetime) -> dict:
+    """expires_at for fields that finish a job, so finished jobs are cleaned up after JOB_RETENTION"""
+    if fields.get("status") in TERMINAL_STATUSES:
+        return {"expires_at": now + JOB_RETENTION}
+    return {}
+
+async def is_job_cancelled(job_id: str) -> bool:
+    """Whether a job has been cancelled"""
+    job = await processing_jobs_collection.find_one(
+        {"_id": ObjectId(job_id), "status": "cancelled"}, {"_id": 1}
+    )
+    return job is not None
+
+async def raise_if_cancelled(job_id: str) -> None:
+    """Checkpoint for job handlers: stop here if the job was cancelled"""
+    if await is_job_cancelled(job_id):
+        raise JobCancelled(job_id)
+
+async def run_job(task_name: str, job_id: str) -> None:
+    """Run a registered job handler, unless its job was cancelled while queued"""
+    handler = job_handlers.get(task_name)
+    if handler is None:
+        raise ValueError(f"Unknown job task: {task_name}")
+    try:
+        await raise_if_cancelled(job_id)
+        await handler(job_id)
+    except JobCancelled:
+        print(f"Job {job_id} stopped: cancelled")
+
+class ProgressReporter:
+    """Coalesces job progress updates and writes them in batches.
+
+    Updates are merged in memory per job and written with one bulk_write
+    every JOB_PROGRESS_INTERVAL, so each job is written (and its watchers
+    notified) at most once per interval however often it reports. Terminal
+    states don't belong here; they are written at once with update_job.
+    """
+
+    def __init__(self, interval: float = JOB_PROGRESS_INTERVAL):
+        self.interval = interval
+        self._pending: Dict[str, dict] = {}  # job ID -> fields not yet written
+        self._jobs: Dict[str, dict] = {}  # job ID -> latest state, for events
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def report(self, job: dict, fields: dict) -> None:
+        """Record new fields for a job; written on the next flush"""
+        job_id = str(job["_id"])
+        self._pending.setdefault(job_id, {}).update(fields)
+        self._jobs[job_id] = {**self._jobs.get(job_id, job), **fields}
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    def take(self, job_id: str) -> dict:
+        """Remove and return a job's unwritten fields, for a caller writing the job directly"""
+        self._jobs.pop(job_id, None)
+        return self._pending.pop(job_id, {})
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                pass  # reported by flush; the fields are retried next interval
+
+    async def flush(self) -> None:
+        """Write pending updates in one bulk_write and notify watchers of the jobs it changed"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        now = datetime.utcnow()
+        operations = []
+        for job_id, fields in pending.items():
+            # A late write must never overwrite a finished or cancelled job
+            query = {"_id": ObjectId(job_id), "status": {"$nin": sorted(TERMINAL_STATUSES)}}
+            operations.append(UpdateOne(query, {"$set": {**fields, "updated_at": now}}))
+
+        try:
+            result = await processing_jobs_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"Error writing job progress: {e}")
+            # Keep the fields for the next flush unless newer ones arrived meanwhile
+            for job_id, fields in pending.items():
+                self._pending[job_id] = {**fields, **self._pending.get(job_id, {})}
+            raise
+
+        written = set(pending)
+        if result.matched_count < len(operations):
+            # Some jobs finished meanwhile; only the ones still running were written
+            written = {
+                str(job["_id"]) async for job in processing_jobs_collection.find(
+                    {"_id": {"$in": [ObjectId(job_id) for job_id in pending]}, "status": {"$nin": sorted(TERMINAL_STATUSES)}},
+                    {"_id": 1}
+                )
+            }
+
+        for job_id in pending:
+            if job_id not in written:
+                self._jobs.pop(job_id, None)
+                continue
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            job["updated_at"] = now
+            await publish_job_event(job)
+
+progress_reporter = ProgressReporter()
+
+async def report_progress(job: dict, fields: dict) -> None:
+    """Coalesced, rate-limited update of a running job; finish jobs with update_job instead"""
+    if fields.get("status") in TERMINAL_STATUSES:
+        raise ValueError("Terminal job states are written with update_job")
+    await progress_reporter.report(job, fields)
+
+async def update_job(job_id: str, fields: dict) -> Optional[dict]:
+    """Update a job document and publish its new state to watchers.
+
+    Cancelled jobs are left alone; None is returned for them as for missing jobs.
+    """
+    # Fold in coalesced progress that hasn't been written yet
+    fields = {**progress_reporter.take(job_id), **fields}
+    now = datetime.utcnow()
+    job = await processing_jobs_collection.find_one_and_update(
+        {"_id": ObjectId(job_id), "status": {"$ne": "cancelled"}},
+        {"$set": {**fields, **get_job_expiry(fields, now), "updated_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if job:
+        await publish_job_event(job)
+    return job
+
+async def cancel_job(job_id: str, user_id: str) -> Optional[dict]:
+    """Cancel a user's pending or running job; None if it isn't theirs or already finished"""
+    now = datetime.utcnow()
+    job = await processing_jobs_collection.find_one_and_update(
+        {"_id": ObjectId(job_id), "user_id": ObjectId(user_id), "status": {"$in": CANCELLABLE_STATUSES}},
+        {"$set": {"status": "cancelled", "expires_at": now + JOB_RETENTION, "updated_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not job:
+        return None
+
+    progress_reporter.take(job_id)
+    await publish_job_event(job)
+    await job_queue.cancel(job_id)
+    return job
+
+async def mark_job_retrying(job_id: str, error: Exception, attempt: int) -> None:
+    """Put a failed job back to pending before it is retried"""
+    await update_job(job_id, {
+        "status": "pending",
+        "error": str(error),
+        "attempts": attempt + 1
+    })
+
+async def mark_job_failed(job_id: str, error: Exception) -> None:
+    """Record that a job has exhausted its retries"""
+    await update_job(job_id, {
+        "status": "failed",
+        "error": str(error)
+    })
+
+class LocalJobQueue:
+    """In-process worker pool, used for development and tests"""
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY):
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._counter = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._retry_handles: List[asyncio.TimerHandle] = []
+        self._running: Dict[str, asyncio.Task] = {}  # job ID -> task running it
+        self._cancelled: Set[str] = set()
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for handle in self._retry_handles:
+            handle.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._retry_handles = []
+
+    async def enqueue(self, task_name: str, job_id: str, priority: int = DEFAULT_PRIORITY) -> None:
+        self._put(priority, task_name, job_id, 0)
+
+    def _put(self, priority: int, task_name: str, job_id: str, attempt: int) -> None:
+        # The counter keeps FIFO order within a lane
+        self._queue.put_nowait((priority, next(self._counter), task_name, job_id, attempt))
+
+    async def cancel(self, job_id: str) -> None:
+        """Interrupt a running job; queued ones are skipped when they come up"""
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+
+    async def _worker(self) -> None:
+        while True:
+            priority, _, task_name, job_id, attempt = await self._queue.get()
+            # A separate task, so cancelling the job doesn't cancel the worker
+            task = asyncio.ensure_future(run_job(task_name, job_id))
+            self._running[job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if self._stopping or job_id not in self._cancelled:
+                    raise
+            except Exception as e:
+                try:
+                    await self._handle_failure(priority, task_name, job_id, attempt, e)
+                except Exception as failure_error:
+                    # The worker must outlive e.g. a database outage while recording the failure
+                    print(f"Error handling failure of job {job_id}: {failure_error}")
+            finally:
+                self._running.pop(job_id, None)
+                self._cancelled.discard(job_id)
+                self._queue.task_done()
+
+    async def _handle_failure(
+        self,
+        priority: int,
+        task_name: str,
+        job_id: str,
+        attempt: int,
+        error: Exception
+    ) -> None:
+        if attempt >= JOB_MAX_RETRIES:
+            print(f"Job {job_id} failed after {attempt + 1} attempts: {error}")
+            await mark_job_failed(job_id, error)
+            return
+
+        await mark_job_retrying(job_id, error, attempt)
+        handle = asyncio.get_running_loop().call_later(
+            get_retry_delay(attempt), self._put, priority, task_name, job_id, attempt + 1
+        )
+        self._retry_handles = [h for h in self._retry_handles if not h.cancelled()]
+        self._retry_handles.append(handle)
+
+class CeleryJobQueue:
+    """Dispatches jobs to Celery workers over the Redis broker"""
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def cancel(self, job_id: str) -> None:
+        # Workers see the cancelled status at the handler's next checkpoint
+        pass
+
+    async def enqueue(self, task_name: str, job_id: str, priority: int = DEFAULT_PRIORITY) -> None:
+        from celery_app import run_job_task
+
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: run_job_task.apply_async(
+                args=[task_name, job_id], queue=get_lane_queue_name(priority)
+            )
+        )
+
+def create_job_queue():
+    """Build the job queue selected by JOB_QUEUE_BACKEND"""
+    if JOB_QUEUE_BACKEND == "celery":
+        return CeleryJobQueue()
+    return LocalJobQueue()
+
+job_queue = create_job_queue()
+
+async def enqueue_job(task_name: str, job_id: str, priority: int = DEFAULT_PRIORITY) -> None:
+    """Queue a job for background execution"""
+    await job_queue.enqueue(task_name, job_id, priority)
+
+async def start_job_queue() -> None:
+    """Start the job queue workers"""
+    await job_queue.start()
+
+async def stop_job_queue() -> None:
+    """Stop the job queue workers"""
+    await job_queue.stop()
+    try:
+        await progress_reporter.flush()
+    except Exception:
+        pass  # already reported; progress is best effort
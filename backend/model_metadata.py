@@ -0,0 +1,399 @@
+import base64
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+# glTF constants
+GLB_MAGIC = b"glTF"
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+MODE_TRIANGLES = 4
+MODE_TRIANGLE_STRIP = 5
+MODE_TRIANGLE_FAN = 6
+COMPONENT_DTYPES = {
+    5120: np.int8, 5121: np.uint8, 5122: np.int16,
+    5123: np.uint16, 5125: np.uint32, 5126: np.float32
+}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+# OBJ scanning works on newline-aligned blocks to bound temporary memory
+OBJ_BLOCK_SIZE = 8 * 1024 * 1024
+
+def extract_model_metadata(file_path: str) -> Optional[dict]:
+    """Read mesh statistics from a model file without decoding the whole scene.
+
+    Returns triangle and vertex counts, bounds, skeleton joint count and
+    material count, or None for formats that aren't supported (FBX, DAE).
+    This is CPU bound; call it from an executor, not the event loop.
+    """
+    extension = Path(file_path).suffix.lower()
+    if os.path.getsize(file_path) == 0:
+        return None
+
+    if extension == ".glb":
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            gltf, binary = read_glb(mm)
+            try:
+                return summarize_gltf(gltf, lambda index: binary if index == 0 else None)
+            finally:
+                # Views must be released before the mapping can close
+                if binary is not None:
+                    binary.release()
+
+    if extension == ".gltf":
+        with open(file_path, "rb") as f:
+            gltf = json.load(f)
+        return summarize_gltf(gltf, lambda index: load_gltf_buffer(gltf, index))
+
+    if extension == ".obj":
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return summarize_obj(mm)
+
+    return None
+
+# glTF / GLB
+
+def read_glb(mm: mmap.mmap) -> Tuple[dict, Optional[memoryview]]:
+    """Split a GLB container into its JSON document and binary chunk"""
+    magic, version, length = struct.unpack_from("<4sII", mm, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError("Not a glTF 2.0 binary file")
+
+    gltf = None
+    binary = None
+    offset = 12
+    while offset + 8 <= min(length, len(mm)):
+        chunk_length, chunk_type = struct.unpack_from("<II", mm, offset)
+        start = offset + 8
+        if chunk_type == GLB_CHUNK_JSON:
+            gltf = json.loads(mm[start:start + chunk_length])
+        elif chunk_type == GLB_CHUNK_BIN and binary is None:
+            binary = memoryview(mm)[start:start + chunk_length]
+        offset = start + chunk_length
+
+    if gltf is None:
+        raise ValueError("GLB file has no JSON chunk")
+
+    return gltf, binary
+
+def load_gltf_buffer(gltf: dict, index: int) -> Optional[bytes]:
+    """Load a .gltf buffer embedded as a data URI.
+
+    External buffer files are never read: uploads are single files, and a
+    uri is untrusted input that could point anywhere on the server (or at
+    another user's blob in the same shard directory).
+    """
+    buffers = gltf.get("buffers", [])
+    if index >= len(buffers):
+        return None
+
+    uri = buffers[index].get("uri")
+    if not uri:
+        return None
+
+    if uri.startswith("data:") and "," in uri:
+        return base64.b64decode(uri.split(",", 1)[1])
+
+    return None
+
+def read_accessor(gltf: dict, accessor: dict, get_buffer, cache: Dict[int, object]) -> Optional[np.ndarray]:
+    """Zero-copy NumPy view of an accessor's elements"""
+    view_index = accessor.get("bufferView")
+    dtype = COMPONENT_DTYPES.get(accessor.get("componentType"))
+    width = TYPE_SIZES.get(accessor.get("type"))
+    if view_index is None or dtype is None or width is None:
+        return None
+
+    view = gltf["bufferViews"][view_index]
+    buffer_index = view["buffer"]
+    if buffer_index not in cache:
+        cache[buffer_index] = get_buffer(buffer_index)
+    buffer = cache[buffer_index]
+    if buffer is None:
+        return None
+
+    item_size = np.dtype(dtype).itemsize
+    stride = view.get("byteStride") or item_size * width
+    offset = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    count = accessor["count"]
+    if count == 0 or offset + stride * (count - 1) + item_size * width > len(buffer):
+        return None
+
+    return np.ndarray(
+        shape=(count, width),
+        dtype=np.dtype(dtype).newbyteorder("<"),
+        buffer=buffer,
+        offset=offset,
+        strides=(stride, item_size)
+    )
+
+def node_matrix(node: dict) -> np.ndarray:
+    """Local transform of a glTF node"""
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+
+    x, y, z, w = node.get("rotation", [0.0, 0.0, 0.0, 1.0])
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get("scale", [1.0, 1.0, 1.0]))
+    matrix[:3, 3] = node.get("translation", [0.0, 0.0, 0.0])
+    return matrix
+
+def mesh_instances(gltf: dict) -> List[Tuple[int, np.ndarray]]:
+    """(mesh index, world matrix) for every mesh placed in the default scene"""
+    nodes = gltf.get("nodes", [])
+    scenes = gltf.get("scenes", [])
+    if scenes:
+        roots = scenes[gltf.get("scene", 0)].get("nodes", [])
+    else:
+        children = {child for node in nodes for child in node.get("children", [])}
+        roots = [i for i in range(len(nodes)) if i not in children]
+
+    instances = []
+    stack = [(root, np.eye(4)) for root in roots]
+    visited = set()
+    while stack:
+        index, parent_matrix = stack.pop()
+        if index in visited or index >= len(nodes):
+            continue
+        visited.add(index)
+        node = nodes[index]
+        world = parent_matrix @ node_matrix(node)
+        if "mesh" in node:
+            instances.append((node["mesh"], world))
+        stack.extend((child, world) for child in node.get("children", []))
+
+    if not instances:
+        # Files with meshes but no scene graph
+        instances = [(i, np.eye(4)) for i in range(len(gltf.get("meshes", [])))]
+
+    return instances
+
+def primitive_triangles(primitive: dict, accessors: List[dict]) -> int:
+    """Number of triangles a primitive draws"""
+    mode = primitive.get("mode", MODE_TRIANGLES)
+    if "indices" in primitive:
+        count = accessors[primitive["indices"]]["count"]
+    elif "POSITION" in primitive.get("attributes", {}):
+        count = accessors[primitive["attributes"]["POSITION"]]["count"]
+    else:
+        return 0
+
+    if mode == MODE_TRIANGLES:
+        return count // 3
+    if mode in (MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN):
+        return max(count - 2, 0)
+    return 0
+
+def position_bounds(gltf: dict, accessor: dict, get_buffer, cache) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Local-space bounds of a POSITION accessor, from min/max or the data"""
+    if len(accessor.get("min", [])) == 3 and len(accessor.get("max", [])) == 3:
+        return np.array(accessor["min"], dtype=np.float64), np.array(accessor["max"], dtype=np.float64)
+
+    positions = read_accessor(gltf, accessor, get_buffer, cache)
+    if positions is None or positions.shape[1] != 3 or positions.dtype.kind != "f":
+        return None
+
+    return positions.min(axis=0).astype(np.float64), positions.max(axis=0).astype(np.float64)
+
+def transform_bounds(bounds_min: np.ndarray, bounds_max: np.ndarray, matrix: np.ndarray):
+    """Axis-aligned bounds of a box after a transform"""
+    corners = np.array(np.meshgrid(*zip(bounds_min, bounds_max))).T.reshape(-1, 3)
+    transformed = corners @ matrix[:3, :3].T + matrix[:3, 3]
+    return transformed.min(axis=0), transformed.max(axis=0)
+
+def summarize_gltf(gltf: dict, get_buffer) -> dict:
+    """Mesh statistics of a glTF document"""
+    accessors = gltf.get("accessors", [])
+    meshes = gltf.get("meshes", [])
+    cache: Dict[int, object] = {}
+    mesh_bounds: Dict[int, Optional[Tuple[np.ndarray, np.ndarray]]] = {}
+
+    triangles = 0
+    vertices = 0
+    scene_min = None
+    scene_max = None
+
+    for mesh_index, world in mesh_instances(gltf):
+        if mesh_index >= len(meshes):
+            continue
+
+        for primitive in meshes[mesh_index].get("primitives", []):
+            triangles += primitive_triangles(primitive, accessors)
+            position_index = primitive.get("attributes", {}).get("POSITION")
+            if position_index is not None:
+                vertices += accessors[position_index]["count"]
+
+        if mesh_index not in mesh_bounds:
+            mesh_bounds[mesh_index] = None
+            for primitive in meshes[mesh_index].get("primitives", []):
+                position_index = primitive.get("attributes", {}).get("POSITION")
+                if position_index is None:
+                    continue
+                bounds = position_bounds(gltf, accessors[position_index], get_buffer, cache)
+                if bounds is None:
+                    continue
+                current = mesh_bounds[mesh_index]
+                mesh_bounds[mesh_index] = bounds if current is None else (
+                    np.minimum(current[0], bounds[0]), np.maximum(current[1], bounds[1])
+                )
+
+        if mesh_bounds[mesh_index] is not None:
+            instance_min, instance_max = transform_bounds(*mesh_bounds[mesh_index], world)
+            scene_min = instance_min if scene_min is None else np.minimum(scene_min, instance_min)
+            scene_max = instance_max if scene_max is None else np.maximum(scene_max, instance_max)
+
+    joints = {joint for skin in gltf.get("skins", []) for joint in skin.get("joints", [])}
+
+    return {
+        "triangles": int(triangles),
+        "vertices": int(vertices),
+        "bounds": format_bounds(scene_min, scene_max),
+        "joints": len(joints),
+        "materials": len(gltf.get("materials", []))
+    }
+
+# OBJ
+
+def iter_obj_blocks(mm: mmap.mmap) -> Iterator[np.ndarray]:
+    """Zero-copy views of an OBJ file in blocks that end on a line break"""
+    size = len(mm)
+    start = 0
+    while start < size:
+        end = min(start + OBJ_BLOCK_SIZE, size)
+        if end < size:
+            newline = mm.rfind(b"\n", start, end)
+            end = newline + 1 if newline >= start else size
+
+        yield np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+        start = end
+
+def summarize_obj(mm: mmap.mmap) -> dict:
+    """Mesh statistics of a Wavefront OBJ file, scanned block by block"""
+    triangles = 0
+    vertices = 0
+    materials = set()
+    scene_min = None
+    scene_max = None
+
+    for block in iter_obj_blocks(mm):
+        stats = scan_obj_block(block)
+        triangles += stats["triangles"]
+        vertices += stats["vertices"]
+        materials.update(stats["materials"])
+        if stats["min"] is not None:
+            scene_min = stats["min"] if scene_min is None else np.minimum(scene_min, stats["min"])
+            scene_max = stats["max"] if scene_max is None else np.maximum(scene_max, stats["max"])
+
+    return {
+        "triangles": int(triangles),
+        "vertices": int(vertices),
+        "bounds": format_bounds(scene_min, scene_max),
+        "joints": 0,
+        "materials": len(materials)
+    }
+
+def split_obj_lines(block: np.ndarray):
+    """Line table of a newline-aligned OBJ block.
+
+    Returns line start offsets, line lengths, the first two bytes of every
+    line and the number of whitespace-separated tokens on each line.
+    """
+    length = len(block)
+    # Pad so every line start has a following byte to inspect
+    padded = np.empty(length + 1, dtype=np.uint8)
+    padded[:length] = block
+    padded[length] = ord("\n")
+
+    starts = np.concatenate(([0], np.flatnonzero(block == ord("\n")) + 1))
+    starts = starts[starts < length]
+    line_lengths = np.diff(np.append(starts, length))
+
+    # Tokens per line: positions where a non-space byte follows whitespace
+    is_token = block > ord(" ")
+    token_start = is_token.copy()
+    token_start[1:] &= ~is_token[:-1]
+    tokens = np.add.reduceat(token_start, starts, dtype=np.int32)
+
+    return starts, line_lengths, padded[starts], padded[starts + 1], tokens
+
+def is_obj_keyword_line(first: np.ndarray, second: np.ndarray, keyword: str) -> np.ndarray:
+    """Mask of lines starting with a one-letter keyword (``v``, ``f``)"""
+    separated = (second == ord(" ")) | (second == ord("\t"))
+    return (first == ord(keyword)) & separated
+
+def scan_obj_block(block: np.ndarray) -> dict:
+    """Count vertices and triangles in a newline-aligned block of OBJ text"""
+    starts, line_lengths, first, second, tokens = split_obj_lines(block)
+    vertex_lines = is_obj_keyword_line(first, second, "v")
+    face_lines = is_obj_keyword_line(first, second, "f")
+
+    # A face with n corners is n - 2 triangles (the keyword is one token)
+    face_corners = tokens[face_lines] - 1
+    triangles = int(np.maximum(face_corners - 2, 0).sum())
+
+    coordinates = obj_vertex_coordinates(
+        block, starts, line_lengths, vertex_lines, tokens[vertex_lines]
+    )
+    if coordinates is None or len(coordinates) == 0:
+        bounds_min, bounds_max = None, None
+    else:
+        bounds_min, bounds_max = coordinates.min(axis=0), coordinates.max(axis=0)
+
+    materials = set()
+    for start in starts[(first == ord("u")) & (second == ord("s"))]:
+        line = bytes(block[start:start + 256]).split(b"\n", 1)[0]
+        if line.startswith(b"usemtl"):
+            materials.add(line[6:].strip())
+
+    return {
+        "triangles": triangles,
+        "vertices": int(vertex_lines.sum()),
+        "materials": materials,
+        "min": bounds_min,
+        "max": bounds_max
+    }
+
+def obj_vertex_coordinates(
+    block: np.ndarray,
+    starts: np.ndarray,
+    line_lengths: np.ndarray,
+    vertex_lines: np.ndarray,
+    tokens: np.ndarray
+) -> Optional[np.ndarray]:
+    """(n, 3) positions of the ``v x y z [w]`` lines in a block, None if malformed"""
+    if len(tokens) == 0:
+        return np.empty((0, 3), dtype=np.float64)
+
+    # Keep only the bytes of vertex lines and blank out the "v" keyword
+    text = block.copy()
+    text[starts[vertex_lines]] = ord(" ")
+    selected = text[np.repeat(vertex_lines, line_lengths)]
+
+    values = np.fromstring(selected.tobytes(), dtype=np.float64, sep=" ")
+    components = tokens - 1
+    if len(values) != components.sum() or components.min() < 3:
+        return None
+
+    if (components == components[0]).all():
+        return values.reshape(-1, components[0])[:, :3]
+
+    # Mixed "v x y z" and "v x y z w"/vertex colour lines
+    offsets = np.concatenate(([0], np.cumsum(components)[:-1]))
+    return values[offsets[:, None] + np.arange(3)]
+
+def format_bounds(bounds_min, bounds_max) -> Optional[dict]:
+    if bounds_min is None:
+        return None
+    return {
+        "min": [float(value) for value in bounds_min],
+        "max": [float(value) for value in bounds_max]
+    }
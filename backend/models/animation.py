@@ -11,7 +11,7 @@ class AnimationBase(BaseModel):
     is_public: bool = True
 
 class AnimationCreate(AnimationBase):
-    pass
+    duration: float = 0.0  # in seconds
 
 class AnimationUpdate(BaseModel):
     name: Optional[str] = None
@@ -30,8 +30,30 @@ class AnimationResponse(AnimationBase):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class AnimationSummary(BaseModel):
+    """Lightweight list row (?view=summary)"""
+    id: str
+    name: str
+    thumbnail: Optional[str] = None
+    category: str = "Basic"
+    duration: float = 0.0
+
+class AnimationSummaryList(BaseModel):
+    animations: List[AnimationSummary]
+    total: Optional[int] = None
+    total_estimated: bool = False
+    page: int
+    page_size: int
+    next_cursor: Optional[str] = None
+
 class AnimationList(BaseModel):
     animations: List[AnimationResponse]
-    total: int
+    total: Optional[int] = None  # omitted when include_total=false
+    total_estimated: bool = False  # true when total is a fast approximate count
     page: int
-    page_size: int
\ No newline at end of file
+    page_size: int
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page
+
+class AnimationBatch(BaseModel):
+    animations: List[AnimationResponse]  # in request order
+    missing: List[str] = []  # IDs that don't exist or aren't visible
@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+BATCH_GET_MAX_IDS = 100
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=BATCH_GET_MAX_IDS)
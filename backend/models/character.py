@@ -20,6 +20,17 @@ class CharacterUpdate(BaseModel):
     tags: Optional[List[str]] = None
     is_public: Optional[bool] = None
 
+class ModelBounds(BaseModel):
+    min: List[float]
+    max: List[float]
+
+class ModelMetadata(BaseModel):
+    triangles: int = 0
+    vertices: int = 0
+    bounds: Optional[ModelBounds] = None
+    joints: int = 0
+    materials: int = 0
+
 class CharacterResponse(CharacterBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     polygons: int = 0
@@ -27,12 +38,35 @@ class CharacterResponse(CharacterBase):
     model_file: Optional[str] = None
     rigged_file: Optional[str] = None
     is_rigged: bool = False
+    model_metadata: Optional[ModelMetadata] = None
     uploaded_by: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class CharacterSummary(BaseModel):
+    """Lightweight list row (?view=summary)"""
+    id: str
+    name: str
+    thumbnail: Optional[str] = None
+    type: str = "Humanoid"
+    polygons: int = 0
+
+class CharacterSummaryList(BaseModel):
+    characters: List[CharacterSummary]
+    total: Optional[int] = None
+    total_estimated: bool = False
+    page: int
+    page_size: int
+    next_cursor: Optional[str] = None
+
 class CharacterList(BaseModel):
     characters: List[CharacterResponse]
-    total: int
+    total: Optional[int] = None  # omitted when include_total=false
+    total_estimated: bool = False  # true when total is a fast approximate count
     page: int
-    page_size: int
\ No newline at end of file
+    page_size: int
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page
+
+class CharacterBatch(BaseModel):
+    characters: List[CharacterResponse]  # in request order
+    missing: List[str] = []  # IDs that don't exist or aren't visible
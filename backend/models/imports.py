@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from models.character import CharacterCreate
+from models.animation import AnimationCreate
+
+class CharacterImportItem(CharacterCreate):
+    file: str  # path of the model inside the archive
+    thumbnail: Optional[str] = None  # path of an image inside the archive
+
+class AnimationImportItem(AnimationCreate):
+    file: str  # path of the animation inside the archive
+    thumbnail: Optional[str] = None
+
+class ImportManifest(BaseModel):
+    characters: List[CharacterImportItem] = []
+    animations: List[AnimationImportItem] = []
+
+class ImportItemStatus(BaseModel):
+    kind: str  # "character" or "animation"
+    file: str
+    name: str
+    status: str  # "pending", "imported", "failed"
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class ImportJobResponse(BaseModel):
+    id: str
+    status: str  # "pending", "processing", "completed", "failed"
+    progress: int = 0
+    total_items: int = 0
+    imported: int = 0
+    failed: int = 0
+    items: List[ImportItemStatus] = []
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
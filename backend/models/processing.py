@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import uuid
 
 class ProcessingJobBase(BaseModel):
@@ -19,14 +19,38 @@ class ProcessingJobUpdate(BaseModel):
 
 class ProcessingJobResponse(ProcessingJobBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    kind: str = "retarget"  # "retarget", "batch_retarget" or "import"
+    character_id: Optional[str] = None  # batch and import jobs have no single pair
+    animation_id: Optional[str] = None
     user_id: str
-    status: str = "pending"  # "pending", "processing", "completed", "failed"
+    status: str = "pending"  # "pending", "processing", "completed", "failed", "cancelled"
     progress: int = 0  # 0-100
     result_file: Optional[str] = None
+    cached: bool = False  # result reused from an identical earlier job
     error: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ProcessingJobSummary(BaseModel):
+    """Row of the job listing; covers every job kind"""
+    id: str
+    kind: str = "retarget"  # "retarget", "batch_retarget" or "import"
+    status: str
+    progress: int = 0
+    character_id: Optional[str] = None
+    animation_id: Optional[str] = None
+    result_file: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    expires_at: Optional[datetime] = None  # set once the job finishes
+
+class ProcessingJobList(BaseModel):
+    jobs: List[ProcessingJobSummary]
+    page_size: int
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page
+
 class ApplyAnimationRequest(BaseModel):
     character_id: str
     animation_id: str
@@ -34,4 +58,33 @@ class ApplyAnimationRequest(BaseModel):
         "speed": 1.0,
         "arm_spacing": 50,
         "export_format": "fbx"
-    }
\ No newline at end of file
+    }
+
+class RetargetPair(BaseModel):
+    character_id: str
+    animation_id: str
+
+class BatchApplyAnimationRequest(BaseModel):
+    items: List[RetargetPair] = Field(..., min_length=1)
+    settings: Dict[str, Any] = ApplyAnimationRequest.model_fields["settings"].default
+
+class BatchItemStatus(RetargetPair):
+    status: str = "pending"  # "pending", "completed", "failed"
+    cached: bool = False  # result reused from an earlier job
+    result_file: Optional[str] = None
+    matched_bones: Optional[int] = None  # None when the formats' skeletons can't be read
+    error: Optional[str] = None
+
+class BatchJobResponse(BaseModel):
+    id: str
+    status: str  # "pending", "processing", "completed", "failed", "cancelled"
+    progress: int = 0
+    total_items: int = 0
+    completed: int = 0
+    failed: int = 0
+    items: List[BatchItemStatus] = []
+    result_file: Optional[str] = None  # zip of the results with a manifest.json
+    settings: Dict[str, Any] = {}
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
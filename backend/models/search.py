@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SearchSuggestion(BaseModel):
+    id: str
+    name: str
+    label: Optional[str] = None  # character type or animation category
+    thumbnail: Optional[str] = None
+    score: float
+
+class SearchSuggestionList(BaseModel):
+    query: str
+    suggestions: List[SearchSuggestion]
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int = Field(..., gt=0)
+    chunk_size: int = Field(8 * 1024 * 1024, gt=0)
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")  # verified against the uploaded bytes at commit
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: List[int] = []
+    missing_chunks: List[int] = []
+    status: str = "open"  # "open", "committing"
+    expires_at: datetime
+    created_at: datetime
+    updated_at: datetime
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from indexes import LIST_SORT
+
+def encode_cursor(document: dict) -> str:
+    """Opaque cursor pointing just past a document in LIST_SORT order"""
+    payload = {"t": document["created_at"].isoformat(), "id": str(document["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Position encoded in a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def apply_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict a list query to documents after the cursor position"""
+    if not cursor:
+        return query
+
+    created_at, document_id = decode_cursor(cursor)
+    return {
+        **query,
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": document_id}}
+        ]
+    }
+
+async def fetch_page(
+    collection,
+    query: dict,
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+    projection: Optional[dict] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of a listing and the cursor for the next page.
+
+    With a cursor the query seeks straight to its position on the
+    (created_at, _id) index; without one it falls back to page numbers.
+    """
+    find_cursor = collection.find(apply_cursor(query, cursor), projection).sort(LIST_SORT)
+    if not cursor:
+        find_cursor = find_cursor.skip((page - 1) * page_size)
+
+    # One extra document tells us whether there is a next page
+    documents = await find_cursor.limit(page_size + 1).to_list(page_size + 1)
+    if len(documents) <= page_size:
+        return documents, None
+
+    documents = documents[:page_size]
+    return documents, encode_cursor(documents[-1])
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+
+# Response field -> (document fields it is built from, function building it)
+FieldSpec = Tuple[Tuple[str, ...], Callable[[dict], Any]]
+
+def serialize_datetime(value: Optional[datetime]) -> Optional[str]:
+    """ISO 8601, as pydantic would render it"""
+    return value.isoformat() if value else None
+
+def select_fields(
+    fields: Optional[str],
+    view: str,
+    field_specs: Dict[str, FieldSpec],
+    summary_fields: List[str]
+) -> List[str]:
+    """Response fields for a list request: ?fields= if given, else the view's fields"""
+    if not fields:
+        return summary_fields if view == "summary" else list(field_specs)
+
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in field_specs]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    # Rows are always identifiable
+    return list(dict.fromkeys(["id"] + selected))
+
+def build_projection(selected: List[str], field_specs: Dict[str, FieldSpec]) -> dict:
+    """Mongo projection loading only what the selected fields need"""
+    # created_at positions the next-page cursor; _id is always returned
+    projection = {"created_at": 1}
+    for field in selected:
+        for source in field_specs[field][0]:
+            projection[source] = 1
+    return projection
+
+def serialize_rows(documents: List[dict], selected: List[str], field_specs: Dict[str, FieldSpec]) -> List[dict]:
+    """JSON-ready rows built straight from documents, without per-row model validation"""
+    builders = [(field, field_specs[field][1]) for field in selected]
+    return [{field: build(document) for field, build in builders} for document in documents]
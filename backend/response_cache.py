@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+from file_responses import etag_matches
+
+# Response cache configuration
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+# Catalog writes made by workers in other processes only reach API caches through Redis
+RESPONSE_CACHE_BACKEND = os.getenv(
+    "RESPONSE_CACHE_BACKEND", "redis" if os.getenv("JOB_QUEUE_BACKEND") == "celery" else "memory"
+)
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))  # seconds
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_PREFIX = "response-cache:"
+RESPONSE_CACHE_GENERATION_PREFIX = "response-cache-generation:"
+RESPONSE_CACHE_GENERATION_TTL = 24 * 60 * 60  # seconds an untouched namespace's counter is kept
+RESPONSE_CACHE_CONTROL = "private, no-cache"  # clients revalidate with If-None-Match
+
+# Encoded JSON body and its ETag
+CachedResponse = Tuple[bytes, str]
+
+def normalize_param(value):
+    """Canonical form of a query parameter: lists deduplicated and sorted, strings trimmed"""
+    if isinstance(value, (list, tuple, set)):
+        return sorted({normalize_param(item) for item in value}, key=str)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+def build_cache_key(**params) -> str:
+    """Cache key for a request; equivalent parameter sets map to the same key"""
+    normalized = {name: normalize_param(value) for name, value in params.items() if value not in (None, "", [])}
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+def list_namespace(collection_name: str) -> str:
+    return f"{collection_name}:list"
+
+def item_namespace(collection_name: str, item_id: str) -> str:
+    return f"{collection_name}:item:{item_id}"
+
+class ResponseCache:
+    """Cache of encoded catalog responses, grouped into invalidatable namespaces.
+
+    With the memory backend each API process keeps its own LRU and writes
+    made elsewhere show up once RESPONSE_CACHE_TTL expires. With the redis
+    backend every namespace is a Redis hash shared by all processes, and its
+    generation counter is a Redis key, so an invalidation anywhere is seen
+    everywhere.
+    """
+
+    def __init__(
+        self,
+        backend: str = RESPONSE_CACHE_BACKEND,
+        ttl: int = RESPONSE_CACHE_TTL,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[CachedResponse, float]]" = OrderedDict()
+        self._namespace_keys: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self._redis = None
+
+    def _get_redis(self):
+        if self._redis is None:
+            import redis.asyncio as redis
+            self._redis = redis.from_url(REDIS_URL)
+        return self._redis
+
+    async def generation(self, namespace: str) -> int:
+        """Bumped by every invalidation of the namespace"""
+        if self.backend == "redis":
+            try:
+                value = await self._get_redis().get(RESPONSE_CACHE_GENERATION_PREFIX + namespace)
+            except Exception as e:
+                print(f"Error reading response cache generation: {e}")
+                return -1  # never matches, so nothing built now is cached
+            return int(value or 0)
+
+        return self._local_generation(namespace)
+
+    def _local_generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def get(self, namespace: str, key: str) -> Optional[CachedResponse]:
+        if self.backend == "redis":
+            try:
+                data = await self._get_redis().hget(RESPONSE_CACHE_PREFIX + namespace, key)
+            except Exception as e:
+                print(f"Error reading response cache: {e}")
+                return None
+            if data is None:
+                return None
+            etag, _, body = data.partition(b"\n")
+            return body, etag.decode()
+
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        response, expires_at = entry
+        if expires_at < time.monotonic():
+            self._discard(namespace, key)
+            return None
+        self._entries.move_to_end((namespace, key))
+        return response
+
+    async def set(self, namespace: str, key: str, response: CachedResponse, generation: int) -> None:
+        """Store a response built while the namespace was at ``generation``"""
+        if self.backend == "redis":
+            await self._set_redis(namespace, key, response, generation)
+            return
+
+        # A write while the response was being built may have made it stale
+        if self._local_generation(namespace) != generation:
+            return
+
+        self._entries[(namespace, key)] = (response, time.monotonic() + self.ttl)
+        self._entries.move_to_end((namespace, key))
+        self._namespace_keys.setdefault(namespace, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            (old_namespace, old_key), _ = self._entries.popitem(last=False)
+            self._forget_key(old_namespace, old_key)
+
+    async def _set_redis(self, namespace: str, key: str, response: CachedResponse, generation: int) -> None:
+        """Write an entry unless the namespace's generation moved on, checked atomically"""
+        from redis.exceptions import WatchError
+
+        body, etag = response
+        try:
+            async with self._get_redis().pipeline() as pipeline:
+                # The write is discarded if an invalidation bumps the counter before it executes
+                await pipeline.watch(RESPONSE_CACHE_GENERATION_PREFIX + namespace)
+                if int(await pipeline.get(RESPONSE_CACHE_GENERATION_PREFIX + namespace) or 0) != generation:
+                    return
+                pipeline.multi()
+                pipeline.hset(RESPONSE_CACHE_PREFIX + namespace, key, etag.encode() + b"\n" + body)
+                pipeline.expire(RESPONSE_CACHE_PREFIX + namespace, self.ttl)
+                await pipeline.execute()
+        except WatchError:
+            pass
+        except Exception as e:
+            print(f"Error writing response cache: {e}")
+
+    def _discard(self, namespace: str, key: str) -> None:
+        self._entries.pop((namespace, key), None)
+        self._forget_key(namespace, key)
+
+    def _forget_key(self, namespace: str, key: str) -> None:
+        keys = self._namespace_keys.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespace_keys[namespace]
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """Drop every cached response in the namespaces"""
+        for namespace in namespaces:
+            self._generations[namespace] = self._local_generation(namespace) + 1
+            for key in self._namespace_keys.pop(namespace, set()):
+                self._entries.pop((namespace, key), None)
+
+        if self.backend == "redis" and namespaces:
+            try:
+                # Bump the counters first so responses still being built elsewhere aren't stored
+                pipeline = self._get_redis().pipeline()
+                for namespace in namespaces:
+                    pipeline.incr(RESPONSE_CACHE_GENERATION_PREFIX + namespace)
+                    pipeline.expire(RESPONSE_CACHE_GENERATION_PREFIX + namespace, RESPONSE_CACHE_GENERATION_TTL)
+                pipeline.delete(*(RESPONSE_CACHE_PREFIX + namespace for namespace in namespaces))
+                await pipeline.execute()
+            except Exception as e:
+                print(f"Error invalidating response cache: {e}")
+
+response_cache = ResponseCache()
+
+def encode_response(content: Any) -> CachedResponse:
+    """JSON body (encoded as JSONResponse would) and a strong ETag for it"""
+    body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def build_cached_response(request: Request, response: CachedResponse) -> Response:
+    """200 with the cached body, or 304 when the client already has it"""
+    body, etag = response
+    headers = {"ETag": etag, "Cache-Control": RESPONSE_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def cached_json_response(
+    request: Request,
+    namespace: str,
+    key: str,
+    build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Serve a JSON response from the cache, building and caching it on a miss.
+
+    ``build`` returns JSON-ready content; errors it raises are not cached.
+    """
+    response = await response_cache.get(namespace, key)
+    if response is None:
+        generation = await response_cache.generation(namespace)
+        response = encode_response(await build())
+        await response_cache.set(namespace, key, response, generation)
+    return build_cached_response(request, response)
+
+async def invalidate_catalog_responses(collection_name: str, item_id: Optional[str] = None) -> None:
+    """Call after inserting, updating or deleting catalog documents"""
+    namespaces = [list_namespace(collection_name)]
+    if item_id:
+        namespaces.append(item_namespace(collection_name, str(item_id)))
+    await response_cache.invalidate(*namespaces)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+from pymongo import ReturnDocument
+from database import retarget_results_collection, processing_jobs_collection
+from blob_store import is_blob_path
+from file_handler import UPLOAD_DIR, UPLOAD_CHUNK_SIZE, ALLOWED_MODEL_EXTENSIONS, delete_file
+from models.processing import ApplyAnimationRequest
+from storage import run_storage, stat_file
+
+# Retarget result cache configuration
+PROCESSED_DIR = UPLOAD_DIR / "processed"
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(10 * 1024 * 1024 * 1024)))  # 10GB
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+
+DEFAULT_SETTINGS = ApplyAnimationRequest.model_fields["settings"].default
+EXPORT_FORMATS = sorted(extension.lstrip(".") for extension in ALLOWED_MODEL_EXTENSIONS)
+
+def normalize_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Canonical form of retarget settings: defaults filled in, numbers unified"""
+    normalized = {**DEFAULT_SETTINGS, **(settings or {})}
+    for key, value in normalized.items():
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            # 50 and 50.0 must produce the same key
+            normalized[key] = round(float(value), 6)
+        elif isinstance(value, str):
+            normalized[key] = value.strip().lower()
+    return normalized
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def get_content_hash(document: dict, file_field: str) -> str:
+    """Identify the content of a document's file for use in a cache key"""
+    file_path = document.get(file_field)
+
+    # Content-addressed files are named by their hash
+    if file_path and is_blob_path(file_path):
+        return Path(file_path).stem
+
+    if file_path and await run_storage(os.path.isfile, file_path):
+        return await run_storage(hash_file, file_path)
+
+    # Documents without a stored file (e.g. stock content) are keyed by ID
+    return f"id:{document['_id']}"
+
+def build_result_key(character_hash: str, animation_hash: str, settings: Dict[str, Any]) -> str:
+    """Cache key from the content hashes of a character and an animation"""
+    key_data = {
+        "character": character_hash,
+        "animation": animation_hash,
+        "settings": normalize_settings(settings)
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+async def compute_result_key(character: dict, animation: dict, settings: Dict[str, Any]) -> str:
+    """Cache key for retargeting this character content with this animation content"""
+    return build_result_key(
+        await get_content_hash(character, "model_file"),
+        await get_content_hash(animation, "animation_file"),
+        settings
+    )
+
+def get_export_format(settings: Dict[str, Any]) -> str:
+    """The requested export format; ValueError unless it is one of EXPORT_FORMATS"""
+    export_format = normalize_settings(settings).get("export_format")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid export format. Allowed formats: {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+def get_result_path(result_key: str, settings: Dict[str, Any]) -> str:
+    """Where the retarget result for a cache key is written"""
+    return str(PROCESSED_DIR / f"{result_key}.{get_export_format(settings)}")
+
+async def lookup_result(result_key: str) -> Optional[dict]:
+    """Find a cached result and mark it as recently used"""
+    entry = await retarget_results_collection.find_one_and_update(
+        {"_id": result_key},
+        {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not entry:
+        return None
+
+    # Drop entries whose file was removed behind the cache's back
+    if entry.get("size", 0) > 0 and await stat_file(entry["result_file"]) is None:
+        await retarget_results_collection.delete_one({"_id": result_key})
+        return None
+
+    return entry
+
+async def record_result(result_key: str, result_file: str, job_id: str) -> None:
+    """Remember a completed retarget result, then enforce the cache limits"""
+    stat_result = await stat_file(result_file)
+    size = stat_result.st_size if stat_result else 0
+    now = datetime.utcnow()
+
+    await retarget_results_collection.update_one(
+        {"_id": result_key},
+        {
+            "$set": {
+                "result_file": result_file,
+                "job_id": job_id,
+                "size": size,
+                "last_used_at": now
+            },
+            "$setOnInsert": {"hits": 0, "created_at": now}
+        },
+        upsert=True
+    )
+
+    await evict_results()
+
+async def evict_results() -> int:
+    """Evict least recently used results until the cache is within its limits"""
+    totals = await retarget_results_collection.aggregate([
+        {"$group": {"_id": None, "size": {"$sum": "$size"}, "count": {"$sum": 1}}}
+    ]).to_list(1)
+
+    if not totals:
+        return 0
+
+    total_size = totals[0]["size"]
+    total_count = totals[0]["count"]
+    evicted = 0
+
+    if total_size <= RESULT_CACHE_MAX_BYTES and total_count <= RESULT_CACHE_MAX_ENTRIES:
+        return 0
+
+    cursor = retarget_results_collection.find({}, {"result_file": 1, "size": 1}).sort("last_used_at", 1)
+    async for entry in cursor:
+        if total_size <= RESULT_CACHE_MAX_BYTES and total_count <= RESULT_CACHE_MAX_ENTRIES:
+            break
+
+        result = await retarget_results_collection.delete_one({"_id": entry["_id"]})
+        if result.deleted_count:
+            # Completed jobs still serve the file until they expire; the job sweeper removes it then
+            if not await processing_jobs_collection.find_one({"result_file": entry["result_file"]}, {"_id": 1}):
+                await delete_file(entry["result_file"])
+            total_size -= entry.get("size", 0)
+            total_count -= 1
+            evicted += 1
+
+    return evicted
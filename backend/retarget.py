@@ -0,0 +1,97 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import List, Optional
+from blob_store import get_incoming_path
+from database import characters_collection, animations_collection
+from file_handler import write_chunks_to_disk
+from job_queue import job_task, update_job, report_progress, raise_if_cancelled
+from result_cache import get_result_path, normalize_settings, record_result
+from skeleton import read_skeleton, retarget_pair
+from storage import replace_file
+from thumbnail_renderer import run_in_render_pool
+
+async def load_skeleton(file_path: Optional[str]) -> Optional[List[str]]:
+    """Joint names of a source file, parsed in the render pool (None if unknown or unreadable)"""
+    if not file_path:
+        return None
+    try:
+        return await run_in_render_pool(read_skeleton, file_path)
+    except Exception as e:
+        print(f"Error reading skeleton of {file_path}: {e}")
+        return None
+
+async def retarget_skeletons(
+    character_bones: Optional[List[str]],
+    animation_bones: Optional[List[str]],
+    settings: dict
+) -> dict:
+    """Match a pair's bones in the render pool; raises ValueError if the skeletons are incompatible.
+
+    Single and batch retarget jobs both go through here, so a result cached
+    under a pair's result key has always passed the same checks.
+    """
+    return await run_in_render_pool(retarget_pair, character_bones, animation_bones, settings)
+
+async def iter_bytes(data: bytes):
+    yield data
+
+async def export_result(result_file: str, result: dict, settings: dict) -> None:
+    """Write a pair's retarget output (a JSON placeholder until a real exporter exists)"""
+    content = json.dumps({**result, "settings": normalize_settings(settings)}).encode()
+    # Written aside and moved into place: jobs for the same result key may finish together
+    temp_path = get_incoming_path(Path(result_file).suffix)
+    await write_chunks_to_disk(iter_bytes(content), temp_path)
+    await replace_file(temp_path, result_file)
+
+@job_task("retarget")
+async def run_retarget_job(job_id: str):
+    """Apply an animation to a character (simulated until a real retargeter exists)"""
+    # Update job status to processing
+    job = await update_job(job_id, {"status": "processing", "progress": 10})
+    if not job:
+        return
+
+    character = await characters_collection.find_one({"_id": job["character_id"]}, {"model_file": 1})
+    animation = await animations_collection.find_one({"_id": job["animation_id"]}, {"animation_file": 1})
+    if not character or not animation:
+        await update_job(job_id, {"status": "failed", "error": "Character or animation no longer exists"})
+        return
+
+    character_bones, animation_bones = await asyncio.gather(
+        load_skeleton(character.get("model_file")),
+        load_skeleton(animation.get("animation_file"))
+    )
+    try:
+        result = await retarget_skeletons(character_bones, animation_bones, job.get("settings", {}))
+    except ValueError as e:
+        await update_job(job_id, {"status": "failed", "error": str(e)})
+        return
+    
+    # Simulate processing time
+    await asyncio.sleep(2)
+    await raise_if_cancelled(job_id)
+    
+    # Update progress
+    await report_progress(job, {"progress": 50})
+    
+    await asyncio.sleep(2)
+    await raise_if_cancelled(job_id)
+    
+    # Results are named by their cache key so identical requests share them
+    result_key = job.get("result_key")
+    if result_key:
+        result_file = get_result_path(result_key, job.get("settings", {}))
+        await export_result(result_file, result, job.get("settings", {}))
+    else:
+        result_file = f"processed/character_animated_{job_id}.fbx"
+    
+    # Complete the job; None if it was cancelled meanwhile
+    completed = await update_job(job_id, {
+        "status": "completed",
+        "progress": 100,
+        "result_file": result_file
+    })
+    
+    if completed and result_key:
+        await record_result(result_key, result_file, job_id)
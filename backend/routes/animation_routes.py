@@ -1,76 +1,186 @@
-from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Query, Form
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Query, Form, Request
+from fastapi.responses import JSONResponse
+from typing import Optional, List, Union
 from database import animations_collection
-from models.animation import AnimationCreate, AnimationResponse, AnimationUpdate, AnimationList
+from models.animation import (
+    AnimationCreate, AnimationResponse, AnimationUpdate, AnimationList, AnimationSummary, AnimationSummaryList,
+    AnimationBatch
+)
+from models.batch import BatchGetRequest
+from models.search import SearchSuggestion, SearchSuggestionList
+from models.upload import UploadSessionCreate, UploadSessionResponse
 from auth import get_current_user
-from file_handler import save_animation_file, save_thumbnail_file, get_file_url
+from pagination import fetch_page
+from projections import select_fields, build_projection, serialize_rows, serialize_datetime
+from count_cache import get_list_total, invalidate_list_totals
+from search_index import animation_search_index
+from response_cache import (
+    build_cache_key, cached_json_response, invalidate_catalog_responses, list_namespace, item_namespace
+)
+from file_handler import (
+    save_animation_file, save_thumbnail_file, get_file_url, release_file,
+    ALLOWED_ANIMATION_EXTENSIONS
+)
+from upload_sessions import (
+    create_upload_session, get_upload_session, write_upload_chunk,
+    commit_upload_session, delete_upload_session, session_to_response
+)
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
 import uuid
 
 router = APIRouter(prefix="/animations", tags=["animations"])
 
-@router.get("", response_model=AnimationList)
+# List response fields: (document fields read, builder)
+ANIMATION_FIELDS = {
+    "id": (("_id",), lambda anim: str(anim["_id"])),
+    "name": (("name",), lambda anim: anim["name"]),
+    "description": (("description",), lambda anim: anim.get("description", "")),
+    "category": (("category",), lambda anim: anim.get("category", "Basic")),
+    "duration": (("duration",), lambda anim: anim.get("duration", 0.0)),
+    "tags": (("tags",), lambda anim: anim.get("tags", [])),
+    "thumbnail": (("thumbnail",), lambda anim: get_file_url(anim.get("thumbnail", ""))),
+    "animation_file": (("animation_file",), lambda anim: get_file_url(anim.get("animation_file", ""))),
+    "preview_video": (("preview_video",), lambda anim: get_file_url(anim.get("preview_video", ""))),
+    "is_public": (("is_public",), lambda anim: anim.get("is_public", True)),
+    "uploaded_by": (("uploaded_by",), lambda anim: str(anim["uploaded_by"])),
+    "created_at": (("created_at",), lambda anim: serialize_datetime(anim["created_at"])),
+    "updated_at": (("updated_at",), lambda anim: serialize_datetime(anim["updated_at"]))
+}
+ANIMATION_SUMMARY_FIELDS = list(AnimationSummary.model_fields)
+
+@router.get("", response_model=Union[AnimationList, AnimationSummaryList])
 async def get_animations(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     tags: Optional[List[str]] = Query(None),
+    include_total: bool = Query(True),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get animations with pagination and filtering"""
-    
-    # Build query
-    query = {"is_public": True}
-    
-    if search:
-        query["$text"] = {"$search": search}
-    
-    if category:
-        query["category"] = category
+    """Get animations with pagination and filtering.
+
+    ``view=summary`` returns lightweight rows; ``fields=a,b`` picks exact fields.
+    The listing only contains public animations, so responses are cached and
+    shared between users.
+    """
     
-    if tags:
-        query["tags"] = {"$in": tags}
+    async def build_listing() -> dict:
+        # Build query
+        query = {"is_public": True}
+        
+        if search:
+            query["$text"] = {"$search": search}
+        
+        if category:
+            query["category"] = category
+        
+        if tags:
+            query["tags"] = {"$in": tags}
+        
+        # Get total count (cached; estimated for the unfiltered listing)
+        total, total_estimated = await get_list_total(animations_collection, query, include_total)
+        
+        # Load only the fields the response needs
+        selected = select_fields(fields, view, ANIMATION_FIELDS, ANIMATION_SUMMARY_FIELDS)
+        projection = build_projection(selected, ANIMATION_FIELDS)
+        
+        # Get animations with pagination (cursor mode takes precedence over page numbers)
+        documents, next_cursor = await fetch_page(animations_collection, query, page, page_size, cursor, projection)
+        
+        # Serialize rows directly; validating every row through pydantic dominates CPU on large pages
+        return {
+            "animations": serialize_rows(documents, selected, ANIMATION_FIELDS),
+            "total": total,
+            "total_estimated": total_estimated,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor
+        }
     
-    # Get total count
-    total = await animations_collection.count_documents(query)
+    cache_key = build_cache_key(
+        page=page, page_size=page_size, cursor=cursor, search=search, category=category,
+        tags=tags, include_total=include_total, view=view, fields=fields
+    )
+    return await cached_json_response(request, list_namespace("animations"), cache_key, build_listing)
+
+@router.post("/batch", response_model=AnimationBatch)
+async def get_animations_batch(
+    request: BatchGetRequest,
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get many animations in one query, in request order (public or owned only)"""
+    user_id = current_user.get("sub")
+    selected = select_fields(fields, view, ANIMATION_FIELDS, ANIMATION_SUMMARY_FIELDS)
+    projection = build_projection(selected, ANIMATION_FIELDS)
+    projection.update({"is_public": 1, "uploaded_by": 1})
     
-    # Get animations with pagination
-    skip = (page - 1) * page_size
-    cursor = animations_collection.find(query).skip(skip).limit(page_size).sort("created_at", -1)
+    # Hex IDs may arrive in any case; documents are matched on str(ObjectId), which is lowercase
+    canonical_ids = {item_id: str(ObjectId(item_id)) for item_id in request.ids if ObjectId.is_valid(item_id)}
+    object_ids = [ObjectId(item_id) for item_id in set(canonical_ids.values())]
+    documents = {}
+    async for document in animations_collection.find({"_id": {"$in": object_ids}}, projection):
+        if document.get("is_public", True) or str(document["uploaded_by"]) == user_id:
+            documents[str(document["_id"])] = document
     
-    animations = []
-    async for anim in cursor:
-        animations.append(AnimationResponse(
-            id=str(anim["_id"]),
-            name=anim["name"],
-            description=anim.get("description", ""),
-            category=anim.get("category", "Basic"),
-            duration=anim.get("duration", 0.0),
-            tags=anim.get("tags", []),
-            thumbnail=get_file_url(anim.get("thumbnail", "")),
-            animation_file=get_file_url(anim.get("animation_file", "")),
-            preview_video=get_file_url(anim.get("preview_video", "")),
-            is_public=anim.get("is_public", True),
-            uploaded_by=str(anim["uploaded_by"]),
-            created_at=anim["created_at"],
-            updated_at=anim["updated_at"]
-        ))
+    found = [documents[canonical_ids[item_id]] for item_id in request.ids if canonical_ids.get(item_id) in documents]
+    return JSONResponse({
+        "animations": serialize_rows(found, selected, ANIMATION_FIELDS),
+        "missing": [item_id for item_id in request.ids if canonical_ids.get(item_id) not in documents]
+    })
+
+@router.get("/autocomplete", response_model=SearchSuggestionList)
+async def autocomplete_animations(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Ranked animations matching a partially typed query (prefix and typo tolerant)"""
+    matches = animation_search_index.search(q, user_id=current_user.get("sub"), limit=limit)
     
-    return AnimationList(
-        animations=animations,
-        total=total,
-        page=page,
-        page_size=page_size
+    return SearchSuggestionList(
+        query=q,
+        suggestions=[
+            SearchSuggestion(
+                id=match["id"],
+                name=match["name"],
+                label=match["facet"],
+                thumbnail=get_file_url(match["thumbnail"]),
+                score=match["score"]
+            )
+            for match in matches
+        ]
     )
 
 @router.get("/{animation_id}", response_model=AnimationResponse)
 async def get_animation(
     animation_id: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """Get specific animation"""
+    # Canonical form, so every spelling of an id shares one cache namespace
+    try:
+        animation_id = str(ObjectId(animation_id))
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid animation ID")
+    
+    return await cached_json_response(
+        request, item_namespace("animations", animation_id), "",
+        lambda: load_animation_response(animation_id)
+    )
+
+async def load_animation_response(animation_id: str) -> dict:
+    """JSON-ready single animation response"""
     try:
         anim = await animations_collection.find_one({"_id": ObjectId(animation_id)})
         if not anim:
@@ -90,10 +200,64 @@ async def get_animation(
             uploaded_by=str(anim["uploaded_by"]),
             created_at=anim["created_at"],
             updated_at=anim["updated_at"]
-        )
+        ).model_dump(mode="json")
     except Exception as e:
         raise HTTPException(status_code=400, detail="Invalid animation ID")
 
+def build_animation_document(
+    animation: AnimationCreate,
+    animation_path: str,
+    thumbnail_path: Optional[str],
+    user_id: str
+) -> dict:
+    """Animation document for a stored animation file"""
+    return {
+        "_id": ObjectId(),
+        "name": animation.name,
+        "description": animation.description,
+        "category": animation.category,
+        "duration": animation.duration,
+        "tags": animation.tags,
+        "thumbnail": thumbnail_path,
+        "animation_file": animation_path,
+        "preview_video": None,
+        "is_public": animation.is_public,
+        "uploaded_by": ObjectId(user_id),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+
+async def create_animation(
+    animation: AnimationCreate,
+    animation_path: str,
+    thumbnail_path: Optional[str],
+    user_id: str
+) -> AnimationResponse:
+    """Insert an animation document for an already stored animation file"""
+    # Create animation document
+    animation_doc = build_animation_document(animation, animation_path, thumbnail_path, user_id)
+    
+    # Insert animation
+    result = await animations_collection.insert_one(animation_doc)
+    invalidate_list_totals(animations_collection)
+    await invalidate_catalog_responses("animations", result.inserted_id)
+    animation_search_index.add(animation_doc)
+    
+    return AnimationResponse(
+        id=str(result.inserted_id),
+        name=animation.name,
+        description=animation.description,
+        category=animation.category,
+        duration=animation.duration,
+        tags=animation.tags,
+        thumbnail=get_file_url(thumbnail_path) if thumbnail_path else None,
+        animation_file=get_file_url(animation_path),
+        is_public=animation.is_public,
+        uploaded_by=user_id,
+        created_at=animation_doc["created_at"],
+        updated_at=animation_doc["updated_at"]
+    )
+
 @router.post("", response_model=AnimationResponse)
 async def upload_animation(
     name: str = Form(...),
@@ -120,40 +284,72 @@ async def upload_animation(
     # Parse tags
     tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
     
-    # Create animation document
-    animation_doc = {
-        "_id": ObjectId(),
-        "name": name,
-        "description": description,
-        "category": category,
-        "duration": duration,
-        "tags": tag_list,
-        "thumbnail": thumbnail_path,
-        "animation_file": animation_path,
-        "preview_video": None,
-        "is_public": is_public,
-        "uploaded_by": ObjectId(user_id),
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
-    
-    # Insert animation
-    result = await animations_collection.insert_one(animation_doc)
-    
-    return AnimationResponse(
-        id=str(result.inserted_id),
+    animation = AnimationCreate(
         name=name,
         description=description,
         category=category,
         duration=duration,
         tags=tag_list,
-        thumbnail=get_file_url(thumbnail_path) if thumbnail_path else None,
-        animation_file=get_file_url(animation_path),
-        is_public=is_public,
-        uploaded_by=user_id,
-        created_at=animation_doc["created_at"],
-        updated_at=animation_doc["updated_at"]
+        is_public=is_public
+    )
+    
+    return await create_animation(animation, animation_path, thumbnail_path, user_id)
+
+@router.post("/uploads", response_model=UploadSessionResponse)
+async def open_animation_upload(
+    upload: UploadSessionCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Open a resumable upload session for a large animation file"""
+    session = await create_upload_session(
+        upload, "animations", ALLOWED_ANIMATION_EXTENSIONS, current_user.get("sub")
     )
+    return session_to_response(session)
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionResponse)
+async def get_animation_upload(
+    session_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get upload session state, including which chunks are still missing"""
+    session = await get_upload_session(session_id, "animations", current_user.get("sub"))
+    return session_to_response(session)
+
+@router.put("/uploads/{session_id}/chunks/{index}", response_model=UploadSessionResponse)
+async def upload_animation_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Upload one numbered chunk (raw request body); chunks may be sent in parallel"""
+    session = await get_upload_session(session_id, "animations", current_user.get("sub"))
+    session = await write_upload_chunk(session, index, request)
+    return session_to_response(session)
+
+@router.post("/uploads/{session_id}/commit", response_model=AnimationResponse)
+async def commit_animation_upload(
+    session_id: str,
+    animation: AnimationCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Assemble the uploaded chunks and create the animation"""
+    user_id = current_user.get("sub")
+    session = await get_upload_session(session_id, "animations", user_id)
+    animation_path = await commit_upload_session(session)
+    
+    return await create_animation(animation, animation_path, None, user_id)
+
+@router.delete("/uploads/{session_id}")
+async def abort_animation_upload(
+    session_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Abort an upload session and discard its chunks"""
+    session = await get_upload_session(session_id, "animations", current_user.get("sub"))
+    await delete_upload_session(session)
+    
+    return {"message": "Upload session aborted"}
 
 @router.put("/{animation_id}", response_model=AnimationResponse)
 async def update_animation(
@@ -164,15 +360,6 @@ async def update_animation(
     """Update animation metadata"""
     user_id = current_user.get("sub")
     
-    # Check if animation exists and user owns it
-    anim = await animations_collection.find_one({
-        "_id": ObjectId(animation_id),
-        "uploaded_by": ObjectId(user_id)
-    })
-    
-    if not anim:
-        raise HTTPException(status_code=404, detail="Animation not found or access denied")
-    
     # Prepare update data
     update_data = {"updated_at": datetime.utcnow()}
     
@@ -187,14 +374,19 @@ async def update_animation(
     if animation_update.is_public is not None:
         update_data["is_public"] = animation_update.is_public
     
-    # Update animation
-    await animations_collection.update_one(
-        {"_id": ObjectId(animation_id)},
-        {"$set": update_data}
+    # Ownership is part of the filter, so the check and the write are one atomic step
+    updated_anim = await animations_collection.find_one_and_update(
+        {"_id": ObjectId(animation_id), "uploaded_by": ObjectId(user_id)},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
     
-    # Get updated animation
-    updated_anim = await animations_collection.find_one({"_id": ObjectId(animation_id)})
+    if not updated_anim:
+        raise HTTPException(status_code=404, detail="Animation not found or access denied")
+    
+    invalidate_list_totals(animations_collection)
+    await invalidate_catalog_responses("animations", updated_anim["_id"])
+    animation_search_index.add(updated_anim)
     
     return AnimationResponse(
         id=str(updated_anim["_id"]),
@@ -229,12 +421,15 @@ async def delete_animation(
     if not anim:
         raise HTTPException(status_code=404, detail="Animation not found or access denied")
     
-    # TODO: Delete associated files
-    # delete_file(anim.get("animation_file"))
-    # delete_file(anim.get("thumbnail"))
-    # delete_file(anim.get("preview_video"))
-    
     # Delete animation
-    await animations_collection.delete_one({"_id": ObjectId(animation_id)})
+    result = await animations_collection.delete_one({"_id": ObjectId(animation_id)})
+    invalidate_list_totals(animations_collection)
+    await invalidate_catalog_responses("animations", anim["_id"])
+    animation_search_index.remove(anim["_id"])
+    
+    # Release associated files (shared content is kept while still referenced)
+    if result.deleted_count:
+        for file_path in (anim.get("animation_file"), anim.get("thumbnail"), anim.get("preview_video")):
+            await release_file(file_path)
     
     return {"message": "Animation deleted successfully"}
\ No newline at end of file
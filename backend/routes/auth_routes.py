@@ -2,8 +2,12 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from database import users_collection
 from models.user import UserCreate, UserLogin, UserResponse, Token, UserUpdate
-from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from auth import (
+    get_password_hash_async, verify_password_async, create_access_token, get_current_user, get_current_user_doc,
+    revoke_token, security
+)
 from datetime import datetime
+from pymongo import ReturnDocument
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -19,7 +23,7 @@ async def register_user(user: UserCreate):
         )
     
     # Hash password and create user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     user_dict = {
         "email": user.email,
         "name": user.name,
@@ -61,12 +65,20 @@ async def login_user(user: UserLogin):
         )
     
     # Verify password
-    if not verify_password(user.password, db_user["password"]):
+    valid, new_hash = await verify_password_async(user.password, db_user["password"])
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    # Upgrade hashes made with outdated parameters now that we have the password
+    if new_hash:
+        await users_collection.update_one(
+            {"_id": db_user["_id"], "password": db_user["password"]},
+            {"$set": {"password": new_hash}}
+        )
+    
     # Create access token
     access_token = create_access_token(data={"sub": str(db_user["_id"])})
     
@@ -83,20 +95,18 @@ async def login_user(user: UserLogin):
     
     return Token(access_token=access_token, user=user_response)
 
+@router.post("/logout")
+async def logout_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
+    """Logout user by revoking the token used for this request"""
+    await revoke_token(credentials.credentials, current_user)
+    return {"message": "Logged out successfully"}
+
 @router.get("/profile", response_model=UserResponse)
-async def get_user_profile(current_user: dict = Depends(get_current_user)):
+async def get_user_profile(db_user: dict = Depends(get_current_user_doc)):
     """Get current user profile"""
-    from bson import ObjectId
-    
-    user_id = current_user.get("sub")
-    db_user = await users_collection.find_one({"_id": ObjectId(user_id)})
-    
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     return UserResponse(
         id=str(db_user["_id"]),
         email=db_user["email"],
@@ -126,21 +136,19 @@ async def update_user_profile(
     
     update_data["updated_at"] = datetime.utcnow()
     
-    # Update user
-    result = await users_collection.update_one(
+    # Update user and get the updated document in one round trip
+    db_user = await users_collection.find_one_and_update(
         {"_id": ObjectId(user_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Get updated user
-    db_user = await users_collection.find_one({"_id": ObjectId(user_id)})
-    
     return UserResponse(
         id=str(db_user["_id"]),
         email=db_user["email"],
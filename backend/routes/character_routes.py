@@ -1,77 +1,189 @@
-from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Query, Form
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Query, Form, Request
+from fastapi.responses import JSONResponse
+from typing import Optional, List, Union
 from database import characters_collection
-from models.character import CharacterCreate, CharacterResponse, CharacterUpdate, CharacterList
+from models.character import (
+    CharacterCreate, CharacterResponse, CharacterUpdate, CharacterList, CharacterSummary, CharacterSummaryList,
+    CharacterBatch
+)
+from models.batch import BatchGetRequest
+from models.search import SearchSuggestion, SearchSuggestionList
+from models.upload import UploadSessionCreate, UploadSessionResponse
 from auth import get_current_user
-from file_handler import save_character_file, save_thumbnail_file, generate_thumbnail_from_model, get_file_url
+from pagination import fetch_page
+from projections import select_fields, build_projection, serialize_rows, serialize_datetime
+from count_cache import get_list_total, invalidate_list_totals
+from search_index import character_search_index
+from response_cache import (
+    build_cache_key, cached_json_response, invalidate_catalog_responses, list_namespace, item_namespace
+)
+from file_handler import (
+    save_character_file, save_thumbnail_file, save_thumbnail_bytes, get_file_url,
+    release_file, ALLOWED_MODEL_EXTENSIONS
+)
+from upload_sessions import (
+    create_upload_session, get_upload_session, write_upload_chunk,
+    commit_upload_session, delete_upload_session, session_to_response
+)
+from thumbnail_renderer import describe_model_async
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
 import uuid
 
 router = APIRouter(prefix="/characters", tags=["characters"])
 
-@router.get("", response_model=CharacterList)
+# List response fields: (document fields read, builder)
+CHARACTER_FIELDS = {
+    "id": (("_id",), lambda char: str(char["_id"])),
+    "name": (("name",), lambda char: char["name"]),
+    "description": (("description",), lambda char: char.get("description", "")),
+    "type": (("type",), lambda char: char.get("type", "Humanoid")),
+    "polygons": (("polygons",), lambda char: char.get("polygons", 0)),
+    "tags": (("tags",), lambda char: char.get("tags", [])),
+    "thumbnail": (("thumbnail",), lambda char: get_file_url(char.get("thumbnail", ""))),
+    "model_file": (("model_file",), lambda char: get_file_url(char.get("model_file", ""))),
+    "rigged_file": (("rigged_file",), lambda char: get_file_url(char.get("rigged_file", ""))),
+    "is_rigged": (("is_rigged",), lambda char: char.get("is_rigged", False)),
+    "model_metadata": (("model_metadata",), lambda char: char.get("model_metadata")),
+    "is_public": (("is_public",), lambda char: char.get("is_public", True)),
+    "uploaded_by": (("uploaded_by",), lambda char: str(char["uploaded_by"])),
+    "created_at": (("created_at",), lambda char: serialize_datetime(char["created_at"])),
+    "updated_at": (("updated_at",), lambda char: serialize_datetime(char["updated_at"]))
+}
+CHARACTER_SUMMARY_FIELDS = list(CharacterSummary.model_fields)
+
+@router.get("", response_model=Union[CharacterList, CharacterSummaryList])
 async def get_characters(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
     type_filter: Optional[str] = Query(None),
     tags: Optional[List[str]] = Query(None),
+    include_total: bool = Query(True),
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get characters with pagination and filtering"""
-    
-    # Build query
-    query = {"is_public": True}
-    
-    if search:
-        query["$text"] = {"$search": search}
-    
-    if type_filter:
-        query["type"] = type_filter
+    """Get characters with pagination and filtering.
+
+    ``view=summary`` returns lightweight rows; ``fields=a,b`` picks exact fields.
+    The listing only contains public characters, so responses are cached and
+    shared between users.
+    """
     
-    if tags:
-        query["tags"] = {"$in": tags}
+    async def build_listing() -> dict:
+        # Build query
+        query = {"is_public": True}
+        
+        if search:
+            query["$text"] = {"$search": search}
+        
+        if type_filter:
+            query["type"] = type_filter
+        
+        if tags:
+            query["tags"] = {"$in": tags}
+        
+        # Get total count (cached; estimated for the unfiltered listing)
+        total, total_estimated = await get_list_total(characters_collection, query, include_total)
+        
+        # Load only the fields the response needs
+        selected = select_fields(fields, view, CHARACTER_FIELDS, CHARACTER_SUMMARY_FIELDS)
+        projection = build_projection(selected, CHARACTER_FIELDS)
+        
+        # Get characters with pagination (cursor mode takes precedence over page numbers)
+        documents, next_cursor = await fetch_page(characters_collection, query, page, page_size, cursor, projection)
+        
+        # Serialize rows directly; validating every row through pydantic dominates CPU on large pages
+        return {
+            "characters": serialize_rows(documents, selected, CHARACTER_FIELDS),
+            "total": total,
+            "total_estimated": total_estimated,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor
+        }
     
-    # Get total count
-    total = await characters_collection.count_documents(query)
+    cache_key = build_cache_key(
+        page=page, page_size=page_size, cursor=cursor, search=search, type_filter=type_filter,
+        tags=tags, include_total=include_total, view=view, fields=fields
+    )
+    return await cached_json_response(request, list_namespace("characters"), cache_key, build_listing)
+
+@router.post("/batch", response_model=CharacterBatch)
+async def get_characters_batch(
+    request: BatchGetRequest,
+    view: str = Query("full", pattern="^(full|summary)$"),
+    fields: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get many characters in one query, in request order (public or owned only)"""
+    user_id = current_user.get("sub")
+    selected = select_fields(fields, view, CHARACTER_FIELDS, CHARACTER_SUMMARY_FIELDS)
+    projection = build_projection(selected, CHARACTER_FIELDS)
+    projection.update({"is_public": 1, "uploaded_by": 1})
     
-    # Get characters with pagination
-    skip = (page - 1) * page_size
-    cursor = characters_collection.find(query).skip(skip).limit(page_size).sort("created_at", -1)
+    # Hex IDs may arrive in any case; documents are matched on str(ObjectId), which is lowercase
+    canonical_ids = {item_id: str(ObjectId(item_id)) for item_id in request.ids if ObjectId.is_valid(item_id)}
+    object_ids = [ObjectId(item_id) for item_id in set(canonical_ids.values())]
+    documents = {}
+    async for document in characters_collection.find({"_id": {"$in": object_ids}}, projection):
+        if document.get("is_public", True) or str(document["uploaded_by"]) == user_id:
+            documents[str(document["_id"])] = document
     
-    characters = []
-    async for char in cursor:
-        characters.append(CharacterResponse(
-            id=str(char["_id"]),
-            name=char["name"],
-            description=char.get("description", ""),
-            type=char.get("type", "Humanoid"),
-            polygons=char.get("polygons", 0),
-            tags=char.get("tags", []),
-            thumbnail=get_file_url(char.get("thumbnail", "")),
-            model_file=get_file_url(char.get("model_file", "")),
-            rigged_file=get_file_url(char.get("rigged_file", "")),
-            is_rigged=char.get("is_rigged", False),
-            is_public=char.get("is_public", True),
-            uploaded_by=str(char["uploaded_by"]),
-            created_at=char["created_at"],
-            updated_at=char["updated_at"]
-        ))
+    found = [documents[canonical_ids[item_id]] for item_id in request.ids if canonical_ids.get(item_id) in documents]
+    return JSONResponse({
+        "characters": serialize_rows(found, selected, CHARACTER_FIELDS),
+        "missing": [item_id for item_id in request.ids if canonical_ids.get(item_id) not in documents]
+    })
+
+@router.get("/autocomplete", response_model=SearchSuggestionList)
+async def autocomplete_characters(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Ranked characters matching a partially typed query (prefix and typo tolerant)"""
+    matches = character_search_index.search(q, user_id=current_user.get("sub"), limit=limit)
     
-    return CharacterList(
-        characters=characters,
-        total=total,
-        page=page,
-        page_size=page_size
+    return SearchSuggestionList(
+        query=q,
+        suggestions=[
+            SearchSuggestion(
+                id=match["id"],
+                name=match["name"],
+                label=match["facet"],
+                thumbnail=get_file_url(match["thumbnail"]),
+                score=match["score"]
+            )
+            for match in matches
+        ]
     )
 
 @router.get("/{character_id}", response_model=CharacterResponse)
 async def get_character(
     character_id: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """Get specific character"""
+    # Canonical form, so every spelling of an id shares one cache namespace
+    try:
+        character_id = str(ObjectId(character_id))
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid character ID")
+    
+    return await cached_json_response(
+        request, item_namespace("characters", character_id), "",
+        lambda: load_character_response(character_id)
+    )
+
+async def load_character_response(character_id: str) -> dict:
+    """JSON-ready single character response"""
     try:
         char = await characters_collection.find_one({"_id": ObjectId(character_id)})
         if not char:
@@ -88,14 +200,84 @@ async def get_character(
             model_file=get_file_url(char.get("model_file", "")),
             rigged_file=get_file_url(char.get("rigged_file", "")),
             is_rigged=char.get("is_rigged", False),
+            model_metadata=char.get("model_metadata"),
             is_public=char.get("is_public", True),
             uploaded_by=str(char["uploaded_by"]),
             created_at=char["created_at"],
             updated_at=char["updated_at"]
-        )
+        ).model_dump(mode="json")
     except Exception as e:
         raise HTTPException(status_code=400, detail="Invalid character ID")
 
+def build_character_document(
+    character: CharacterCreate,
+    model_path: str,
+    thumbnail_path: Optional[str],
+    user_id: str,
+    metadata: Optional[dict]
+) -> dict:
+    """Character document for a stored model file and its mesh statistics"""
+    return {
+        "_id": ObjectId(),
+        "name": character.name,
+        "description": character.description,
+        "type": character.type,
+        "polygons": metadata["triangles"] if metadata else 0,
+        "tags": character.tags,
+        "thumbnail": thumbnail_path,
+        "model_file": model_path,
+        "rigged_file": None,
+        "is_rigged": bool(metadata and metadata["joints"]),
+        "model_metadata": metadata,
+        "is_public": character.is_public,
+        "uploaded_by": ObjectId(user_id),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+
+async def create_character(
+    character: CharacterCreate,
+    model_path: str,
+    thumbnail_path: Optional[str],
+    user_id: str
+) -> CharacterResponse:
+    """Insert a character document for an already stored model file"""
+    # Mesh statistics and, if none was provided, a thumbnail in one render pool pass
+    try:
+        metadata, rendered = await describe_model_async(model_path, not thumbnail_path)
+    except Exception as e:
+        print(f"Error analysing model: {e}")
+        metadata, rendered = None, None
+    
+    if not thumbnail_path:
+        thumbnail_path = await save_thumbnail_bytes(rendered)
+    
+    # Create character document
+    character_doc = build_character_document(character, model_path, thumbnail_path, user_id, metadata)
+    
+    # Insert character
+    result = await characters_collection.insert_one(character_doc)
+    invalidate_list_totals(characters_collection)
+    await invalidate_catalog_responses("characters", result.inserted_id)
+    character_search_index.add(character_doc)
+    
+    return CharacterResponse(
+        id=str(result.inserted_id),
+        name=character.name,
+        description=character.description,
+        type=character.type,
+        polygons=character_doc["polygons"],
+        tags=character.tags,
+        thumbnail=get_file_url(thumbnail_path) if thumbnail_path else None,
+        model_file=get_file_url(model_path),
+        is_rigged=character_doc["is_rigged"],
+        model_metadata=metadata,
+        is_public=character.is_public,
+        uploaded_by=user_id,
+        created_at=character_doc["created_at"],
+        updated_at=character_doc["updated_at"]
+    )
+
 @router.post("", response_model=CharacterResponse)
 async def upload_character(
     name: str = Form(...),
@@ -113,53 +295,79 @@ async def upload_character(
     # Save model file
     model_path = await save_character_file(model_file)
     
-    # Save or generate thumbnail
+    # Save thumbnail if provided
     thumbnail_path = None
     if thumbnail:
         thumbnail_path = await save_thumbnail_file(thumbnail)
-    else:
-        thumbnail_path = await generate_thumbnail_from_model(model_path)
     
     # Parse tags
     tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else []
     
-    # Create character document
-    character_id = str(uuid.uuid4())
-    character_doc = {
-        "_id": ObjectId(),
-        "name": name,
-        "description": description,
-        "type": type,
-        "polygons": 0,  # TODO: Calculate from model file
-        "tags": tag_list,
-        "thumbnail": thumbnail_path,
-        "model_file": model_path,
-        "rigged_file": None,
-        "is_rigged": False,
-        "is_public": is_public,
-        "uploaded_by": ObjectId(user_id),
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
-    
-    # Insert character
-    result = await characters_collection.insert_one(character_doc)
-    
-    return CharacterResponse(
-        id=str(result.inserted_id),
+    character = CharacterCreate(
         name=name,
         description=description,
         type=type,
-        polygons=0,
         tags=tag_list,
-        thumbnail=get_file_url(thumbnail_path) if thumbnail_path else None,
-        model_file=get_file_url(model_path),
-        is_rigged=False,
-        is_public=is_public,
-        uploaded_by=user_id,
-        created_at=character_doc["created_at"],
-        updated_at=character_doc["updated_at"]
+        is_public=is_public
+    )
+    
+    return await create_character(character, model_path, thumbnail_path, user_id)
+
+@router.post("/uploads", response_model=UploadSessionResponse)
+async def open_character_upload(
+    upload: UploadSessionCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Open a resumable upload session for a large character model"""
+    session = await create_upload_session(
+        upload, "characters", ALLOWED_MODEL_EXTENSIONS, current_user.get("sub")
     )
+    return session_to_response(session)
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionResponse)
+async def get_character_upload(
+    session_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get upload session state, including which chunks are still missing"""
+    session = await get_upload_session(session_id, "characters", current_user.get("sub"))
+    return session_to_response(session)
+
+@router.put("/uploads/{session_id}/chunks/{index}", response_model=UploadSessionResponse)
+async def upload_character_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Upload one numbered chunk (raw request body); chunks may be sent in parallel"""
+    session = await get_upload_session(session_id, "characters", current_user.get("sub"))
+    session = await write_upload_chunk(session, index, request)
+    return session_to_response(session)
+
+@router.post("/uploads/{session_id}/commit", response_model=CharacterResponse)
+async def commit_character_upload(
+    session_id: str,
+    character: CharacterCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Assemble the uploaded chunks and create the character"""
+    user_id = current_user.get("sub")
+    session = await get_upload_session(session_id, "characters", user_id)
+    model_path = await commit_upload_session(session)
+    
+    return await create_character(character, model_path, None, user_id)
+
+@router.delete("/uploads/{session_id}")
+async def abort_character_upload(
+    session_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Abort an upload session and discard its chunks"""
+    session = await get_upload_session(session_id, "characters", current_user.get("sub"))
+    await delete_upload_session(session)
+    
+    return {"message": "Upload session aborted"}
 
 @router.put("/{character_id}", response_model=CharacterResponse)
 async def update_character(
@@ -170,15 +378,6 @@ async def update_character(
     """Update character metadata"""
     user_id = current_user.get("sub")
     
-    # Check if character exists and user owns it
-    char = await characters_collection.find_one({
-        "_id": ObjectId(character_id),
-        "uploaded_by": ObjectId(user_id)
-    })
-    
-    if not char:
-        raise HTTPException(status_code=404, detail="Character not found or access denied")
-    
     # Prepare update data
     update_data = {"updated_at": datetime.utcnow()}
     
@@ -193,14 +392,19 @@ async def update_character(
     if character_update.is_public is not None:
         update_data["is_public"] = character_update.is_public
     
-    # Update character
-    await characters_collection.update_one(
-        {"_id": ObjectId(character_id)},
-        {"$set": update_data}
+    # Ownership is part of the filter, so the check and the write are one atomic step
+    updated_char = await characters_collection.find_one_and_update(
+        {"_id": ObjectId(character_id), "uploaded_by": ObjectId(user_id)},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
     
-    # Get updated character
-    updated_char = await characters_collection.find_one({"_id": ObjectId(character_id)})
+    if not updated_char:
+        raise HTTPException(status_code=404, detail="Character not found or access denied")
+    
+    invalidate_list_totals(characters_collection)
+    await invalidate_catalog_responses("characters", updated_char["_id"])
+    character_search_index.add(updated_char)
     
     return CharacterResponse(
         id=str(updated_char["_id"]),
@@ -213,6 +417,7 @@ async def update_character(
         model_file=get_file_url(updated_char.get("model_file", "")),
         rigged_file=get_file_url(updated_char.get("rigged_file", "")),
         is_rigged=updated_char.get("is_rigged", False),
+        model_metadata=updated_char.get("model_metadata"),
         is_public=updated_char.get("is_public", True),
         uploaded_by=str(updated_char["uploaded_by"]),
         created_at=updated_char["created_at"],
@@ -236,12 +441,15 @@ async def delete_character(
     if not char:
         raise HTTPException(status_code=404, detail="Character not found or access denied")
     
-    # TODO: Delete associated files
-    # delete_file(char.get("model_file"))
-    # delete_file(char.get("thumbnail"))
-    # delete_file(char.get("rigged_file"))
-    
     # Delete character
-    await characters_collection.delete_one({"_id": ObjectId(character_id)})
+    result = await characters_collection.delete_one({"_id": ObjectId(character_id)})
+    invalidate_list_totals(characters_collection)
+    await invalidate_catalog_responses("characters", char["_id"])
+    character_search_index.remove(char["_id"])
+    
+    # Release associated files (shared content is kept while still referenced)
+    if result.deleted_count:
+        for file_path in (char.get("model_file"), char.get("thumbnail"), char.get("rigged_file")):
+            await release_file(file_path)
     
     return {"message": "Character deleted successfully"}
\ No newline at end of file
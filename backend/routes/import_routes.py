@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
+from typing import Optional
+from pydantic import ValidationError
+from database import processing_jobs_collection
+from models.imports import ImportManifest, ImportJobResponse, ImportItemStatus
+from auth import get_current_user, get_current_user_doc
+from job_queue import enqueue_job, get_job_priority, update_job
+from file_handler import iter_upload_file, write_chunks_to_disk
+from storage import remove_file
+from bulk_import import IMPORT_DIR, IMPORT_MAX_ARCHIVE_SIZE, ARCHIVE_EXTENSIONS, get_archive_extension, create_import_job
+from bson import ObjectId
+import uuid
+
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+def import_job_to_response(job: dict) -> ImportJobResponse:
+    """Convert an import job document to its response model"""
+    return ImportJobResponse(
+        id=str(job["_id"]),
+        status=job["status"],
+        progress=job.get("progress", 0),
+        total_items=job.get("total_items", 0),
+        imported=job.get("imported", 0),
+        failed=job.get("failed", 0),
+        items=[ImportItemStatus(**item) for item in job.get("items", [])],
+        error=job.get("error"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
+
+@router.post("", response_model=ImportJobResponse)
+async def start_import(
+    archive: UploadFile = File(...),
+    manifest: Optional[UploadFile] = File(None),
+    current_user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_doc)
+):
+    """Upload a library archive and start importing it in the background.
+
+    The manifest describes every character and animation in the archive; it
+    is either uploaded alongside or shipped as manifest.json inside it.
+    """
+    user_id = current_user.get("sub")
+
+    extension = get_archive_extension(archive.filename or "")
+    if not extension:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid archive type. Allowed types: {', '.join(ARCHIVE_EXTENSIONS)}"
+        )
+
+    import_manifest = None
+    if manifest:
+        try:
+            import_manifest = ImportManifest.model_validate_json(await manifest.read())
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid manifest: {e}")
+
+    # The archive is kept as uploaded; the job streams entries out of it
+    archive_path = IMPORT_DIR / f"{uuid.uuid4()}{extension}"
+    await write_chunks_to_disk(iter_upload_file(archive), archive_path, IMPORT_MAX_ARCHIVE_SIZE)
+
+    try:
+        job = await create_import_job(user_id, str(archive_path), import_manifest)
+    except Exception:
+        await remove_file(archive_path)
+        raise
+
+    priority = get_job_priority(user.get("subscription"))
+    try:
+        await enqueue_job("import", str(job["_id"]), priority)
+    except Exception as e:
+        await update_job(str(job["_id"]), {"status": "failed", "error": str(e)})
+        await remove_file(archive_path)
+        raise HTTPException(status_code=503, detail="Processing queue unavailable")
+
+    return import_job_to_response(job)
+
+@router.get("/{job_id}", response_model=ImportJobResponse)
+async def get_import_status(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get an import's progress and the status of each item"""
+    try:
+        job = await processing_jobs_collection.find_one({
+            "_id": ObjectId(job_id),
+            "user_id": ObjectId(current_user.get("sub")),
+            "kind": "import"
+        })
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid import ID")
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+
+    return import_job_to_response(job)
@@ -1,21 +1,44 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from database import processing_jobs_collection, characters_collection, animations_collection
-from models.processing import ProcessingJobResponse, ApplyAnimationRequest, ProcessingJobUpdate
-from auth import get_current_user
+from models.processing import (
+    ProcessingJobResponse, ApplyAnimationRequest, ProcessingJobUpdate, ProcessingJobSummary, ProcessingJobList,
+    BatchApplyAnimationRequest, BatchJobResponse, BatchItemStatus
+)
+from auth import get_current_user, get_current_user_doc, authenticate_token
+from job_queue import enqueue_job, get_job_priority, get_job_expiry, update_job, cancel_job
+from pagination import fetch_page
+from job_events import job_event_bus, build_job_event, publish_job_event, TERMINAL_STATUSES
+from result_cache import compute_result_key, lookup_result, get_export_format
+import retarget  # noqa: F401  (registers the "retarget" job task)
+from batch_retarget import BATCH_RETARGET_MAX_ITEMS, create_batch_job
 from datetime import datetime
 from bson import ObjectId
+import json
 import uuid
 
 router = APIRouter(prefix="/process", tags=["processing"])
 
+# Seconds between keepalives on idle event streams
+EVENT_STREAM_KEEPALIVE = 15
+
+def validate_settings(settings: dict) -> None:
+    """Reject settings that can't be used to build a result path"""
+    try:
+        get_export_format(settings)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/apply-animation", response_model=ProcessingJobResponse)
 async def apply_animation_to_character(
     request: ApplyAnimationRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_doc)
 ):
     """Apply animation to character and start processing job"""
     user_id = current_user.get("sub")
+    validate_settings(request.settings)
     
     # Verify character exists and is accessible
     character = await characters_collection.find_one({
@@ -41,6 +64,10 @@ async def apply_animation_to_character(
     if not animation:
         raise HTTPException(status_code=404, detail="Animation not found or not accessible")
     
+    # Identical requests on identical content reuse an earlier result
+    result_key = await compute_result_key(character, animation, request.settings)
+    cached_result = await lookup_result(result_key)
+    
     # Create processing job
     job_doc = {
         "_id": ObjectId(),
@@ -50,32 +77,143 @@ async def apply_animation_to_character(
         "status": "pending",
         "progress": 0,
         "result_file": None,
+        "result_key": result_key,
+        "cached": False,
         "error": None,
         "settings": request.settings,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
     
+    if cached_result:
+        job_doc.update({
+            "status": "completed",
+            "progress": 100,
+            "result_file": cached_result["result_file"],
+            "cached": True
+        })
+        job_doc.update(get_job_expiry(job_doc, job_doc["updated_at"]))
+    
     # Insert job
     result = await processing_jobs_collection.insert_one(job_doc)
+    await publish_job_event(job_doc)
     
-    # TODO: Queue the job for background processing
-    # In a real implementation, this would trigger a Celery task or similar
-    # For now, we'll simulate immediate processing
-    await simulate_processing(str(result.inserted_id))
+    if not cached_result:
+        # Queue the job for background processing in the user's priority lane
+        priority = get_job_priority(user.get("subscription"))
+        try:
+            await enqueue_job("retarget", str(result.inserted_id), priority)
+        except Exception as e:
+            await update_job(str(result.inserted_id), {"status": "failed", "error": str(e)})
+            raise HTTPException(status_code=503, detail="Processing queue unavailable")
     
     return ProcessingJobResponse(
         id=str(result.inserted_id),
         character_id=request.character_id,
         animation_id=request.animation_id,
         user_id=user_id,
-        status="pending",
-        progress=0,
+        status=job_doc["status"],
+        progress=job_doc["progress"],
+        result_file=job_doc["result_file"],
+        cached=job_doc["cached"],
         settings=request.settings,
         created_at=job_doc["created_at"],
         updated_at=job_doc["updated_at"]
     )
 
+def batch_job_to_response(job: dict) -> BatchJobResponse:
+    """Convert a batch retarget job document to its response model"""
+    return BatchJobResponse(
+        id=str(job["_id"]),
+        status=job["status"],
+        progress=job.get("progress", 0),
+        total_items=job.get("total_items", 0),
+        completed=job.get("completed", 0),
+        failed=job.get("failed", 0),
+        items=[BatchItemStatus(**item) for item in job.get("items", [])],
+        result_file=job.get("result_file"),
+        settings=job.get("settings", {}),
+        error=job.get("error"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
+
+async def find_inaccessible(collection, ids: set, user_id: str) -> set:
+    """The IDs that don't exist or that the user can't use, checked with one query"""
+    accessible = await collection.find(
+        {"_id": {"$in": list(ids)}, "$or": [{"is_public": True}, {"uploaded_by": ObjectId(user_id)}]},
+        {"_id": 1}
+    ).to_list(None)
+    return ids - {document["_id"] for document in accessible}
+
+@router.post("/apply-animation/batch", response_model=BatchJobResponse)
+async def apply_animation_batch(
+    request: BatchApplyAnimationRequest,
+    current_user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_doc)
+):
+    """Apply animations to characters for many pairs in one job.
+
+    Every character and animation is read once however many pairs use it,
+    and the results come back as a single zip with a per-item manifest.
+    """
+    user_id = current_user.get("sub")
+    
+    if len(request.items) > BATCH_RETARGET_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_RETARGET_MAX_ITEMS} pairs per batch")
+    validate_settings(request.settings)
+    
+    try:
+        pairs = [(ObjectId(item.character_id), ObjectId(item.animation_id)) for item in request.items]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid character or animation ID")
+    
+    missing = await find_inaccessible(characters_collection, {pair[0] for pair in pairs}, user_id)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Characters not found or not accessible: {', '.join(sorted(map(str, missing)))}"
+        )
+    missing = await find_inaccessible(animations_collection, {pair[1] for pair in pairs}, user_id)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Animations not found or not accessible: {', '.join(sorted(map(str, missing)))}"
+        )
+    
+    # A pair listed twice is only processed once
+    unique_pairs = list(dict.fromkeys((str(character_id), str(animation_id)) for character_id, animation_id in pairs))
+    job = await create_batch_job(user_id, unique_pairs, request.settings)
+    
+    priority = get_job_priority(user.get("subscription"))
+    try:
+        await enqueue_job("batch_retarget", str(job["_id"]), priority)
+    except Exception as e:
+        await update_job(str(job["_id"]), {"status": "failed", "error": str(e)})
+        raise HTTPException(status_code=503, detail="Processing queue unavailable")
+    
+    return batch_job_to_response(job)
+
+@router.get("/batch/{job_id}", response_model=BatchJobResponse)
+async def get_batch_status(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a batch's progress and the status of each pair"""
+    try:
+        job = await processing_jobs_collection.find_one({
+            "_id": ObjectId(job_id),
+            "user_id": ObjectId(current_user.get("sub")),
+            "kind": "batch_retarget"
+        })
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return batch_job_to_response(job)
+
 @router.get("/status/{job_id}", response_model=ProcessingJobResponse)
 async def get_processing_status(
     job_id: str,
@@ -85,30 +223,107 @@ async def get_processing_status(
     user_id = current_user.get("sub")
     
     try:
-        job = await processing_jobs_collection.find_one({
-            "_id": ObjectId(job_id),
-            "user_id": ObjectId(user_id)
-        })
-        
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found or access denied")
-        
-        return ProcessingJobResponse(
-            id=str(job["_id"]),
-            character_id=str(job["character_id"]),
-            animation_id=str(job["animation_id"]),
-            user_id=str(job["user_id"]),
-            status=job["status"],
-            progress=job["progress"],
-            result_file=job.get("result_file"),
-            error=job.get("error"),
-            settings=job.get("settings", {}),
-            created_at=job["created_at"],
-            updated_at=job["updated_at"]
-        )
+        job_object_id = ObjectId(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
     
-    except Exception as e:
+    job = await processing_jobs_collection.find_one({
+        "_id": job_object_id,
+        "user_id": ObjectId(user_id)
+    })
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or access denied")
+    
+    # Batch and import jobs have no single character/animation pair
+    return ProcessingJobResponse(
+        id=str(job["_id"]),
+        kind=job.get("kind", "retarget"),
+        character_id=str(job["character_id"]) if job.get("character_id") else None,
+        animation_id=str(job["animation_id"]) if job.get("animation_id") else None,
+        user_id=str(job["user_id"]),
+        status=job["status"],
+        progress=job.get("progress", 0),
+        result_file=job.get("result_file"),
+        cached=job.get("cached", False),
+        error=job.get("error"),
+        settings=job.get("settings", {}),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
+
+def job_to_summary(job: dict) -> ProcessingJobSummary:
+    """Convert a job document of any kind to a listing row"""
+    return ProcessingJobSummary(
+        id=str(job["_id"]),
+        kind=job.get("kind", "retarget"),
+        status=job["status"],
+        progress=job.get("progress", 0),
+        character_id=str(job["character_id"]) if job.get("character_id") else None,
+        animation_id=str(job["animation_id"]) if job.get("animation_id") else None,
+        result_file=job.get("result_file"),
+        cached=job.get("cached", False),
+        error=job.get("error"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        expires_at=job.get("expires_at")
+    )
+
+# Fields a listing row needs; import jobs carry large per-item state that isn't loaded
+JOB_SUMMARY_PROJECTION = {
+    field: 1 for field in (
+        "kind", "status", "progress", "character_id", "animation_id", "result_file",
+        "cached", "error", "created_at", "updated_at", "expires_at"
+    )
+}
+
+@router.get("/jobs", response_model=ProcessingJobList)
+async def list_processing_jobs(
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_user: dict = Depends(get_current_user)
+):
+    """List the user's jobs, newest first, a cursor page at a time"""
+    query = {"user_id": ObjectId(current_user.get("sub"))}
+    if status_filter:
+        query["status"] = status_filter
+    
+    documents, next_cursor = await fetch_page(
+        processing_jobs_collection, query, 1, page_size, cursor, JOB_SUMMARY_PROJECTION
+    )
+    
+    return ProcessingJobList(
+        jobs=[job_to_summary(job) for job in documents],
+        page_size=page_size,
+        next_cursor=next_cursor
+    )
+
+@router.post("/cancel/{job_id}", response_model=ProcessingJobSummary)
+async def cancel_processing_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Cancel a pending or running job.
+
+    Running work stops at once with the local queue, or at the handler's next
+    checkpoint on Celery workers. Items a cancelled import already created are kept.
+    """
+    try:
+        job_object_id = ObjectId(job_id)
+    except Exception:
         raise HTTPException(status_code=400, detail="Invalid job ID")
+    
+    job = await cancel_job(str(job_object_id), current_user.get("sub"))
+    if job:
+        return job_to_summary(job)
+    
+    existing = await processing_jobs_collection.find_one(
+        {"_id": job_object_id, "user_id": ObjectId(current_user.get("sub"))}, {"status": 1}
+    )
+    if not existing:
+        raise HTTPException(status_code=404, detail="Job not found or access denied")
+    raise HTTPException(status_code=409, detail=f"Job is already {existing['status']}")
 
 @router.post("/download")
 async def download_processed_character(
@@ -139,7 +354,7 @@ async def download_processed_character(
         
         return {
             "download_url": download_url,
-            "filename": f"character_animated_{job_id}.fbx",
+            "filename": f"batch_{job_id}.zip" if job.get("kind") == "batch_retarget" else f"character_animated_{job_id}.fbx",
             "expires_in": 3600  # 1 hour
         }
     
@@ -192,48 +407,96 @@ async def get_animation_preview(
     
     return preview_data
 
-# Helper function to simulate processing
-async def simulate_processing(job_id: str):
-    """Simulate background processing (replace with real Celery task)"""
-    import asyncio
-    
-    # Update job status to processing
-    await processing_jobs_collection.update_one(
-        {"_id": ObjectId(job_id)},
-        {
-            "$set": {
-                "status": "processing",
-                "progress": 10,
-                "updated_at": datetime.utcnow()
-            }
-        }
+def format_sse(event: dict) -> str:
+    """Encode a job event as a Server-Sent Event"""
+    return f"event: job\ndata: {json.dumps(event)}\n\n"
+
+async def stream_job_events(request: Request, subscription, initial_event: Optional[dict] = None):
+    """Relay events from an open subscription as SSE until the client leaves.
+
+    Streams for a single job end once it reaches a terminal status.
+    """
+    single_job = initial_event is not None
+    try:
+        if initial_event:
+            yield format_sse(initial_event)
+            if initial_event["status"] in TERMINAL_STATUSES:
+                return
+        
+        while not await request.is_disconnected():
+            event = await subscription.get(timeout=EVENT_STREAM_KEEPALIVE)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            
+            yield format_sse(event)
+            if single_job and event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        subscription.close()
+
+def event_stream_response(generator) -> StreamingResponse:
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
+
+@router.get("/events")
+async def stream_user_job_events(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream progress of all the user's jobs as Server-Sent Events"""
+    subscription = job_event_bus.subscribe_user(current_user.get("sub")).open()
+    return event_stream_response(stream_job_events(request, subscription))
+
+@router.get("/events/{job_id}")
+async def stream_job_progress(
+    job_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream progress of one job as Server-Sent Events, starting with its current state"""
+    user_id = current_user.get("sub")
     
-    # Simulate processing time
-    await asyncio.sleep(2)
-    
-    # Update progress
-    await processing_jobs_collection.update_one(
-        {"_id": ObjectId(job_id)},
-        {
-            "$set": {
-                "progress": 50,
-                "updated_at": datetime.utcnow()
-            }
-        }
-    )
+    try:
+        job_object_id = ObjectId(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
     
-    await asyncio.sleep(2)
-    
-    # Complete the job
-    await processing_jobs_collection.update_one(
-        {"_id": ObjectId(job_id)},
-        {
-            "$set": {
-                "status": "completed",
-                "progress": 100,
-                "result_file": f"processed/character_animated_{job_id}.fbx",
-                "updated_at": datetime.utcnow()
-            }
-        }
-    )
\ No newline at end of file
+    # Subscribe before reading so no update between the read and the stream is lost
+    subscription = job_event_bus.subscribe_job(job_id).open()
+    
+    job = await processing_jobs_collection.find_one({
+        "_id": job_object_id,
+        "user_id": ObjectId(user_id)
+    })
+    
+    if not job:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="Job not found or access denied")
+    
+    return event_stream_response(stream_job_events(request, subscription, build_job_event(job)))
+
+@router.websocket("/ws")
+async def job_events_websocket(websocket: WebSocket, token: str):
+    """Push progress of all the user's jobs over a WebSocket (token as query parameter)"""
+    try:
+        user_id = (await authenticate_token(token)).get("sub")
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    
+    async with job_event_bus.subscribe_user(user_id) as subscription:
+        try:
+            while True:
+                event = await subscription.get(timeout=EVENT_STREAM_KEEPALIVE)
+                if event is None:
+                    await websocket.send_json({"type": "keepalive"})
+                else:
+                    await websocket.send_json({"type": "job", "data": event})
+        except WebSocketDisconnect:
+            pass
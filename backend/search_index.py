@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import math
+import os
+import re
+from typing import Dict, List, Optional, Set
+from database import characters_collection, animations_collection
+
+# Search index configuration
+SEARCH_INDEX_REFRESH_INTERVAL = int(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", "600"))  # seconds
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_LENGTH = 12  # longer prefixes are narrowed from this one
+MAX_PREFIX_EXPANSIONS = 50  # most common completions considered per prefix
+FUZZY_MIN_LENGTH = 4  # shorter words must match exactly
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric words"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def deletion_variants(term: str) -> Set[str]:
+    """The term with each single character removed"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Whether two words differ by one insertion, deletion, substitution or transposition"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diffs = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    for i in range(len(longer)):
+        if longer[:i] + longer[i + 1:] == shorter:
+            return True
+    return False
+
+class SearchIndex:
+    """In-process inverted index over one collection's names, tags and descriptions.
+
+    Ranks with BM25 over field-weighted term frequencies. The last query word
+    also matches as a prefix (autocomplete) and words that don't exist match
+    indexed words one typo away. All lookups are dictionary accesses; the
+    index is kept current by the routes and rebuilt periodically to pick up
+    writes made by other processes.
+    """
+
+    def __init__(self, collection_name: str, facet_field: str):
+        self.collection_name = collection_name
+        self.facet_field = facet_field
+        self._clear()
+        # Writes made while a rebuild is reading the collection, replayed onto its result
+        self._changes_during_rebuild: Optional[Dict[str, Optional[dict]]] = None
+
+    def _clear(self) -> None:
+        self._documents: Dict[str, dict] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._prefixes: Dict[str, Set[str]] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, document: dict) -> None:
+        """Index a document, replacing any previous version of it"""
+        doc_id = str(document["_id"])
+        if self._changes_during_rebuild is not None:
+            self._changes_during_rebuild[doc_id] = document
+        self._remove(doc_id)
+
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = document.get(field) or ""
+            text = " ".join(value) if isinstance(value, list) else value
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0.0) + weight
+
+        self._documents[doc_id] = {
+            "name": document.get("name", ""),
+            "facet": document.get(self.facet_field),
+            "thumbnail": document.get("thumbnail"),
+            "is_public": document.get("is_public", True),
+            "owner": str(document.get("uploaded_by", "")),
+            "terms": terms,
+            "length": sum(terms.values())
+        }
+        self._total_length += self._documents[doc_id]["length"]
+
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._add_term(term)
+            postings[doc_id] = frequency
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document from the index"""
+        doc_id = str(doc_id)
+        if self._changes_during_rebuild is not None:
+            self._changes_during_rebuild[doc_id] = None
+        self._remove(doc_id)
+
+    def _remove(self, doc_id: str) -> None:
+        entry = self._documents.pop(doc_id, None)
+        if entry is None:
+            return
+
+        self._total_length -= entry["length"]
+        for term in entry["terms"]:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._remove_term(term)
+
+    def _add_term(self, term: str) -> None:
+        for length in range(1, min(len(term), MAX_PREFIX_LENGTH) + 1):
+            self._prefixes.setdefault(term[:length], set()).add(term)
+        if len(term) >= FUZZY_MIN_LENGTH:
+            for variant in deletion_variants(term) | {term}:
+                self._deletes.setdefault(variant, set()).add(term)
+
+    def _remove_term(self, term: str) -> None:
+        for length in range(1, min(len(term), MAX_PREFIX_LENGTH) + 1):
+            self._discard(self._prefixes, term[:length], term)
+        if len(term) >= FUZZY_MIN_LENGTH:
+            for variant in deletion_variants(term) | {term}:
+                self._discard(self._deletes, variant, term)
+
+    @staticmethod
+    def _discard(mapping: Dict[str, Set[str]], key: str, term: str) -> None:
+        terms = mapping.get(key)
+        if terms is not None:
+            terms.discard(term)
+            if not terms:
+                del mapping[key]
+
+    def _expand(self, word: str, as_prefix: bool) -> Dict[str, float]:
+        """Indexed terms a query word matches, with how strongly"""
+        expansions: Dict[str, float] = {}
+        if word in self._postings:
+            expansions[word] = 1.0
+
+        if as_prefix:
+            completions = self._prefixes.get(word[:MAX_PREFIX_LENGTH], set())
+            if len(word) > MAX_PREFIX_LENGTH:
+                completions = {term for term in completions if term.startswith(word)}
+            completions = heapq.nlargest(
+                MAX_PREFIX_EXPANSIONS, completions, key=lambda term: len(self._postings[term])
+            )
+            for term in completions:
+                if term != word:
+                    # Completions closer to what was typed rank higher
+                    expansions[term] = PREFIX_WEIGHT * (0.5 + 0.5 * len(word) / len(term))
+
+        if not expansions and len(word) >= FUZZY_MIN_LENGTH:
+            candidates = set()
+            for variant in deletion_variants(word) | {word}:
+                candidates |= self._deletes.get(variant, set())
+            for term in candidates:
+                if within_one_edit(word, term):
+                    expansions[term] = FUZZY_WEIGHT
+
+        return expansions
+
+    def search(self, text: str, user_id: Optional[str] = None, limit: int = 10, prefix: bool = True) -> List[dict]:
+        """Best matches visible to a user: public documents and the user's own.
+
+        Every query word must match; the last one may be incomplete when
+        ``prefix`` is set.
+        """
+        words = tokenize(text)
+        if not words or not self._documents:
+            return []
+
+        document_count = len(self._documents)
+        average_length = self._total_length / document_count or 1.0
+        scores: Optional[Dict[str, float]] = None
+
+        for position, word in enumerate(words):
+            word_scores: Dict[str, float] = {}
+            for term, weight in self._expand(word, prefix and position == len(words) - 1).items():
+                postings = self._postings[term]
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    if scores is not None and doc_id not in scores:
+                        continue
+                    length = self._documents[doc_id]["length"]
+                    score = weight * idf * frequency * (BM25_K1 + 1) / (
+                        frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    )
+                    # A word counts once per document, through its best matching term
+                    if score > word_scores.get(doc_id, 0.0):
+                        word_scores[doc_id] = score
+
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in word_scores.items()}
+            if not scores:
+                return []
+
+        visible = (
+            (doc_id, score) for doc_id, score in scores.items()
+            if self._documents[doc_id]["is_public"] or self._documents[doc_id]["owner"] == user_id
+        )
+        return [
+            {**self._documents[doc_id], "id": doc_id, "score": score}
+            for doc_id, score in heapq.nlargest(limit, visible, key=lambda item: item[1])
+        ]
+
+    async def rebuild(self, collection) -> int:
+        """Replace the index with the current contents of the collection.
+
+        The old index keeps serving while the collection is read.
+        """
+        changes: Dict[str, Optional[dict]] = {}
+        self._changes_during_rebuild = changes
+
+        fresh = SearchIndex(self.collection_name, self.facet_field)
+        try:
+            projection = {field: 1 for field in FIELD_WEIGHTS}
+            projection.update({self.facet_field: 1, "thumbnail": 1, "is_public": 1, "uploaded_by": 1})
+            async for document in collection.find({}, projection):
+                fresh.add(document)
+                # Stay responsive while indexing large collections
+                if len(fresh) % 1000 == 0:
+                    await asyncio.sleep(0)
+        finally:
+            self._changes_during_rebuild = None
+
+        for doc_id, document in changes.items():
+            if document is None:
+                fresh.remove(doc_id)
+            else:
+                fresh.add(document)
+
+        # No await since the replay, so nothing was written in between
+        self._documents, self._postings, self._prefixes = fresh._documents, fresh._postings, fresh._prefixes
+        self._deletes, self._total_length = fresh._deletes, fresh._total_length
+        return len(self)
+
+character_search_index = SearchIndex("characters", "type")
+animation_search_index = SearchIndex("animations", "category")
+
+async def rebuild_search_indexes() -> None:
+    """Rebuild both search indexes from the database"""
+    await character_search_index.rebuild(characters_collection)
+    await animation_search_index.rebuild(animations_collection)
+
+async def run_search_index_refresher() -> None:
+    """Rebuild the search indexes at startup and then periodically"""
+    while True:
+        try:
+            await rebuild_search_indexes()
+            print(
+                f"Search indexes rebuilt: {len(character_search_index)} characters, "
+                f"{len(animation_search_index)} animations"
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error rebuilding search indexes: {e}")
+        await asyncio.sleep(SEARCH_INDEX_REFRESH_INTERVAL)
@@ -1,9 +1,10 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+import asyncio
 import logging
+import os
 from pathlib import Path
 from pydantic import BaseModel, Field
 import uuid
@@ -14,7 +15,19 @@ from routes.auth_routes import router as auth_router
 from routes.character_routes import router as character_router
 from routes.animation_routes import router as animation_router
 from routes.processing_routes import router as processing_router
-from database import init_database, close_database
+from routes.import_routes import router as import_router
+from database import db, init_database, close_database
+from indexes import report_query_plans
+from search_index import run_search_index_refresher
+from job_queue import start_job_queue, stop_job_queue
+from job_events import job_event_bus
+from upload_sessions import run_upload_session_sweeper
+from job_cleanup import run_job_sweeper
+from file_index import file_index, LEGACY_INDEX_PATH
+from file_responses import build_file_response
+from thumbnail_renderer import shutdown_render_pool
+from auth import password_hasher
+from storage import storage_executor, run_storage, stat_file, remove_file, shutdown_storage_executor
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -48,36 +61,42 @@ async def root():
 
 @api_router.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow(),
+        "password_hashing": password_hasher.stats(),
+        "storage": storage_executor.stats()
+    }
 
 # File serving endpoint
-@api_router.get("/files/{filename}")
-async def get_file(filename: str):
+@api_router.api_route("/files/{filename}", methods=["GET", "HEAD"])
+async def get_file(filename: str, request: Request):
     """Serve uploaded files"""
-    file_path = Path("uploads") / filename
+    file_path = file_index.lookup(filename)
+    stat_result = None
+    if file_path:
+        stat_result = await stat_file(file_path)
+        if stat_result is None:
+            # Removed behind the index's back
+            file_index.unregister(file_path)
     
-    # Check in subdirectories
-    for subdir in ["characters", "animations", "thumbnails", "processed"]:
-        potential_path = Path("uploads") / subdir / filename
-        if potential_path.exists():
-            return FileResponse(
-                potential_path,
-                headers={"Content-Disposition": f"inline; filename={filename}"}
-            )
+    # Files the index doesn't know yet (e.g. written by another process)
+    if stat_result is None:
+        file_path = await run_storage(file_index.probe, filename)
+        if file_path:
+            stat_result = await stat_file(file_path)
+        if stat_result is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        file_index.register(file_path)
     
-    if file_path.exists():
-        return FileResponse(
-            file_path,
-            headers={"Content-Disposition": f"inline; filename={filename}"}
-        )
-    
-    raise HTTPException(status_code=404, detail="File not found")
+    return build_file_response(request, file_path, filename, stat_result)
 
 # Include all routers
 api_router.include_router(auth_router)
 api_router.include_router(character_router)
 api_router.include_router(animation_router)
 api_router.include_router(processing_router)
+api_router.include_router(import_router)
 
 # Include the main router in the app
 app.include_router(api_router)
@@ -100,14 +119,48 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Background maintenance tasks started with the app
+background_tasks = []
+
+async def rebuild_file_index():
+    """Serve from the persisted file index while a fresh one is built"""
+    try:
+        # Older snapshots sat inside uploads/ where they could be downloaded
+        await remove_file(LEGACY_INDEX_PATH)
+        if await run_storage(file_index.load):
+            logger.info(f"Loaded file index with {len(file_index)} entries")
+        count = await run_storage(file_index.rebuild)
+        await run_storage(file_index.save)
+        logger.info(f"Rebuilt file index with {count} entries")
+    except Exception as e:
+        logger.error(f"Error rebuilding file index: {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     await init_database()
+    await start_job_queue()
+    await job_event_bus.start()
+    background_tasks.append(asyncio.create_task(run_upload_session_sweeper()))
+    background_tasks.append(asyncio.create_task(run_job_sweeper()))
+    background_tasks.append(asyncio.create_task(rebuild_file_index()))
+    background_tasks.append(asyncio.create_task(report_query_plans(db)))
+    background_tasks.append(asyncio.create_task(run_search_index_refresher()))
     logger.info("Mixamo Clone API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
+    for task in background_tasks:
+        task.cancel()
+    await stop_job_queue()
+    await job_event_bus.stop()
+    shutdown_render_pool()
+    password_hasher.shutdown()
+    try:
+        file_index.save()
+    except Exception as e:
+        logger.error(f"Error saving file index: {e}")
     await close_database()
+    shutdown_storage_executor()
     logger.info("Mixamo Clone API shut down")
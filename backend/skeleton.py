@@ -0,0 +1,73 @@
+import json
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from model_metadata import read_glb
+
+# Rig namespaces ("mixamorig:Hips") and separators don't change which bone a name refers to
+BONE_NAMESPACE = re.compile(r"^.*[:|]")
+BONE_SEPARATORS = re.compile(r"[^a-z0-9]")
+
+def read_skeleton(file_path: str) -> Optional[List[str]]:
+    """Joint names of a model's skins, or None for formats that aren't supported (FBX, DAE).
+
+    Only the glTF JSON is parsed; vertex data is never touched. OBJ files
+    have no skeleton. This reads the file; call it from an executor.
+    """
+    extension = Path(file_path).suffix.lower()
+    if os.path.getsize(file_path) == 0:
+        return None
+
+    if extension == ".glb":
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            gltf, binary = read_glb(mm)
+            if binary is not None:
+                binary.release()
+    elif extension == ".gltf":
+        with open(file_path, "rb") as f:
+            gltf = json.load(f)
+    elif extension == ".obj":
+        return []
+    else:
+        return None
+
+    nodes = gltf.get("nodes", [])
+    joints = sorted({joint for skin in gltf.get("skins", []) for joint in skin.get("joints", [])})
+    return [nodes[joint].get("name") or f"joint_{joint}" for joint in joints if joint < len(nodes)]
+
+def normalize_bone_name(name: str) -> str:
+    """Name a bone is matched by across rigs"""
+    return BONE_SEPARATORS.sub("", BONE_NAMESPACE.sub("", name).lower())
+
+def match_bones(character_bones: List[str], animation_bones: List[str]) -> Dict[str, str]:
+    """Animation bone -> character bone, for bones both skeletons have"""
+    character_by_name = {normalize_bone_name(bone): bone for bone in character_bones}
+    return {
+        bone: character_by_name[normalize_bone_name(bone)]
+        for bone in animation_bones
+        if normalize_bone_name(bone) in character_by_name
+    }
+
+def retarget_pair(
+    character_bones: Optional[List[str]],
+    animation_bones: Optional[List[str]],
+    settings: Dict[str, Any]
+) -> dict:
+    """Map an animation onto a character's skeleton (the export is simulated until a real retargeter exists).
+
+    Takes skeletons parsed once by read_skeleton so a batch never re-reads a
+    source file per pair. Skeletons of unsupported formats (None) are not checked.
+    Runs in the render pool.
+    """
+    if character_bones is None or animation_bones is None:
+        return {"matched_bones": None}
+
+    if not character_bones:
+        raise ValueError("Character has no skeleton")
+
+    mapping = match_bones(character_bones, animation_bones)
+    if animation_bones and not mapping:
+        raise ValueError("Animation and character skeletons have no bones in common")
+    return {"matched_bones": len(mapping)}
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Union
+import aiofiles
+
+# Storage executor configuration
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "8"))
+SLOW_STORAGE_CALL_MS = float(os.getenv("SLOW_STORAGE_CALL_MS", "500"))  # logged when a call takes longer
+
+PathLike = Union[str, Path]
+
+def get_operation_name(function) -> str:
+    """Name a submitted call is accounted under (aiofiles submits partials of file methods)"""
+    function = getattr(function, "func", function)
+    return getattr(function, "__name__", "call")
+
+class StorageExecutor(ThreadPoolExecutor):
+    """Thread pool for blocking filesystem and image work.
+
+    Every call records how long it waited for a worker and how long it ran,
+    per operation, so time that would otherwise have stalled the event loop
+    is visible in GET /api/health.
+    """
+
+    def __init__(self, max_workers: int = STORAGE_WORKERS):
+        super().__init__(max_workers=max_workers, thread_name_prefix="storage")
+        self.workers = max_workers
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, float]] = {}
+
+    def submit(self, fn, /, *args, **kwargs):
+        operation = get_operation_name(fn)
+        submitted_at = time.monotonic()
+
+        def timed_call():
+            started_at = time.monotonic()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record(operation, started_at - submitted_at, time.monotonic() - started_at)
+
+        with self._lock:
+            self.in_flight += 1
+        future = super().submit(timed_call)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _record(self, operation: str, wait: float, duration: float) -> None:
+        with self._lock:
+            stats = self._operations.setdefault(
+                operation, {"calls": 0, "wait": 0.0, "busy": 0.0, "max": 0.0}
+            )
+            stats["calls"] += 1
+            stats["wait"] += wait
+            stats["busy"] += duration
+            stats["max"] = max(stats["max"], wait + duration)
+
+        if (wait + duration) * 1000 >= SLOW_STORAGE_CALL_MS:
+            print(f"Slow storage call: {operation} took {duration * 1000:.0f}ms after waiting {wait * 1000:.0f}ms")
+
+    def stats(self) -> dict:
+        """Queue depth and per-operation call counts and times, for monitoring"""
+        with self._lock:
+            operations = {
+                operation: {
+                    "calls": int(stats["calls"]),
+                    "wait_ms": round(stats["wait"] * 1000, 1),
+                    "busy_ms": round(stats["busy"] * 1000, 1),
+                    "max_ms": round(stats["max"] * 1000, 1)
+                }
+                for operation, stats in self._operations.items()
+            }
+            return {
+                "workers": self.workers,
+                "running": min(self.in_flight, self.workers),
+                "queued": max(0, self.in_flight - self.workers),
+                "operations": operations
+            }
+
+storage_executor = StorageExecutor()
+
+async def run_storage(function, *args):
+    """Run a blocking filesystem or image function on the storage executor"""
+    return await asyncio.get_running_loop().run_in_executor(storage_executor, function, *args)
+
+def open_file(file_path: PathLike, mode: str = "rb"):
+    """aiofiles handle whose reads and writes run on the storage executor"""
+    return aiofiles.open(file_path, mode, executor=storage_executor)
+
+def stat_or_none(file_path: PathLike) -> Optional[os.stat_result]:
+    try:
+        return os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+def remove_if_exists(file_path: PathLike) -> bool:
+    try:
+        os.remove(file_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def make_directory(directory: PathLike) -> None:
+    Path(directory).mkdir(parents=True, exist_ok=True)
+
+def remove_tree(directory: PathLike) -> None:
+    shutil.rmtree(directory, ignore_errors=True)
+
+async def stat_file(file_path: PathLike) -> Optional[os.stat_result]:
+    """os.stat of a file, or None if it doesn't exist"""
+    return await run_storage(stat_or_none, file_path)
+
+async def remove_file(file_path: PathLike) -> bool:
+    """Delete a file; False if it was already gone"""
+    return await run_storage(remove_if_exists, file_path)
+
+async def replace_file(source: PathLike, destination: PathLike) -> None:
+    """Atomically move a file into place"""
+    await run_storage(os.replace, source, destination)
+
+async def create_directory(directory: PathLike) -> None:
+    """Create a directory and its parents if missing"""
+    await run_storage(make_directory, directory)
+
+async def delete_directory(directory: PathLike) -> None:
+    """Remove a directory tree, ignoring errors"""
+    await run_storage(remove_tree, directory)
+
+def shutdown_storage_executor() -> None:
+    """Stop the storage worker threads once queued calls finish"""
+    storage_executor.shutdown(wait=True)
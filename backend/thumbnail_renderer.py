@@ -0,0 +1,493 @@
+import asyncio
+import io
+import json
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+import numpy as np
+from PIL import Image
+from model_metadata import (
+    MODE_TRIANGLES, MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN,
+    extract_model_metadata, read_glb, load_gltf_buffer, read_accessor, mesh_instances,
+    iter_obj_blocks, split_obj_lines, is_obj_keyword_line, obj_vertex_coordinates
+)
+
+# Thumbnail rendering configuration
+THUMBNAIL_SIZE = 300
+THUMBNAIL_SUPERSAMPLE = 2  # rendered larger and downscaled for anti-aliasing
+THUMBNAIL_MAX_TRIANGLES = int(os.getenv("THUMBNAIL_MAX_TRIANGLES", "100000"))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_JPEG_QUALITY = 85
+RASTER_BATCH_PIXELS = 2 * 1024 * 1024  # candidate pixels tested per batch
+THUMBNAIL_MAX_RASTER_PIXELS = int(os.getenv("THUMBNAIL_MAX_RASTER_PIXELS", str(64 * 1024 * 1024)))  # per render
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "60"))  # seconds a render pool call may run
+
+BACKGROUND_COLOR = np.array([211, 211, 211], dtype=np.float32)  # lightgray
+MODEL_COLOR = np.array([176, 190, 212], dtype=np.float32)
+AMBIENT_LIGHT = 0.25
+LIGHT_DIRECTION = np.array([0.4, 0.6, 0.7]) / np.linalg.norm([0.4, 0.6, 0.7])
+FRAME_FILL = 0.9  # fraction of the image the model spans
+
+def rotation_matrix(yaw_degrees: float, pitch_degrees: float) -> np.ndarray:
+    """Camera rotation: turn around Y, then tilt around X"""
+    yaw, pitch = np.radians(yaw_degrees), np.radians(pitch_degrees)
+    turn = np.array([
+        [np.cos(yaw), 0, np.sin(yaw)],
+        [0, 1, 0],
+        [-np.sin(yaw), 0, np.cos(yaw)]
+    ])
+    tilt = np.array([
+        [1, 0, 0],
+        [0, np.cos(pitch), -np.sin(pitch)],
+        [0, np.sin(pitch), np.cos(pitch)]
+    ])
+    return tilt @ turn
+
+# Three-quarter view from slightly above, Y up
+VIEW_ROTATION = rotation_matrix(-30, 15)
+
+# Mesh loading
+
+def triangulate_indices(indices: np.ndarray, mode: int) -> np.ndarray:
+    """(n, 3) triangles drawn by a glTF index list"""
+    if mode == MODE_TRIANGLES:
+        return indices[:len(indices) // 3 * 3].reshape(-1, 3)
+    if len(indices) < 3:
+        return np.empty((0, 3), dtype=np.int64)
+    if mode == MODE_TRIANGLE_STRIP:
+        return np.stack([indices[:-2], indices[1:-1], indices[2:]], axis=1)
+    return np.stack([np.full(len(indices) - 2, indices[0]), indices[1:-1], indices[2:]], axis=1)
+
+def gltf_mesh_arrays(gltf: dict, get_buffer) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """World-space vertices and triangles of every mesh in the default scene"""
+    accessors = gltf.get("accessors", [])
+    meshes = gltf.get("meshes", [])
+    cache = {}
+    vertex_parts = []
+    face_parts = []
+    vertex_count = 0
+
+    for mesh_index, world in mesh_instances(gltf):
+        if mesh_index >= len(meshes):
+            continue
+
+        for primitive in meshes[mesh_index].get("primitives", []):
+            mode = primitive.get("mode", MODE_TRIANGLES)
+            position_index = primitive.get("attributes", {}).get("POSITION")
+            if position_index is None or mode not in (MODE_TRIANGLES, MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN):
+                continue
+
+            positions = read_accessor(gltf, accessors[position_index], get_buffer, cache)
+            if positions is None or positions.shape[1] != 3 or positions.dtype.kind != "f":
+                continue
+
+            if "indices" in primitive:
+                indices = read_accessor(gltf, accessors[primitive["indices"]], get_buffer, cache)
+                if indices is None:
+                    continue
+                indices = indices.ravel().astype(np.int64)
+            else:
+                indices = np.arange(len(positions), dtype=np.int64)
+
+            faces = triangulate_indices(indices, mode)
+            faces = faces[(faces < len(positions)).all(axis=1)]
+
+            # Copies, so nothing keeps a view of the mapped file alive
+            vertex_parts.append(positions.astype(np.float32) @ world[:3, :3].T.astype(np.float32) + world[:3, 3].astype(np.float32))
+            face_parts.append(faces + vertex_count)
+            vertex_count += len(positions)
+
+    if not face_parts:
+        return None
+
+    return np.concatenate(vertex_parts), np.concatenate(face_parts)
+
+def obj_face_indices(
+    block: np.ndarray,
+    starts: np.ndarray,
+    line_lengths: np.ndarray,
+    face_lines: np.ndarray,
+    tokens: np.ndarray
+) -> Optional[np.ndarray]:
+    """Vertex index of every face corner in a block, None if malformed"""
+    # Keep only the bytes of face lines and blank out the "f" keyword
+    text = block.copy()
+    text[starts[face_lines]] = ord(" ")
+    selected = text[np.repeat(face_lines, line_lengths)]
+
+    # "v/vt/vn" corners: blank everything from the first slash to the end of the token
+    slashes = selected == ord("/")
+    if slashes.any():
+        is_token = selected > ord(" ")
+        positions = np.arange(len(selected), dtype=np.int32)
+        token_begin = is_token.copy()
+        token_begin[1:] &= ~is_token[:-1]
+        latest_token = np.maximum.accumulate(np.where(token_begin, positions, 0))
+        latest_slash = np.maximum.accumulate(np.where(slashes, positions, -1))
+        selected[is_token & (latest_slash >= latest_token)] = ord(" ")
+
+    values = np.fromstring(selected.tobytes(), dtype=np.int64, sep=" ")
+    if len(values) != (tokens - 1).sum():
+        return None
+
+    return values
+
+def fan_triangles(corner_counts: np.ndarray) -> np.ndarray:
+    """Triangle fan offsets into a flat corner list for polygons of the given sizes"""
+    triangle_counts = np.maximum(corner_counts - 2, 0)
+    first_corner = np.cumsum(corner_counts) - corner_counts
+    polygon = np.repeat(np.arange(len(corner_counts)), triangle_counts)
+    step = np.arange(triangle_counts.sum()) - np.repeat(np.cumsum(triangle_counts) - triangle_counts, triangle_counts)
+    base = first_corner[polygon]
+    return np.stack([base, base + step + 1, base + step + 2], axis=1)
+
+def obj_mesh_arrays(mm: mmap.mmap) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Vertices and triangles of a Wavefront OBJ file"""
+    vertex_parts = []
+    face_parts = []
+    vertex_count = 0
+
+    for block in iter_obj_blocks(mm):
+        starts, line_lengths, first, second, tokens = split_obj_lines(block)
+        vertex_lines = is_obj_keyword_line(first, second, "v")
+        face_lines = is_obj_keyword_line(first, second, "f")
+
+        coordinates = obj_vertex_coordinates(block, starts, line_lengths, vertex_lines, tokens[vertex_lines])
+        if coordinates is None:
+            return None
+
+        if face_lines.any():
+            corners = obj_face_indices(block, starts, line_lengths, face_lines, tokens[face_lines])
+            if corners is None:
+                return None
+
+            # Negative indices count back from the last vertex defined before the face
+            vertices_before = vertex_count + np.cumsum(vertex_lines)[face_lines]
+            corner_counts = tokens[face_lines] - 1
+            corners = np.where(corners < 0, np.repeat(vertices_before, corner_counts) + corners, corners - 1)
+            face_parts.append(corners[fan_triangles(corner_counts)])
+
+        vertex_parts.append(coordinates.astype(np.float32))
+        vertex_count += len(coordinates)
+
+    if not face_parts or vertex_count == 0:
+        return None
+
+    vertices = np.concatenate(vertex_parts)
+    faces = np.concatenate(face_parts)
+    return vertices, faces[((faces >= 0) & (faces < vertex_count)).all(axis=1)]
+
+def load_mesh(file_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Vertices and triangles of a model file, or None if it can't be read"""
+    extension = Path(file_path).suffix.lower()
+    if os.path.getsize(file_path) == 0:
+        return None
+
+    if extension == ".glb":
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            gltf, binary = read_glb(mm)
+            try:
+                return gltf_mesh_arrays(gltf, lambda index: binary if index == 0 else None)
+            finally:
+                if binary is not None:
+                    binary.release()
+
+    if extension == ".gltf":
+        with open(file_path, "rb") as f:
+            gltf = json.load(f)
+        return gltf_mesh_arrays(gltf, lambda index: load_gltf_buffer(gltf, index))
+
+    if extension == ".obj":
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return obj_mesh_arrays(mm)
+
+    return None
+
+# Decimation
+
+def cluster_vertices(vertices: np.ndarray, faces: np.ndarray, resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge the vertices in each cell of a resolution^3 grid into their centroid"""
+    lower = vertices.min(axis=0)
+    extent = float((vertices.max(axis=0) - lower).max()) or 1.0
+    cells = np.clip(((vertices - lower) / extent * resolution).astype(np.int64), 0, resolution - 1)
+    keys = (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
+    _, cluster, cluster_sizes = np.unique(keys, return_inverse=True, return_counts=True)
+
+    centroids = np.empty((len(cluster_sizes), 3), dtype=np.float32)
+    for axis in range(3):
+        centroids[:, axis] = np.bincount(cluster, weights=vertices[:, axis]) / cluster_sizes
+
+    # Drop triangles that collapsed and duplicates of the same cluster triple
+    clustered = cluster.ravel()[faces]
+    a, b, c = clustered[:, 0], clustered[:, 1], clustered[:, 2]
+    clustered = clustered[(a != b) & (b != c) & (a != c)]
+    ordered = np.sort(clustered, axis=1)
+    count = len(centroids)
+    _, unique = np.unique((ordered[:, 0] * count + ordered[:, 1]) * count + ordered[:, 2], return_index=True)
+
+    return centroids, clustered[np.sort(unique)]
+
+def decimate_mesh(vertices: np.ndarray, faces: np.ndarray, max_triangles: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce a mesh to at most ``max_triangles`` by vertex clustering"""
+    if len(faces) <= max_triangles:
+        return vertices, faces
+
+    # A surface crosses roughly resolution^2 cells, each holding a couple of triangles
+    resolution = max(int(np.sqrt(max_triangles / 4)), 8)
+    while True:
+        decimated = cluster_vertices(vertices, faces, resolution)
+        if len(decimated[1]) <= max_triangles or resolution <= 8:
+            return decimated
+        # Triangle count scales with resolution^2; aim a little under the budget
+        shrink = min(np.sqrt(max_triangles / len(decimated[1])) * 0.95, 0.9)
+        resolution = max(int(resolution * shrink), 8)
+
+# Rasterization
+
+class RenderBudgetExceeded(Exception):
+    """The triangles' bounding boxes cover more pixels than a render may test"""
+
+def rasterize(
+    screen: np.ndarray,
+    depth: np.ndarray,
+    faces: np.ndarray,
+    shades: np.ndarray,
+    width: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Z-buffered scanline-free rasterization of triangles into a shade image.
+
+    Every triangle is tested against the pixels of its bounding box, in
+    batches, and the nearest fragment wins each pixel. Raises
+    RenderBudgetExceeded when that adds up to more than
+    THUMBNAIL_MAX_RASTER_PIXELS, e.g. for many long, thin triangles.
+    """
+    z_buffer = np.full(width * width, np.inf, dtype=np.float32)
+    shade_buffer = np.zeros(width * width, dtype=np.float32)
+
+    corners = screen[faces]  # (n, 3, 2)
+    x_min = np.clip(np.floor(corners[:, :, 0].min(axis=1)), 0, width).astype(np.int64)
+    x_max = np.clip(np.ceil(corners[:, :, 0].max(axis=1)), 0, width).astype(np.int64)
+    y_min = np.clip(np.floor(corners[:, :, 1].min(axis=1)), 0, width).astype(np.int64)
+    y_max = np.clip(np.ceil(corners[:, :, 1].max(axis=1)), 0, width).astype(np.int64)
+    box_widths = x_max - x_min
+    box_heights = y_max - y_min
+
+    (x0, y0), (x1, y1), (x2, y2) = corners[:, 0].T, corners[:, 1].T, corners[:, 2].T
+    area = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+    visible = np.flatnonzero((box_widths > 0) & (box_heights > 0) & (np.abs(area) > 1e-12))
+    if len(visible) == 0:
+        return z_buffer.reshape(width, width), shade_buffer.reshape(width, width)
+
+    pixel_counts = box_widths[visible] * box_heights[visible]
+    totals = np.cumsum(pixel_counts)
+    if totals[-1] > THUMBNAIL_MAX_RASTER_PIXELS:
+        raise RenderBudgetExceeded(f"{totals[-1]} candidate pixels")
+    batch_ends = np.searchsorted(totals, np.arange(RASTER_BATCH_PIXELS, totals[-1], RASTER_BATCH_PIXELS), side="right")
+    boundaries = np.unique(np.concatenate(([0], batch_ends, [len(visible)])))
+
+    for begin, end in zip(boundaries[:-1], boundaries[1:]):
+        if end <= begin:
+            continue
+        triangles = visible[begin:end]
+        counts = pixel_counts[begin:end]
+        triangle = np.repeat(triangles, counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        px = x_min[triangle] + local % box_widths[triangle]
+        py = y_min[triangle] + local // box_widths[triangle]
+
+        # Barycentric coordinates of pixel centres
+        cx = px + 0.5
+        cy = py + 0.5
+        inverse_area = 1.0 / area[triangle]
+        w0 = ((x1[triangle] - cx) * (y2[triangle] - cy) - (x2[triangle] - cx) * (y1[triangle] - cy)) * inverse_area
+        w1 = ((x2[triangle] - cx) * (y0[triangle] - cy) - (x0[triangle] - cx) * (y2[triangle] - cy)) * inverse_area
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        if not inside.any():
+            continue
+
+        triangle = triangle[inside]
+        face = faces[triangle]
+        z = (
+            w0[inside] * depth[face[:, 0]]
+            + w1[inside] * depth[face[:, 1]]
+            + w2[inside] * depth[face[:, 2]]
+        )
+        pixel = py[inside] * width + px[inside]
+
+        # Nearest fragment per pixel in this batch, then against the z-buffer
+        order = np.lexsort((z, pixel))
+        pixel, first = np.unique(pixel[order], return_index=True)
+        nearest = order[first]
+        closer = z[nearest] < z_buffer[pixel]
+        z_buffer[pixel[closer]] = z[nearest][closer]
+        shade_buffer[pixel[closer]] = shades[triangle[nearest][closer]]
+
+    return z_buffer.reshape(width, width), shade_buffer.reshape(width, width)
+
+def render_mesh(vertices: np.ndarray, faces: np.ndarray, size: int = THUMBNAIL_SIZE) -> Image.Image:
+    """Flat-shaded orthographic render of a mesh, framed to fit the image"""
+    width = size * THUMBNAIL_SUPERSAMPLE
+    center = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    view = (vertices - center) @ VIEW_ROTATION.T.astype(np.float32)
+
+    # Fit the projected silhouette to the frame; image Y grows downwards
+    extent = float(np.abs(view[:, :2]).max()) or 1.0
+    scale = width / 2 * FRAME_FILL / extent
+    screen = np.empty((len(view), 2), dtype=np.float64)
+    screen[:, 0] = width / 2 + view[:, 0] * scale
+    screen[:, 1] = width / 2 - view[:, 1] * scale
+    depth = -view[:, 2]  # camera looks down -Z; smaller is nearer
+
+    # Two-sided Lambert shading from face normals
+    a, b, c = view[faces[:, 0]], view[faces[:, 1]], view[faces[:, 2]]
+    normals = np.cross(b - a, c - a)
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1.0
+    diffuse = np.abs(normals @ LIGHT_DIRECTION.astype(np.float32)) / lengths
+    shades = (AMBIENT_LIGHT + (1 - AMBIENT_LIGHT) * diffuse).astype(np.float32)
+
+    z_buffer, shade_buffer = rasterize(screen, depth, faces, shades, width)
+
+    covered = np.isfinite(z_buffer)
+    pixels = np.empty((width, width, 3), dtype=np.float32)
+    pixels[:] = BACKGROUND_COLOR
+    pixels[covered] = shade_buffer[covered][:, None] * MODEL_COLOR
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+    return image.resize((size, size), Image.LANCZOS)
+
+def render_thumbnail(file_path: str, size: int = THUMBNAIL_SIZE, max_triangles: int = THUMBNAIL_MAX_TRIANGLES) -> Optional[bytes]:
+    """Render a model file to JPEG bytes, or None if its geometry can't be read"""
+    mesh = load_mesh(file_path)
+    if mesh is None:
+        return None
+
+    vertices, faces = decimate_mesh(*mesh, max_triangles)
+    if len(faces) == 0:
+        return None
+
+    try:
+        image = render_mesh(vertices, faces, size)
+    except RenderBudgetExceeded as e:
+        print(f"Skipping thumbnail render of {file_path}: {e}")
+        return None
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=THUMBNAIL_JPEG_QUALITY)
+    return buffer.getvalue()
+
+def describe_model(file_path: str, render: bool = True) -> Tuple[Optional[dict], Optional[bytes]]:
+    """Mesh statistics and a rendered thumbnail in one worker call"""
+    try:
+        metadata = extract_model_metadata(file_path)
+    except Exception as e:
+        print(f"Error reading model metadata: {e}")
+        metadata = None
+
+    thumbnail = None
+    if render:
+        try:
+            thumbnail = render_thumbnail(file_path)
+        except Exception as e:
+            print(f"Error rendering thumbnail: {e}")
+
+    return metadata, thumbnail
+
+# Worker processes
+
+render_pool: Optional[ProcessPoolExecutor] = None
+render_pool_calls: Dict[ProcessPoolExecutor, Set[asyncio.Future]] = {}  # in-flight calls per pool
+retired_render_pools: Dict[ProcessPoolExecutor, asyncio.Task] = {}  # pools draining after a timeout
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Process pool for rendering; created on first use"""
+    global render_pool
+    if render_pool is None:
+        # Spawned, not forked: the API process has driver and executor threads running
+        render_pool = ProcessPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return render_pool
+
+def discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Stop a pool's workers, even busy ones, and start a fresh pool next time"""
+    global render_pool
+    if render_pool is pool:
+        render_pool = None
+    render_pool_calls.pop(pool, None)
+    # The executor has no public way to stop a running call
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+async def stop_retired_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Let a retired pool's other calls finish, then stop its stuck workers"""
+    calls = render_pool_calls.get(pool)
+    if calls:
+        # Each call has its own RENDER_TIMEOUT, so this wait is bounded too
+        await asyncio.wait(set(calls), timeout=RENDER_TIMEOUT)
+    retired_render_pools.pop(pool, None)
+    discard_render_pool(pool)
+
+def retire_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Send new calls to a fresh pool and stop this one once it has drained.
+
+    Terminating the pool straight away would also fail the calls other
+    workers are still running; the executor can't say which process runs
+    which call, so the stuck worker is stopped with the pool afterwards.
+    """
+    global render_pool
+    if render_pool is pool:
+        render_pool = None
+    if pool not in retired_render_pools:
+        retired_render_pools[pool] = asyncio.get_running_loop().create_task(stop_retired_render_pool(pool))
+
+async def run_in_render_pool(function, *args):
+    """Run a rendering function in the process pool without blocking the event loop.
+
+    Calls taking longer than RENDER_TIMEOUT raise TimeoutError and their pool
+    is retired, so a pathological model can't hold a worker forever.
+    """
+    global render_pool
+    pool = get_render_pool()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(pool, function, *args)
+    calls = render_pool_calls.setdefault(pool, set())
+    calls.add(future)
+    future.add_done_callback(calls.discard)
+    try:
+        return await asyncio.wait_for(future, RENDER_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"Render pool call exceeded {RENDER_TIMEOUT}s; replacing the pool")
+        retire_render_pool(pool)
+        raise
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start a fresh pool next time
+        if render_pool is pool:
+            render_pool = None
+        raise
+
+async def render_thumbnail_async(file_path: str) -> Optional[bytes]:
+    """Render a thumbnail in the process pool"""
+    return await run_in_render_pool(render_thumbnail, file_path)
+
+async def describe_model_async(file_path: str, render: bool = True) -> Tuple[Optional[dict], Optional[bytes]]:
+    """Mesh statistics and thumbnail of a model, computed in the process pool"""
+    return await run_in_render_pool(describe_model, file_path, render)
+
+def shutdown_render_pool() -> None:
+    """Stop the rendering worker processes"""
+    global render_pool
+    if render_pool is not None:
+        render_pool.shutdown(wait=False, cancel_futures=True)
+        render_pool_calls.pop(render_pool, None)
+        render_pool = None
+    for pool, task in list(retired_render_pools.items()):
+        task.cancel()
+        discard_render_pool(pool)
+    retired_render_pools.clear()
@@ -0,0 +1,265 @@
+import asyncio
+import math
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, List, Set
+from fastapi import HTTPException, Request
+from pymongo import ReturnDocument
+from bson import ObjectId
+from database import upload_sessions_collection
+from models.upload import UploadSessionCreate, UploadSessionResponse
+from file_handler import (
+    UPLOAD_DIR, UPLOAD_CHUNK_SIZE, MAX_FILE_SIZE,
+    file_too_large_error, validate_file_extension,
+    save_file_stream, release_file
+)
+from storage import run_storage, open_file, remove_file, replace_file, create_directory, delete_directory
+
+# Resumable upload configuration
+SESSION_DIR = UPLOAD_DIR / "sessions"
+MIN_CHUNK_SIZE = 1024 * 1024  # 1MB
+MAX_CHUNK_SIZE = 32 * 1024 * 1024  # 32MB
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+SESSION_SWEEP_INTERVAL = 15 * 60  # seconds
+SESSION_ORPHAN_GRACE = timedelta(hours=1)
+
+SESSION_DIR.mkdir(exist_ok=True)
+
+def get_session_dir(session_id) -> Path:
+    """Directory holding the received chunks of a session"""
+    return SESSION_DIR / str(session_id)
+
+def get_chunk_path(session_id, index: int) -> Path:
+    """Path of a received chunk"""
+    return get_session_dir(session_id) / f"{index:06d}.chunk"
+
+def list_stale_session_dirs(cutoff: float) -> List[str]:
+    """Session directories not modified since ``cutoff`` (a timestamp)"""
+    return [
+        entry.path for entry in os.scandir(SESSION_DIR)
+        if entry.is_dir() and entry.stat().st_mtime < cutoff
+    ]
+
+def expected_chunk_size(session: dict, index: int) -> int:
+    """Number of bytes chunk ``index`` must contain"""
+    if index < session["total_chunks"] - 1:
+        return session["chunk_size"]
+    return session["total_size"] - session["chunk_size"] * (session["total_chunks"] - 1)
+
+def session_to_response(session: dict) -> UploadSessionResponse:
+    """Convert a session document to its API representation"""
+    received = sorted(session.get("received_chunks", []))
+    received_set = set(received)
+    return UploadSessionResponse(
+        id=str(session["_id"]),
+        filename=session["filename"],
+        total_size=session["total_size"],
+        chunk_size=session["chunk_size"],
+        total_chunks=session["total_chunks"],
+        received_chunks=received,
+        missing_chunks=[i for i in range(session["total_chunks"]) if i not in received_set],
+        status=session["status"],
+        expires_at=session["expires_at"],
+        created_at=session["created_at"],
+        updated_at=session["updated_at"]
+    )
+
+async def create_upload_session(
+    upload: UploadSessionCreate,
+    kind: str,
+    allowed_extensions: Set[str],
+    user_id: str
+) -> dict:
+    """Open a new resumable upload session"""
+    validate_file_extension(upload.filename, allowed_extensions)
+
+    if upload.total_size > MAX_FILE_SIZE:
+        raise file_too_large_error()
+
+    chunk_size = min(max(upload.chunk_size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+    # The hash is only checked against the uploaded bytes at commit. Known
+    # content is still uploaded: a hash alone proves nothing about possession,
+    # and the blob store deduplicates the bytes once they are verified.
+    sha256 = upload.sha256.lower() if upload.sha256 else None
+    
+    now = datetime.utcnow()
+    session = {
+        "_id": ObjectId(),
+        "user_id": ObjectId(user_id),
+        "kind": kind,
+        "filename": upload.filename,
+        "total_size": upload.total_size,
+        "chunk_size": chunk_size,
+        "total_chunks": math.ceil(upload.total_size / chunk_size),
+        "sha256": sha256,
+        "received_chunks": [],
+        "status": "open",
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": now + UPLOAD_SESSION_TTL
+    }
+
+    await upload_sessions_collection.insert_one(session)
+    await create_directory(get_session_dir(session["_id"]))
+
+    return session
+
+async def get_upload_session(session_id: str, kind: str, user_id: str) -> dict:
+    """Load a session owned by the user or raise 404"""
+    try:
+        query_id = ObjectId(session_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid upload session ID")
+
+    session = await upload_sessions_collection.find_one({
+        "_id": query_id,
+        "kind": kind,
+        "user_id": ObjectId(user_id)
+    })
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found or expired")
+
+    return session
+
+async def write_upload_chunk(session: dict, index: int, request: Request) -> dict:
+    """Stream one chunk of the request body to disk and acknowledge it"""
+    if session["status"] != "open":
+        raise HTTPException(status_code=409, detail="Upload session is already being committed")
+
+    if index < 0 or index >= session["total_chunks"]:
+        raise HTTPException(status_code=400, detail="Chunk index out of range")
+
+    expected_size = expected_chunk_size(session, index)
+    chunk_path = get_chunk_path(session["_id"], index)
+    await create_directory(chunk_path.parent)
+    # Unique temp name so parallel retries of the same chunk don't collide
+    temp_path = chunk_path.with_name(f"{chunk_path.name}.{ObjectId()}.part")
+    size = 0
+
+    try:
+        async with open_file(temp_path, 'wb') as f:
+            async for data in request.stream():
+                size += len(data)
+                if size > expected_size:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Chunk {index} must be exactly {expected_size} bytes"
+                    )
+                await f.write(data)
+
+        if size != expected_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Chunk {index} must be exactly {expected_size} bytes"
+            )
+
+        await replace_file(temp_path, chunk_path)
+    except BaseException:
+        await remove_file(temp_path)
+        raise
+
+    now = datetime.utcnow()
+    session = await upload_sessions_collection.find_one_and_update(
+        {"_id": session["_id"]},
+        {
+            "$addToSet": {"received_chunks": index},
+            "$set": {"updated_at": now, "expires_at": now + UPLOAD_SESSION_TTL}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found or expired")
+
+    return session
+
+async def iter_session_chunks(session: dict) -> AsyncIterator[bytes]:
+    """Yield the session's chunk files in order, in UPLOAD_CHUNK_SIZE pieces"""
+    for index in range(session["total_chunks"]):
+        async with open_file(get_chunk_path(session["_id"], index), 'rb') as f:
+            while True:
+                data = await f.read(UPLOAD_CHUNK_SIZE)
+                if not data:
+                    break
+                yield data
+
+async def commit_upload_session(session: dict) -> str:
+    """Assemble all chunks into the final file and close the session"""
+    missing = set(range(session["total_chunks"])) - set(session.get("received_chunks", []))
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete, missing chunks: {sorted(missing)}"
+        )
+
+    # Claim the session so concurrent commits can't assemble it twice
+    claimed = await upload_sessions_collection.find_one_and_update(
+        {"_id": session["_id"], "status": "open"},
+        {"$set": {"status": "committing", "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Upload session is already being committed")
+
+    try:
+        file_path = await save_file_stream(iter_session_chunks(claimed), claimed["filename"])
+    except BaseException:
+        await upload_sessions_collection.update_one(
+            {"_id": claimed["_id"]},
+            {"$set": {"status": "open", "updated_at": datetime.utcnow()}}
+        )
+        raise
+
+    await delete_upload_session(claimed)
+
+    # Stored files are named by their hash, so a mismatch means corruption
+    if claimed.get("sha256") and not Path(file_path).name.startswith(claimed["sha256"]):
+        await release_file(file_path)
+        raise HTTPException(status_code=400, detail="Uploaded content does not match sha256")
+
+    return file_path
+
+async def delete_upload_session(session: dict) -> None:
+    """Remove a session document and its received chunks"""
+    await upload_sessions_collection.delete_one({"_id": session["_id"]})
+    await delete_directory(get_session_dir(session["_id"]))
+
+async def cleanup_expired_upload_sessions() -> int:
+    """Delete abandoned sessions and any chunk directories without a live session"""
+    now = datetime.utcnow()
+    removed = 0
+
+    async for session in upload_sessions_collection.find(
+        {"expires_at": {"$lt": now}}, {"_id": 1}
+    ):
+        await delete_upload_session(session)
+        removed += 1
+
+    # Mongo's TTL monitor may have deleted documents before we saw them.
+    # Recently touched directories are skipped to avoid racing new sessions.
+    cutoff = (now - SESSION_ORPHAN_GRACE).timestamp()
+    live_ids = set()
+    async for session in upload_sessions_collection.find({}, {"_id": 1}):
+        live_ids.add(str(session["_id"]))
+
+    for path in await run_storage(list_stale_session_dirs, cutoff):
+        if Path(path).name not in live_ids:
+            await delete_directory(path)
+            removed += 1
+
+    return removed
+
+async def run_upload_session_sweeper() -> None:
+    """Periodically clean up abandoned upload sessions"""
+    while True:
+        try:
+            removed = await cleanup_expired_upload_sessions()
+            if removed:
+                print(f"Removed {removed} abandoned upload sessions")
+        except Exception as e:
+            print(f"Error cleaning up upload sessions: {e}")
+
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
@@ -0,0 +1,38 @@
+"""Shared fixtures for the backend tests.
+
+Tests run against a real MongoDB when TEST_MONGO_URL is set, otherwise
+against mongomock-motor. Backend modules create their upload directories
+relative to the working directory on import, so the session runs in a
+scratch directory.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.chdir(tempfile.mkdtemp(prefix="mixamo-tests-"))
+
+if os.getenv("TEST_MONGO_URL"):
+    os.environ["MONGO_URL"] = os.environ["TEST_MONGO_URL"]
+    os.environ.setdefault("DB_NAME", "mixamo_clone_test")
+else:
+    import motor.motor_asyncio
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+USES_REAL_MONGO = bool(os.getenv("TEST_MONGO_URL"))
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(autouse=True)
+async def clean_database(anyio_backend):
+    """Every test starts with empty collections"""
+    from database import db
+    yield
+    for name in await db.list_collection_names():
+        await db.drop_collection(name)
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt
+import auth
+from auth import (
+    BCRYPT_ROUNDS, PasswordHasher, TokenCache, authenticate_token, create_access_token, revoke_token, token_cache
+)
+from database import users_collection
+import server
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+async def test_cached_token_skips_the_revocation_lookup(monkeypatch):
+    token = create_access_token({"sub": "user"})
+    await authenticate_token(token)
+
+    async def unreachable(*args, **kwargs):
+        raise AssertionError("revocation list queried for a cached token")
+
+    monkeypatch.setattr(auth.revoked_tokens_collection, "find_one", unreachable)
+    assert (await authenticate_token(token))["sub"] == "user"
+
+async def test_revoked_token_is_rejected_at_once():
+    token = create_access_token({"sub": "user"})
+    payload = await authenticate_token(token)
+
+    await revoke_token(token, payload)
+
+    with pytest.raises(HTTPException) as error:
+        await authenticate_token(token)
+    assert error.value.status_code == 401
+
+def test_cache_entries_end_with_the_token():
+    cache = TokenCache(ttl=60)
+    cache.set("expired", {"sub": "user", "exp": time.time() - 1})
+    cache.set("valid", {"sub": "user", "exp": time.time() + 3600})
+
+    assert cache.get("expired") is None
+    assert cache.get("valid") is not None
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_entries=2)
+    cache.set("a", {"sub": "a"})
+    cache.set("b", {"sub": "b"})
+    cache.get("a")
+    cache.set("c", {"sub": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+async def test_hashing_pool_bounds_running_and_waiting_calls():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    def blocking_hash():
+        release.wait(5)
+        return threading.current_thread().name
+
+    try:
+        running = asyncio.ensure_future(hasher.run(blocking_hash))
+        queued = asyncio.ensure_future(hasher.run(blocking_hash))
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["running"] == 1 and hasher.stats()["queued"] == 1
+
+        with pytest.raises(HTTPException) as error:
+            await hasher.run(blocking_hash)
+        assert error.value.status_code == 503
+
+        release.set()
+        assert all(name.startswith("bcrypt") for name in await asyncio.gather(running, queued))
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        release.set()
+        hasher.shutdown()
+
+async def test_login_upgrades_an_outdated_hash():
+    now = datetime.utcnow()
+    await users_collection.insert_one({
+        "email": "old@example.com", "name": "Old", "password": bcrypt.using(rounds=4).hash("secret"),
+        "created_at": now, "updated_at": now
+    })
+    client = TestClient(server.app)
+
+    assert client.post("/api/auth/login", json={"email": "old@example.com", "password": "secret"}).status_code == 200
+
+    stored = (await users_collection.find_one({"email": "old@example.com"}))["password"]
+    assert bcrypt.from_string(stored).rounds == BCRYPT_ROUNDS
+    assert client.post("/api/auth/login", json={"email": "old@example.com", "password": "secret"}).status_code == 200
+    assert client.post("/api/auth/login", json={"email": "old@example.com", "password": "wrong"}).status_code == 401
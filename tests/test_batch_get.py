@@ -0,0 +1,33 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from auth import get_current_user
+from database import characters_collection, animations_collection
+import server
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = str(ObjectId())
+
+@pytest.fixture
+def client():
+    server.app.dependency_overrides[get_current_user] = lambda: {"sub": USER_ID}
+    yield TestClient(server.app)
+    server.app.dependency_overrides.clear()
+
+@pytest.mark.parametrize("collection,path,key", [
+    (characters_collection, "/api/characters/batch", "characters"),
+    (animations_collection, "/api/animations/batch", "animations")
+])
+async def test_uppercase_ids_are_found(client, collection, path, key):
+    result = await collection.insert_one({"name": "Hero", "is_public": True, "uploaded_by": ObjectId(), "created_at": datetime.utcnow()})
+    item_id = str(result.inserted_id)
+    unknown_id = str(ObjectId()).upper()
+
+    response = client.post(path, params={"fields": "id,name"}, json={"ids": [item_id.upper(), unknown_id, item_id]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [row["id"] for row in body[key]] == [item_id, item_id]
+    assert body["missing"] == [unknown_id]
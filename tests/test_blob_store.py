@@ -0,0 +1,52 @@
+import hashlib
+import os
+import pytest
+from fastapi import HTTPException
+from bson import ObjectId
+import blob_store
+from blob_store import release_blob
+from file_handler import save_file_bytes
+from models.upload import UploadSessionCreate
+from upload_sessions import create_upload_session, commit_upload_session
+
+pytestmark = pytest.mark.anyio
+
+async def test_identical_content_is_stored_once():
+    first = await save_file_bytes(b"mesh data", ".obj")
+    second = await save_file_bytes(b"mesh data", ".obj")
+
+    assert first == second
+    assert await release_blob(first) is False
+    assert os.path.exists(first)
+    assert await release_blob(second) is True
+    assert not os.path.exists(first)
+
+async def test_release_keeps_content_stored_concurrently(monkeypatch):
+    path = await save_file_bytes(b"shared", ".obj")
+    real_replace_file = blob_store.replace_file
+    stored_again = False
+
+    async def replace_then_store(source, destination):
+        # Another upload of the same content lands while the release is in progress
+        nonlocal stored_again
+        await real_replace_file(source, destination)
+        if not stored_again:
+            stored_again = True
+            await save_file_bytes(b"shared", ".obj")
+
+    monkeypatch.setattr(blob_store, "replace_file", replace_then_store)
+
+    assert await release_blob(path) is False
+    assert os.path.exists(path)
+
+async def test_known_hash_does_not_skip_the_upload():
+    data = b"private model"
+    await save_file_bytes(data, ".obj")
+    upload = UploadSessionCreate(filename="stolen.obj", total_size=len(data), sha256=hashlib.sha256(data).hexdigest())
+
+    session = await create_upload_session(upload, "character", {".obj"}, str(ObjectId()))
+
+    assert session["status"] == "open"
+    with pytest.raises(HTTPException) as error:
+        await commit_upload_session(session)
+    assert error.value.status_code == 409
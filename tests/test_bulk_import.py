@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import io
+import tarfile
+import zipfile
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+import bulk_import
+from blob_store import get_blob_name, get_blob_path
+from bulk_import import ImportArchive, create_import_job, get_archive_extension, import_batch, run_import_job
+from database import animations_collection, processing_jobs_collection
+from models.imports import ImportManifest
+
+def write_tar(path, mode: str, entries: dict) -> None:
+    with tarfile.open(path, mode) as archive:
+        for name, data in entries.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+def test_plain_tar_entries_are_read_in_any_order(tmp_path):
+    path = tmp_path / "library.tar"
+    write_tar(path, "w", {"./models/a.obj": b"a", "models/b.obj": b"b"})
+
+    archive = ImportArchive(str(path))
+    try:
+        assert archive.open("models/b.obj").read() == b"b"
+        assert archive.open("models/a.obj").read() == b"a"
+        assert archive.size("models/a.obj") == 1
+    finally:
+        archive.close()
+
+def test_compressed_tar_is_rejected(tmp_path):
+    path = tmp_path / "library.tar"  # misnamed: gzip content
+    write_tar(path, "w:gz", {"models/a.obj": b"a"})
+
+    with pytest.raises(tarfile.ReadError):
+        ImportArchive(str(path))
+
+@pytest.mark.parametrize("filename,extension", [
+    ("Library.ZIP", ".zip"),
+    ("library.tar", ".tar"),
+    ("library.tar.gz", None),
+    ("library.tgz", None)
+])
+def test_archive_extensions(filename, extension):
+    assert get_archive_extension(filename) == extension
+
+WALK, WAVE = b"walk animation", b"wave animation"
+
+def stored_path(data: bytes, extension: str = ".fbx"):
+    return get_blob_path(get_blob_name(hashlib.sha256(data).hexdigest(), extension))
+
+def write_zip(path, entries: dict) -> str:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return str(path)
+
+@pytest.mark.anyio
+async def test_failed_items_release_their_files(tmp_path, monkeypatch):
+    archive_path = write_zip(tmp_path / "library.zip", {"walk.fbx": WALK, "wave.fbx": WAVE, "notes.txt": b"notes"})
+    manifest = ImportManifest(animations=[
+        {"name": "Walk", "file": "walk.fbx"},
+        {"name": "Notes", "file": "notes.txt"},
+        {"name": "Wave", "file": "wave.fbx"}
+    ])
+    # Wave collides with an animation that already exists
+    taken_id = (await animations_collection.insert_one({"name": "Existing"})).inserted_id
+    build_document = bulk_import.build_animation_document
+
+    def colliding_document(item, *args):
+        document = build_document(item, *args)
+        if item.name == "Wave":
+            document["_id"] = taken_id
+        return document
+
+    monkeypatch.setattr(bulk_import, "build_animation_document", colliding_document)
+    job = await create_import_job(str(ObjectId()), archive_path, manifest, delete_archive=False)
+
+    await run_import_job(str(job["_id"]))
+
+    job = await processing_jobs_collection.find_one({"_id": job["_id"]})
+    assert [item["status"] for item in job["items"]] == ["imported", "failed", "failed"]
+    assert "Unsupported file type" in job["items"][1]["error"]
+    assert (job["imported"], job["failed"]) == (1, 2)
+    assert stored_path(WALK).exists()
+    assert not stored_path(WAVE).exists()
+
+@pytest.mark.anyio
+async def test_batch_releases_its_files_when_the_insert_fails(tmp_path, monkeypatch):
+    archive = ImportArchive(write_zip(tmp_path / "library.zip", {"walk.fbx": WALK, "wave.fbx": WAVE}))
+    manifest = ImportManifest(animations=[{"name": "Walk", "file": "walk.fbx"}, {"name": "Wave", "file": "wave.fbx"}])
+    batch = [(index, {"kind": "animation"}, item) for index, item in enumerate(manifest.animations)]
+
+    async def lost_connection(documents, ordered=True):
+        raise AutoReconnect("connection lost")
+
+    monkeypatch.setattr(animations_collection, "insert_many", lost_connection)
+    try:
+        with pytest.raises(AutoReconnect):
+            await import_batch(archive, batch, str(ObjectId()), asyncio.Semaphore(1))
+    finally:
+        archive.close()
+
+    assert not stored_path(WALK).exists()
+    assert not stored_path(WAVE).exists()
@@ -0,0 +1,27 @@
+import pytest
+from count_cache import CountCache, normalize_filter
+from database import characters_collection
+
+pytestmark = pytest.mark.anyio
+
+def test_equality_and_in_values_keep_their_case():
+    assert normalize_filter({"character_type": "Humanoid"}) != normalize_filter({"character_type": "humanoid"})
+    assert normalize_filter({"tags": {"$in": ["Orc"]}}) != normalize_filter({"tags": {"$in": ["orc"]}})
+
+def test_equivalent_filters_share_a_key():
+    assert normalize_filter({"tags": {"$in": ["b", "a"]}, "is_public": True}) == normalize_filter({"is_public": True, "tags": {"$in": ["a", "b"]}})
+    assert normalize_filter({"$text": {"$search": "Big  Robot"}}) == normalize_filter({"$text": {"$search": "big robot"}})
+    assert normalize_filter({"$text": {"$search": "Robot", "$caseSensitive": True}}) != normalize_filter({"$text": {"$search": "robot", "$caseSensitive": True}})
+
+async def test_counts_are_cached_until_invalidated():
+    cache = CountCache()
+    await characters_collection.insert_one({"character_type": "Humanoid"})
+
+    assert await cache.count(characters_collection, {"character_type": "Humanoid"}) == 1
+    assert await cache.count(characters_collection, {"character_type": "humanoid"}) == 0
+
+    await characters_collection.insert_one({"character_type": "Humanoid"})
+    assert await cache.count(characters_collection, {"character_type": "Humanoid"}) == 1
+
+    cache.invalidate(characters_collection.name)
+    assert await cache.count(characters_collection, {"character_type": "Humanoid"}) == 2
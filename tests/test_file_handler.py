@@ -0,0 +1,51 @@
+import hashlib
+import pytest
+from fastapi import HTTPException
+from blob_store import get_incoming_path
+from file_handler import write_chunks_to_disk
+
+pytestmark = pytest.mark.anyio
+
+async def iter_chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+async def test_stream_within_limit_is_written_and_hashed():
+    path = get_incoming_path(".obj")
+
+    info = await write_chunks_to_disk(iter_chunks(b"v 0 0 0\n", b"v 1 0 0\n"), path, max_size=16)
+
+    assert info == {"size": 16, "sha256": hashlib.sha256(b"v 0 0 0\nv 1 0 0\n").hexdigest()}
+    assert path.read_bytes() == b"v 0 0 0\nv 1 0 0\n"
+    assert not path.with_name(path.name + ".part").exists()
+
+async def test_stream_over_limit_is_rejected_and_cleaned_up():
+    path = get_incoming_path(".obj")
+    received = []
+
+    async def chunks():
+        for chunk in (b"a" * 10, b"b" * 10, b"c" * 10):
+            received.append(chunk)
+            yield chunk
+
+    with pytest.raises(HTTPException) as error:
+        await write_chunks_to_disk(chunks(), path, max_size=15)
+
+    assert error.value.status_code == 413
+    # Reading stops at the chunk that crosses the limit
+    assert len(received) == 2
+    assert not path.exists()
+    assert not path.with_name(path.name + ".part").exists()
+
+async def test_failed_stream_leaves_no_partial_file():
+    path = get_incoming_path(".obj")
+
+    async def broken_chunks():
+        yield b"partial"
+        raise ConnectionError("client went away")
+
+    with pytest.raises(ConnectionError):
+        await write_chunks_to_disk(broken_chunks(), path)
+
+    assert not path.exists()
+    assert not path.with_name(path.name + ".part").exists()
@@ -0,0 +1,27 @@
+import pytest
+from fastapi.testclient import TestClient
+from file_index import file_index, UPLOAD_DIR
+import server
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def client():
+    return TestClient(server.app)
+
+async def test_index_snapshot_is_not_served(client):
+    file_index.save()
+    (UPLOAD_DIR / "file_index.json").write_text("{}")  # left behind by an older version
+    await server.rebuild_file_index()
+
+    assert client.get("/api/files/file_index.json").status_code == 404
+
+async def test_file_written_after_a_miss_is_served(client):
+    assert client.get("/api/files/late.jpg").status_code == 404
+
+    # e.g. a thumbnail written by a job worker in another process
+    (UPLOAD_DIR / "thumbnails" / "late.jpg").write_bytes(b"jpeg")
+
+    response = client.get("/api/files/late.jpg")
+    assert response.status_code == 200
+    assert response.content == b"jpeg"
@@ -0,0 +1,30 @@
+import pytest
+from fastapi.testclient import TestClient
+from file_index import UPLOAD_DIR
+import server
+
+@pytest.fixture
+def client():
+    (UPLOAD_DIR / "characters" / "range.obj").write_bytes(b"0123456789")
+    return TestClient(server.app)
+
+def test_conditional_get_returns_304(client):
+    response = client.get("/api/files/range.obj")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get("/api/files/range.obj", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+def test_range_request_returns_partial_content(client):
+    response = client.get("/api/files/range.obj", headers={"Range": "bytes=2-4"})
+
+    assert response.status_code == 206
+    assert response.content == b"234"
+    assert response.headers["content-range"] == "bytes 2-4/10"
+
+def test_unsatisfiable_range_returns_416(client):
+    response = client.get("/api/files/range.obj", headers={"Range": "bytes=20-30"})
+
+    assert response.status_code == 416
@@ -0,0 +1,67 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from auth import get_current_user
+from database import characters_collection, animations_collection
+import server
+
+pytestmark = pytest.mark.anyio
+
+OWNER = ObjectId()
+ITEMS = [
+    (characters_collection, "/api/characters", {"name": "Hero", "model_metadata": {
+        "triangles": 12, "vertices": 8, "bounds": None, "joints": 2, "materials": 1
+    }}),
+    (animations_collection, "/api/animations", {"name": "Walk"})
+]
+
+@pytest.fixture
+def client():
+    server.app.dependency_overrides[get_current_user] = lambda: {"sub": str(OWNER)}
+    yield TestClient(server.app)
+    server.app.dependency_overrides.clear()
+
+def record_queries(monkeypatch, collection) -> list:
+    """Names of the collection's query methods as they are called"""
+    queries = []
+    for name in ("find_one", "find", "find_one_and_update", "update_one", "update_many", "count_documents"):
+        method = getattr(collection, name)
+
+        def recorded(*args, _name=name, _method=method, **kwargs):
+            queries.append(_name)
+            return _method(*args, **kwargs)
+
+        monkeypatch.setattr(collection, name, recorded)
+    return queries
+
+async def insert_item(collection, fields: dict, uploaded_by: ObjectId) -> str:
+    now = datetime.utcnow()
+    result = await collection.insert_one({
+        **fields, "is_public": True, "uploaded_by": uploaded_by, "created_at": now, "updated_at": now
+    })
+    return str(result.inserted_id)
+
+@pytest.mark.parametrize("collection,path,fields", ITEMS)
+async def test_update_of_a_missing_or_foreign_item_is_one_query(client, monkeypatch, collection, path, fields):
+    foreign_id = await insert_item(collection, fields, ObjectId())
+    queries = record_queries(monkeypatch, collection)
+
+    for item_id in (str(ObjectId()), foreign_id):
+        response = client.put(f"{path}/{item_id}", json={"name": "Renamed"})
+        assert response.status_code == 404
+
+    assert queries == ["find_one_and_update", "find_one_and_update"]
+    assert (await collection.find_one({"_id": ObjectId(foreign_id)}))["name"] == fields["name"]
+
+@pytest.mark.parametrize("collection,path,fields", ITEMS)
+async def test_update_of_an_owned_item_returns_it(client, monkeypatch, collection, path, fields):
+    item_id = await insert_item(collection, fields, OWNER)
+    queries = record_queries(monkeypatch, collection)
+
+    response = client.put(f"{path}/{item_id}", json={"name": "Renamed"})
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+    assert response.json().get("model_metadata") == fields.get("model_metadata")
+    assert queries == ["find_one_and_update"]
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from database import processing_jobs_collection
+from job_cleanup import cleanup_expired_jobs
+from result_cache import PROCESSED_DIR
+
+pytestmark = pytest.mark.anyio
+
+async def insert_job(result_name: str, expires_at: datetime) -> None:
+    result_file = str(PROCESSED_DIR / result_name)
+    with open(result_file, "wb") as f:
+        f.write(b"result")
+    await processing_jobs_collection.insert_one({
+        "user_id": ObjectId(), "status": "completed", "result_file": result_file, "expires_at": expires_at
+    })
+
+async def test_expired_jobs_are_removed_with_their_results():
+    now = datetime.utcnow()
+    await insert_job("expired.fbx", now - timedelta(minutes=1))
+    await insert_job("kept.fbx", now + timedelta(days=1))
+
+    assert await cleanup_expired_jobs() == 1
+
+    assert await processing_jobs_collection.count_documents({}) == 1
+    assert not (PROCESSED_DIR / "expired.fbx").exists()
+    assert (PROCESSED_DIR / "kept.fbx").exists()
+
+async def test_result_shared_with_a_live_job_is_kept():
+    now = datetime.utcnow()
+    await insert_job("shared.fbx", now - timedelta(minutes=1))
+    await insert_job("shared.fbx", now + timedelta(days=1))
+
+    await cleanup_expired_jobs()
+
+    assert (PROCESSED_DIR / "shared.fbx").exists()
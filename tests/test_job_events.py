@@ -0,0 +1,82 @@
+import json
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from auth import create_access_token
+from database import processing_jobs_collection
+from job_events import job_event_bus, publish_job_event
+from routes import processing_routes
+from routes.processing_routes import stream_job_progress
+import server
+
+pytestmark = pytest.mark.anyio
+
+class ConnectedRequest:
+    """Stands in for the request of a client that stays connected"""
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+def job_document(user_id: ObjectId, status: str = "processing", progress: int = 10) -> dict:
+    return {"_id": ObjectId(), "user_id": user_id, "status": status, "progress": progress, "updated_at": datetime.utcnow()}
+
+def parse_sse(message: str) -> dict:
+    assert message.startswith("event: job\n")
+    return json.loads(message.split("data: ", 1)[1])
+
+async def test_job_stream_relays_published_events_until_the_job_finishes():
+    owner = ObjectId()
+    job = job_document(owner)
+    await processing_jobs_collection.insert_one(job)
+
+    response = await stream_job_progress(str(job["_id"]), ConnectedRequest(), {"sub": str(owner)})
+    events = response.body_iterator
+
+    assert parse_sse(await events.__anext__())["progress"] == 10
+    await publish_job_event({**job, "progress": 60})
+    assert parse_sse(await events.__anext__())["progress"] == 60
+    await publish_job_event({**job, "status": "completed", "progress": 100})
+    assert parse_sse(await events.__anext__())["status"] == "completed"
+    with pytest.raises(StopAsyncIteration):
+        await events.__anext__()
+    assert job_event_bus._subscribers == {}
+
+async def test_job_stream_of_another_users_job_is_404():
+    job = job_document(ObjectId())
+    await processing_jobs_collection.insert_one(job)
+
+    with pytest.raises(HTTPException) as error:
+        await stream_job_progress(str(job["_id"]), ConnectedRequest(), {"sub": str(ObjectId())})
+
+    assert error.value.status_code == 404
+    assert job_event_bus._subscribers == {}
+
+def test_websocket_delivers_only_the_users_own_job_events(monkeypatch):
+    monkeypatch.setattr(processing_routes, "EVENT_STREAM_KEEPALIVE", 0.05)
+    owner = ObjectId()
+    own_job, other_job = job_document(owner), job_document(ObjectId())
+    client = TestClient(server.app)
+
+    with client.websocket_connect(f"/api/process/ws?token={create_access_token({'sub': str(owner)})}") as websocket:
+        # A keepalive means the subscription is open
+        assert websocket.receive_json() == {"type": "keepalive"}
+        websocket.portal.call(publish_job_event, other_job)
+        websocket.portal.call(publish_job_event, own_job)
+
+        message = websocket.receive_json()
+        while message["type"] == "keepalive":
+            message = websocket.receive_json()
+
+    assert message["data"]["job_id"] == str(own_job["_id"])
+
+def test_websocket_rejects_an_invalid_token():
+    client = TestClient(server.app)
+
+    with pytest.raises(WebSocketDisconnect) as error:
+        with client.websocket_connect("/api/process/ws?token=not-a-token"):
+            pass
+
+    assert error.value.code == 1008
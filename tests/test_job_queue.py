@@ -0,0 +1,199 @@
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+import job_queue
+import retarget
+from database import characters_collection, animations_collection, processing_jobs_collection
+from job_queue import LocalJobQueue, ProgressReporter, cancel_job, job_task, report_progress, run_job
+
+pytestmark = pytest.mark.anyio
+
+async def test_local_queue_runs_higher_priority_lanes_first():
+    ran = []
+
+    @job_task("test-record")
+    async def record(job_id: str):
+        ran.append(job_id)
+
+    queue = LocalJobQueue(concurrency=1)
+    await queue.start()
+    try:
+        jobs = {priority: str(ObjectId()) for priority in (2, 0, 1)}
+        for priority, job_id in jobs.items():
+            await queue.enqueue("test-record", job_id, priority)
+        await asyncio.wait_for(queue._queue.join(), 5)
+    finally:
+        await queue.stop()
+
+    assert ran == [jobs[0], jobs[1], jobs[2]]
+
+def test_celery_workers_drain_lanes_in_priority_order():
+    pytest.importorskip("celery")
+    from celery_app import celery_app, JOB_QUEUES
+
+    assert JOB_QUEUES == "jobs-0,jobs-1,jobs-2"
+    assert celery_app.conf.broker_transport_options["queue_order_strategy"] == "priority"
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+
+    async def record_event(job):
+        events.append(dict(job))
+
+    monkeypatch.setattr(job_queue, "publish_job_event", record_event)
+    return events
+
+async def insert_job(status: str = "processing") -> dict:
+    job = {"user_id": ObjectId(), "status": status, "progress": 0, "created_at": datetime.utcnow()}
+    job["_id"] = (await processing_jobs_collection.insert_one(job)).inserted_id
+    return job
+
+async def test_progress_reports_are_coalesced(published, monkeypatch):
+    job = await insert_job()
+    reporter = ProgressReporter(interval=0.05)
+    writes = []
+    bulk_write = processing_jobs_collection.bulk_write
+
+    async def counting_bulk_write(operations, **kwargs):
+        writes.append(len(operations))
+        return await bulk_write(operations, **kwargs)
+
+    monkeypatch.setattr(processing_jobs_collection, "bulk_write", counting_bulk_write)
+    for progress in range(1, 21):
+        await reporter.report(job, {"progress": progress})
+    await asyncio.sleep(0.2)
+
+    assert writes == [1]
+    assert [event["progress"] for event in published] == [20]
+    assert (await processing_jobs_collection.find_one({"_id": job["_id"]}))["progress"] == 20
+
+async def test_progress_of_a_cancelled_job_is_not_written(published):
+    job = await insert_job()
+    reporter = ProgressReporter(interval=60)
+    await reporter.report(job, {"progress": 50})
+    await processing_jobs_collection.update_one({"_id": job["_id"]}, {"$set": {"status": "cancelled"}})
+
+    await reporter.flush()
+
+    assert published == []
+    assert (await processing_jobs_collection.find_one({"_id": job["_id"]}))["progress"] == 0
+
+async def test_terminal_states_are_not_coalesced():
+    job = await insert_job()
+
+    with pytest.raises(ValueError):
+        await report_progress(job, {"status": "completed"})
+
+async def test_cancelled_retarget_job_does_not_complete(published, monkeypatch):
+    job = await insert_job("pending")
+    job_id = str(job["_id"])
+    character = await characters_collection.insert_one({"name": "Hero"})
+    animation = await animations_collection.insert_one({"name": "Walk"})
+    await processing_jobs_collection.update_one({"_id": job["_id"]}, {"$set": {
+        "result_key": "key", "character_id": character.inserted_id, "animation_id": animation.inserted_id
+    }})
+    recorded = []
+
+    async def record(*args):
+        recorded.append(args)
+
+    async def cancel_during_last_step(job_id):
+        # The cancel lands after the handler's last checkpoint
+        if len(checkpoints) == 1:
+            await processing_jobs_collection.update_one({"_id": ObjectId(job_id)}, {"$set": {"status": "cancelled"}})
+        checkpoints.append(job_id)
+
+    checkpoints = []
+    monkeypatch.setattr(retarget, "record_result", record)
+    monkeypatch.setattr(retarget, "raise_if_cancelled", cancel_during_last_step)
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda seconds: real_sleep(0))
+
+    await retarget.run_retarget_job(job_id)
+
+    assert recorded == []
+    assert (await processing_jobs_collection.find_one({"_id": job["_id"]}))["status"] == "cancelled"
+    assert all(event["status"] != "completed" for event in published)
+
+async def test_cancel_job_only_cancels_the_owners_unfinished_jobs(published):
+    job = await insert_job()
+    job_id = str(job["_id"])
+
+    assert await cancel_job(job_id, str(ObjectId())) is None
+    cancelled = await cancel_job(job_id, str(job["user_id"]))
+
+    assert cancelled["status"] == "cancelled"
+    assert cancelled["expires_at"] > datetime.utcnow()
+    assert await cancel_job(job_id, str(job["user_id"])) is None
+    assert [event["status"] for event in published] == ["cancelled"]
+
+async def test_cancel_interrupts_a_running_local_job(published, monkeypatch):
+    started, finished, ran = asyncio.Event(), [], []
+
+    @job_task("test-wait")
+    async def wait(job_id: str):
+        started.set()
+        await asyncio.sleep(30)
+        finished.append(job_id)
+
+    @job_task("test-next")
+    async def next_job(job_id: str):
+        ran.append(job_id)
+
+    queue = LocalJobQueue(concurrency=1)
+    monkeypatch.setattr(job_queue, "job_queue", queue)
+    job, next_id = await insert_job(), str(ObjectId())
+    await queue.start()
+    try:
+        await queue.enqueue("test-wait", str(job["_id"]))
+        await queue.enqueue("test-next", next_id)
+        await asyncio.wait_for(started.wait(), 5)
+
+        await cancel_job(str(job["_id"]), str(job["user_id"]))
+        await asyncio.wait_for(queue._queue.join(), 5)
+    finally:
+        await queue.stop()
+
+    assert finished == []
+    assert ran == [next_id]
+
+async def test_job_cancelled_while_queued_does_not_run():
+    ran = []
+
+    @job_task("test-queued")
+    async def record(job_id: str):
+        ran.append(job_id)
+
+    job = await insert_job("cancelled")
+    await run_job("test-queued", str(job["_id"]))
+
+    assert ran == []
+
+async def test_worker_survives_a_failure_it_cannot_record(monkeypatch):
+    ran = []
+
+    @job_task("test-fail")
+    async def fail(job_id: str):
+        raise RuntimeError("handler failed")
+
+    @job_task("test-after")
+    async def after(job_id: str):
+        ran.append(job_id)
+
+    async def unrecordable(*args):
+        raise RuntimeError("database unavailable")
+
+    queue = LocalJobQueue(concurrency=1)
+    monkeypatch.setattr(queue, "_handle_failure", unrecordable)
+    await queue.start()
+    try:
+        await queue.enqueue("test-fail", str(ObjectId()))
+        after_id = str(ObjectId())
+        await queue.enqueue("test-after", after_id)
+        await asyncio.wait_for(queue._queue.join(), 5)
+    finally:
+        await queue.stop()
+
+    assert ran == [after_id]
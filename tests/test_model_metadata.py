@@ -0,0 +1,102 @@
+import base64
+import json
+import struct
+import pytest
+from model_metadata import extract_model_metadata
+from thumbnail_renderer import load_mesh
+
+TRIANGLE = struct.pack("<9f", 0, 0, 0, 1, 0, 0, 0, 1, 0)
+
+def write_gltf(path, buffer_uri):
+    path.write_text(json.dumps({
+        "asset": {"version": "2.0"},
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+        "buffers": [{"uri": buffer_uri, "byteLength": len(TRIANGLE)}],
+        "bufferViews": [{"buffer": 0, "byteLength": len(TRIANGLE)}],
+        # No min/max, so bounds can only come from the buffer itself
+        "accessors": [{"bufferView": 0, "componentType": 5126, "count": 3, "type": "VEC3"}]
+    }))
+
+def test_embedded_buffer_is_read(tmp_path):
+    model = tmp_path / "model.gltf"
+    write_gltf(model, "data:application/octet-stream;base64," + base64.b64encode(TRIANGLE).decode())
+
+    metadata = extract_model_metadata(str(model))
+
+    assert metadata["triangles"] == 1
+    assert metadata["vertices"] == 3
+    assert metadata["bounds"] is not None
+    assert load_mesh(str(model)) is not None
+
+@pytest.mark.parametrize("uri", ["secret.bin", "../secret.bin", "/etc/passwd"])
+def test_external_buffer_files_are_never_read(tmp_path, uri):
+    (tmp_path / "secret.bin").write_bytes(TRIANGLE)
+    (tmp_path / "models").mkdir()
+    model = tmp_path / "models" / "model.gltf"
+    write_gltf(model, uri)
+    (tmp_path / "models" / "secret.bin").write_bytes(TRIANGLE)
+
+    metadata = extract_model_metadata(str(model))
+
+    assert metadata["bounds"] is None
+    assert load_mesh(str(model)) is None
+
+def write_glb(path, gltf: dict, binary: bytes) -> None:
+    document = json.dumps(gltf).encode()
+    document += b" " * (-len(document) % 4)
+    binary += b"\0" * (-len(binary) % 4)
+    chunks = struct.pack("<II", len(document), 0x4E4F534A) + document + struct.pack("<II", len(binary), 0x004E4942) + binary
+    path.write_bytes(struct.pack("<4sII", b"glTF", 2, 12 + len(chunks)) + chunks)
+
+def test_glb_counts(tmp_path):
+    quad = struct.pack("<12f", 0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0)
+    indices = struct.pack("<6H", 0, 1, 2, 0, 2, 3)
+    model = tmp_path / "model.glb"
+    write_glb(model, {
+        "asset": {"version": "2.0"},
+        "scenes": [{"nodes": [0, 1]}],
+        # The mesh is drawn twice
+        "nodes": [{"mesh": 0}, {"mesh": 0, "translation": [5, 0, 0]}, {"name": "Hips"}, {"name": "Spine"}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1}]}],
+        "skins": [{"joints": [2, 3]}, {"joints": [3]}],
+        "materials": [{"name": "Skin"}],
+        "buffers": [{"byteLength": len(quad) + len(indices)}],
+        "bufferViews": [
+            {"buffer": 0, "byteLength": len(quad)},
+            {"buffer": 0, "byteOffset": len(quad), "byteLength": len(indices)}
+        ],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": 4, "type": "VEC3"},
+            {"bufferView": 1, "componentType": 5123, "count": 6, "type": "SCALAR"}
+        ]
+    }, quad + indices)
+
+    metadata = extract_model_metadata(str(model))
+
+    assert metadata["triangles"] == 4
+    assert metadata["vertices"] == 8
+    assert metadata["joints"] == 2
+    assert metadata["materials"] == 1
+    assert metadata["bounds"]["max"][0] == pytest.approx(6)
+
+def test_obj_counts(tmp_path):
+    model = tmp_path / "model.obj"
+    model.write_text(
+        "# a quad and a triangle\n"
+        "v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nv 0 0 2\n"
+        "vt 0 0\nvn 0 0 1\n"
+        "usemtl Skin\n"
+        "f 1 2 3 4\n"
+        "usemtl Cloth\n"
+        "f 1/1/1 2/1/1 5/1/1\n"
+    )
+
+    metadata = extract_model_metadata(str(model))
+
+    assert metadata["triangles"] == 3
+    assert metadata["vertices"] == 5
+    assert metadata["joints"] == 0
+    assert metadata["materials"] == 2
+    assert metadata["bounds"]["max"][2] == pytest.approx(2)
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from database import characters_collection
+from pagination import fetch_page
+
+pytestmark = pytest.mark.anyio
+
+async def insert_characters(count: int) -> list:
+    # Pairs share a timestamp so the _id tie-break is exercised
+    start = datetime(2024, 1, 1)
+    documents = [{"name": f"c{i}", "is_public": True, "created_at": start + timedelta(seconds=i // 2)} for i in range(count)]
+    await characters_collection.insert_many(documents)
+    return sorted(documents, key=lambda document: (document["created_at"], document["_id"]), reverse=True)
+
+async def test_cursor_pages_visit_every_document_once_in_order():
+    expected = await insert_characters(7)
+
+    seen, cursor = [], None
+    while True:
+        documents, cursor = await fetch_page(characters_collection, {"is_public": True}, 1, 3, cursor)
+        seen.extend(document["_id"] for document in documents)
+        if cursor is None:
+            break
+
+    assert seen == [document["_id"] for document in expected]
+
+async def test_cursor_pages_match_numbered_pages():
+    await insert_characters(6)
+
+    first, cursor = await fetch_page(characters_collection, {"is_public": True}, 1, 3, None)
+    by_cursor, _ = await fetch_page(characters_collection, {"is_public": True}, 1, 3, cursor)
+    by_number, _ = await fetch_page(characters_collection, {"is_public": True}, 2, 3, None)
+
+    assert [document["_id"] for document in by_cursor] == [document["_id"] for document in by_number]
+
+async def test_last_page_has_no_cursor():
+    await insert_characters(3)
+
+    documents, cursor = await fetch_page(characters_collection, {"is_public": True}, 1, 3, None)
+
+    assert len(documents) == 3
+    assert cursor is None
+
+async def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        await fetch_page(characters_collection, {"is_public": True}, 1, 3, "not-a-cursor")
+    assert error.value.status_code == 400
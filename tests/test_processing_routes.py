@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from auth import get_current_user
+from database import users_collection, characters_collection, animations_collection
+from retarget import run_retarget_job
+from routes import processing_routes
+import server
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = ObjectId()
+
+@pytest.fixture
+def queued(monkeypatch):
+    jobs = []
+
+    async def enqueue(task_name, job_id, priority):
+        jobs.append((task_name, job_id))
+
+    monkeypatch.setattr(processing_routes, "enqueue_job", enqueue)
+    return jobs
+
+@pytest.fixture
+async def client():
+    await users_collection.insert_one({"_id": USER_ID, "email": "owner@example.com", "subscription": "free"})
+    server.app.dependency_overrides[get_current_user] = lambda: {"sub": str(USER_ID)}
+    yield TestClient(server.app)
+    server.app.dependency_overrides.clear()
+
+async def insert_pair() -> dict:
+    now = datetime.utcnow()
+    character = await characters_collection.insert_one({"name": "Hero", "is_public": True, "uploaded_by": USER_ID, "created_at": now})
+    animation = await animations_collection.insert_one({"name": "Walk", "is_public": True, "uploaded_by": USER_ID, "created_at": now})
+    return {
+        "character_id": str(character.inserted_id),
+        "animation_id": str(animation.inserted_id),
+        "settings": {"speed": 1.5, "export_format": "glb"}
+    }
+
+async def test_identical_request_reuses_the_finished_result(client, queued, monkeypatch):
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda seconds: real_sleep(0))
+    request = await insert_pair()
+
+    first = client.post("/api/process/apply-animation", json=request)
+    assert first.status_code == 200
+    assert queued == [("retarget", first.json()["id"])]
+    await run_retarget_job(first.json()["id"])
+    first_result = client.get(f"/api/process/status/{first.json()['id']}").json()["result_file"]
+
+    second = client.post("/api/process/apply-animation", json={**request, "settings": {"speed": 1.50, "export_format": "GLB"}})
+
+    assert second.status_code == 200
+    assert second.json()["status"] == "completed"
+    assert second.json()["cached"] is True
+    assert second.json()["result_file"] == first_result
+    assert len(queued) == 1
+
+async def test_status_of_a_batch_job(client, queued):
+    request = await insert_pair()
+    batch = client.post("/api/process/apply-animation/batch", json={"items": [
+        {"character_id": request["character_id"], "animation_id": request["animation_id"]}
+    ]})
+    assert batch.status_code == 200
+
+    response = client.get(f"/api/process/status/{batch.json()['id']}")
+
+    assert response.status_code == 200
+    assert response.json()["kind"] == "batch_retarget"
+    assert response.json()["character_id"] is None
+
+async def test_status_of_an_unknown_job_is_404(client):
+    assert client.get(f"/api/process/status/{ObjectId()}").status_code == 404
+    assert client.get("/api/process/status/not-an-id").status_code == 400
@@ -0,0 +1,57 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from auth import get_current_user
+from database import characters_collection, animations_collection
+import server
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def client():
+    server.app.dependency_overrides[get_current_user] = lambda: {"sub": str(ObjectId())}
+    yield TestClient(server.app)
+    server.app.dependency_overrides.clear()
+
+async def insert_items():
+    now = datetime.utcnow()
+    owner = ObjectId()
+    await characters_collection.insert_one({
+        "name": "Hero", "type": "Humanoid", "polygons": 1200, "tags": ["knight"], "model_file": "uploads/hero.glb",
+        "is_public": True, "uploaded_by": owner, "created_at": now, "updated_at": now
+    })
+    await animations_collection.insert_one({
+        "name": "Walk", "category": "Locomotion", "duration": 1.5, "tags": ["loop"], "animation_file": "uploads/walk.fbx",
+        "is_public": True, "uploaded_by": owner, "created_at": now, "updated_at": now
+    })
+
+@pytest.mark.parametrize("path,key,summary_fields", [
+    ("/api/characters", "characters", {"id", "name", "thumbnail", "type", "polygons"}),
+    ("/api/animations", "animations", {"id", "name", "thumbnail", "category", "duration"})
+])
+async def test_summary_view_returns_only_summary_fields(client, path, key, summary_fields):
+    await insert_items()
+
+    response = client.get(path, params={"view": "summary"})
+
+    assert response.status_code == 200
+    assert set(response.json()[key][0]) == summary_fields
+
+@pytest.mark.parametrize("path,key", [("/api/characters", "characters"), ("/api/animations", "animations")])
+async def test_fields_returns_the_requested_fields_and_the_id(client, path, key):
+    await insert_items()
+
+    response = client.get(path, params={"fields": "name, tags"})
+
+    assert response.status_code == 200
+    row = response.json()[key][0]
+    assert set(row) == {"id", "name", "tags"}
+    assert row["tags"] in (["knight"], ["loop"])
+
+@pytest.mark.parametrize("path", ["/api/characters", "/api/animations"])
+def test_unknown_fields_are_rejected(client, path):
+    response = client.get(path, params={"fields": "name,password"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: password"
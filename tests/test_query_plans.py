@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from tests.conftest import USES_REAL_MONGO
+from database import db
+from indexes import COLLECTION_INDEXES, LIST_QUERY_SHAPES, LIST_SORT, check_query_plans, ensure_indexes
+
+pytestmark = pytest.mark.anyio
+
+def equality_fields(query: dict) -> set:
+    """Fields a listing filter pins to one value (the cursor's $or is a range on the sort)"""
+    return {field for field in query if not field.startswith("$")}
+
+@pytest.mark.parametrize("collection_name,query", LIST_QUERY_SHAPES)
+def test_every_listing_shape_has_a_matching_index(collection_name, query):
+    keys = [list(index.document["key"].items()) for index in COLLECTION_INDEXES[collection_name]]
+    fields = equality_fields(query)
+
+    assert any(
+        {field for field, _ in key[:len(fields)]} == fields and key[len(fields):] == LIST_SORT
+        for key in keys
+    )
+
+@pytest.mark.skipif(not USES_REAL_MONGO, reason="explain() needs a real MongoDB (set TEST_MONGO_URL)")
+async def test_listing_queries_use_indexes():
+    await ensure_indexes(db)
+    start = datetime(2024, 1, 1)
+    user_id = ObjectId()
+    for collection_name in ("characters", "animations"):
+        await db[collection_name].insert_many([
+            {"is_public": i % 2 == 0, "type": "Humanoid", "category": "Basic", "tags": ["tag"], "created_at": start + timedelta(minutes=i)}
+            for i in range(200)
+        ])
+    await db.processing_jobs.insert_many([
+        {"user_id": user_id, "status": "completed", "created_at": start + timedelta(minutes=i)}
+        for i in range(200)
+    ])
+
+    assert await check_query_plans(db) == []
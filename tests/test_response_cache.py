@@ -0,0 +1,84 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from auth import get_current_user
+from database import characters_collection
+from response_cache import ResponseCache, encode_response
+import server
+
+pytestmark = pytest.mark.anyio
+
+RESPONSE = encode_response({"characters": []})
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+def redis_cache(redis_server) -> ResponseCache:
+    """A redis-backed cache as one API process would have it"""
+    import fakeredis
+    cache = ResponseCache(backend="redis")
+    cache._redis = fakeredis.FakeAsyncRedis(server=redis_server)
+    return cache
+
+async def test_memory_cache_drops_invalidated_namespaces():
+    cache = ResponseCache(backend="memory")
+    await cache.set("characters:list", "page=1", RESPONSE, await cache.generation("characters:list"))
+    assert await cache.get("characters:list", "page=1") == RESPONSE
+
+    await cache.invalidate("characters:list")
+
+    assert await cache.get("characters:list", "page=1") is None
+
+async def test_memory_cache_skips_responses_built_before_an_invalidation():
+    cache = ResponseCache(backend="memory")
+    generation = await cache.generation("characters:list")
+
+    await cache.invalidate("characters:list")
+    await cache.set("characters:list", "page=1", RESPONSE, generation)
+
+    assert await cache.get("characters:list", "page=1") is None
+
+async def test_redis_cache_skips_responses_built_before_an_invalidation_elsewhere(redis_server):
+    building, writing = redis_cache(redis_server), redis_cache(redis_server)
+    generation = await building.generation("characters:list")
+
+    await writing.invalidate("characters:list")
+    await building.set("characters:list", "page=1", RESPONSE, generation)
+
+    assert await building.get("characters:list", "page=1") is None
+    await building.set("characters:list", "page=1", RESPONSE, await building.generation("characters:list"))
+    assert await writing.get("characters:list", "page=1") == RESPONSE
+
+async def test_listing_revalidates_with_etag():
+    server.app.dependency_overrides[get_current_user] = lambda: {"sub": str(ObjectId())}
+    try:
+        client = TestClient(server.app)
+        now = datetime.utcnow()
+        await characters_collection.insert_one({"name": "Hero", "is_public": True, "uploaded_by": ObjectId(), "created_at": now, "updated_at": now})
+
+        response = client.get("/api/characters")
+        assert response.status_code == 200
+        response = client.get("/api/characters", headers={"If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
+    finally:
+        server.app.dependency_overrides.clear()
+
+async def test_item_cache_is_shared_by_every_spelling_of_an_id():
+    owner = ObjectId()
+    server.app.dependency_overrides[get_current_user] = lambda: {"sub": str(owner)}
+    try:
+        client = TestClient(server.app)
+        now = datetime.utcnow()
+        result = await characters_collection.insert_one({"name": "Hero", "is_public": True, "uploaded_by": owner, "created_at": now, "updated_at": now})
+        character_id = str(result.inserted_id)
+
+        assert client.get(f"/api/characters/{character_id.upper()}").json()["name"] == "Hero"
+        assert client.put(f"/api/characters/{character_id}", json={"name": "Villain"}).status_code == 200
+
+        assert client.get(f"/api/characters/{character_id.upper()}").json()["name"] == "Villain"
+        assert client.get("/api/characters/not-an-id").status_code == 400
+    finally:
+        server.app.dependency_overrides.clear()
@@ -0,0 +1,35 @@
+import os
+import pytest
+from bson import ObjectId
+import result_cache
+from database import processing_jobs_collection, retarget_results_collection
+from result_cache import PROCESSED_DIR, build_result_key, get_result_path, record_result
+
+pytestmark = pytest.mark.anyio
+
+def test_equivalent_settings_share_a_result_key():
+    assert build_result_key("c", "a", {"speed": 1}) == build_result_key("c", "a", {"speed": 1.0, "export_format": " FBX"})
+    assert build_result_key("c", "a", {"speed": 1}) != build_result_key("c", "a", {"speed": 2})
+
+def test_result_path_only_accepts_known_export_formats():
+    assert get_result_path("key", {"export_format": "glb"}).endswith("key.glb")
+    with pytest.raises(ValueError):
+        get_result_path("key", {"export_format": "fbx/../../../etc/cron.d/x"})
+
+async def test_eviction_keeps_files_completed_jobs_still_serve(monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_MAX_ENTRIES", 1)
+    served = str(PROCESSED_DIR / "served.fbx")
+    unused = str(PROCESSED_DIR / "unused.fbx")
+    latest = str(PROCESSED_DIR / "latest.fbx")
+    for path in (served, unused, latest):
+        with open(path, "wb") as f:
+            f.write(b"result")
+    await processing_jobs_collection.insert_one({"_id": ObjectId(), "status": "completed", "result_file": served})
+
+    await record_result("served", served, "job-1")
+    await record_result("unused", unused, "job-2")
+    await record_result("latest", latest, "job-3")
+
+    assert await retarget_results_collection.count_documents({}) == 1
+    assert os.path.exists(served)
+    assert not os.path.exists(unused)
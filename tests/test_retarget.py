@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import pytest
+from bson import ObjectId
+import thumbnail_renderer
+from batch_retarget import create_batch_job, run_batch_retarget_job
+from database import characters_collection, animations_collection, processing_jobs_collection, retarget_results_collection
+from retarget import run_retarget_job
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture(autouse=True)
+def no_simulated_delay(monkeypatch):
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda seconds: real_sleep(0))
+    yield
+    thumbnail_renderer.shutdown_render_pool()
+
+def write_rig(path, bones) -> str:
+    path.write_text(json.dumps({
+        "asset": {"version": "2.0"},
+        "nodes": [{"name": bone} for bone in bones],
+        "skins": [{"joints": list(range(len(bones)))}]
+    }))
+    return str(path)
+
+async def insert_pair(tmp_path, animation_bones) -> tuple:
+    character = await characters_collection.insert_one({
+        "name": "Hero", "model_file": write_rig(tmp_path / "hero.gltf", ["mixamorig:Hips", "mixamorig:Spine"])
+    })
+    animation = await animations_collection.insert_one({
+        "name": "Flap", "animation_file": write_rig(tmp_path / "flap.gltf", animation_bones)
+    })
+    return character.inserted_id, animation.inserted_id
+
+async def test_single_job_checks_skeletons(tmp_path):
+    character_id, animation_id = await insert_pair(tmp_path, ["Wing1", "Wing2"])
+    job_id = ObjectId()
+    await processing_jobs_collection.insert_one({
+        "_id": job_id, "user_id": ObjectId(), "status": "pending", "character_id": character_id,
+        "animation_id": animation_id, "result_key": "key", "settings": {}
+    })
+
+    await run_retarget_job(str(job_id))
+
+    job = await processing_jobs_collection.find_one({"_id": job_id})
+    assert job["status"] == "failed"
+    assert "no bones in common" in job["error"]
+
+async def test_batch_item_gets_the_same_check(tmp_path):
+    character_id, animation_id = await insert_pair(tmp_path, ["Wing1", "Wing2"])
+    job = await create_batch_job(str(ObjectId()), [(str(character_id), str(animation_id))], {})
+
+    await run_batch_retarget_job(str(job["_id"]))
+
+    item = (await processing_jobs_collection.find_one({"_id": job["_id"]}))["items"][0]
+    assert item["status"] == "failed"
+    assert "no bones in common" in item["error"]
+
+async def test_batch_results_are_written_and_cached(tmp_path):
+    character_id, animation_id = await insert_pair(tmp_path, ["Hips", "Spine"])
+    job = await create_batch_job(str(ObjectId()), [(str(character_id), str(animation_id))], {})
+
+    await run_batch_retarget_job(str(job["_id"]))
+
+    item = (await processing_jobs_collection.find_one({"_id": job["_id"]}))["items"][0]
+    assert item["status"] == "completed"
+    assert item["matched_bones"] == 2
+    assert os.path.getsize(item["result_file"]) > 0
+    entry = await retarget_results_collection.find_one({})
+    assert entry["result_file"] == item["result_file"]
+    assert entry["size"] == os.path.getsize(item["result_file"])
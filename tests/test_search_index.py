@@ -0,0 +1,90 @@
+import pytest
+from bson import ObjectId
+from search_index import SearchIndex
+
+pytestmark = pytest.mark.anyio
+
+OWNER = ObjectId()
+
+def character(name: str, description: str = "", tags=(), is_public: bool = True) -> dict:
+    return {"_id": ObjectId(), "name": name, "description": description, "tags": list(tags), "type": "Humanoid",
+            "is_public": is_public, "uploaded_by": OWNER}
+
+@pytest.fixture
+def index():
+    return SearchIndex("characters", "type")
+
+def names(results) -> list:
+    return [result["name"] for result in results]
+
+def test_name_matches_rank_above_description_matches(index):
+    index.add(character("Plain Guard", description="a knight in armour"))
+    index.add(character("Knight"))
+    index.add(character("Archer"))
+
+    assert names(index.search("knight")) == ["Knight", "Plain Guard"]
+
+def test_every_query_word_must_match(index):
+    index.add(character("Red Knight"))
+    index.add(character("Blue Knight"))
+
+    assert names(index.search("red knight")) == ["Red Knight"]
+
+def test_last_word_expands_as_prefix(index):
+    index.add(character("Knight"))
+    index.add(character("Knightmare"))
+    index.add(character("Kobold"))
+
+    assert names(index.search("kni")) == ["Knight", "Knightmare"]
+    assert index.search("kni", prefix=False) == []
+
+def test_one_typo_still_matches(index):
+    index.add(character("Skeleton"))
+
+    assert names(index.search("skeletno", prefix=False)) == ["Skeleton"]
+    assert names(index.search("skelton", prefix=False)) == ["Skeleton"]
+    assert index.search("skltn", prefix=False) == []
+
+def test_private_documents_are_only_found_by_their_owner(index):
+    index.add(character("Secret Robot", is_public=False))
+
+    assert index.search("robot", user_id=str(ObjectId())) == []
+    assert names(index.search("robot", user_id=str(OWNER))) == ["Secret Robot"]
+
+def test_remove_and_re_add_update_the_index(index):
+    document = character("Robot")
+    index.add(document)
+    index.add({**document, "name": "Android"})
+
+    assert index.search("robot") == []
+    index.remove(document["_id"])
+    assert index.search("android") == []
+    assert len(index) == 0
+
+class ChangingCollection:
+    """A collection whose documents change while a rebuild is reading them"""
+
+    def __init__(self, documents, during_read):
+        self.documents = documents
+        self.during_read = during_read
+
+    def find(self, query, projection):
+        return self._iterate()
+
+    async def _iterate(self):
+        for position, document in enumerate(self.documents):
+            yield document
+            if position == 0:
+                self.during_read()
+
+async def test_writes_during_a_rebuild_are_kept(index):
+    stale, kept = character("Stale Zombie"), character("Kept Zombie")
+    added = character("New Zombie")
+    index.add(stale)
+
+    def write_during_read():
+        index.remove(stale["_id"])
+        index.add(added)
+
+    assert await index.rebuild(ChangingCollection([stale, kept], write_during_read)) == 2
+    assert sorted(names(index.search("zombie"))) == ["Kept Zombie", "New Zombie"]
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import time
+import pytest
+import thumbnail_renderer
+from file_handler import generate_thumbnail_from_model
+from thumbnail_renderer import render_thumbnail, run_in_render_pool
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def triangle_obj(tmp_path):
+    path = tmp_path / "triangle.obj"
+    path.write_text("v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    return str(path)
+
+@pytest.fixture
+def short_render_timeout(monkeypatch):
+    monkeypatch.setattr(thumbnail_renderer, "RENDER_TIMEOUT", 1.0)
+    yield
+    thumbnail_renderer.shutdown_render_pool()
+
+def test_render_within_pixel_budget(triangle_obj):
+    assert render_thumbnail(triangle_obj)[:2] == b"\xff\xd8"
+
+def test_render_over_pixel_budget_is_skipped(triangle_obj, monkeypatch):
+    monkeypatch.setattr(thumbnail_renderer, "THUMBNAIL_MAX_RASTER_PIXELS", 100)
+
+    assert render_thumbnail(triangle_obj) is None
+
+async def test_render_pool_call_times_out(short_render_timeout):
+    pool = thumbnail_renderer.get_render_pool()
+
+    with pytest.raises(TimeoutError):
+        await run_in_render_pool(time.sleep, 30)
+
+    assert thumbnail_renderer.render_pool is not pool
+    assert await run_in_render_pool(abs, -1) == 1
+
+async def test_thumbnail_falls_back_to_placeholder_on_timeout(short_render_timeout, monkeypatch):
+    monkeypatch.setattr(thumbnail_renderer, "render_thumbnail", time.sleep)
+
+    thumbnail = await generate_thumbnail_from_model(30)
+
+    assert thumbnail is not None and os.path.exists(thumbnail)
+
+async def test_timeout_does_not_fail_concurrent_calls(short_render_timeout):
+    # Start both workers before timing anything
+    await asyncio.gather(run_in_render_pool(time.sleep, 0.1), run_in_render_pool(time.sleep, 0.1))
+    pool = thumbnail_renderer.render_pool
+    stuck = asyncio.ensure_future(run_in_render_pool(time.sleep, 30))
+    await asyncio.sleep(0.5)
+
+    # Still running on the other worker when the stuck call times out
+    assert await run_in_render_pool(time.sleep, 0.8) is None
+
+    with pytest.raises(TimeoutError):
+        await stuck
+    assert await run_in_render_pool(abs, -1) == 1
+    # The drained pool, with its stuck worker, is stopped
+    await asyncio.sleep(0.1)
+    assert pool not in thumbnail_renderer.retired_render_pools
+    assert pool._processes is None
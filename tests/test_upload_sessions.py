@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from auth import get_current_user
+from blob_store import BLOB_DIR
+from database import upload_sessions_collection
+from upload_sessions import (
+    MIN_CHUNK_SIZE, SESSION_DIR, cleanup_expired_upload_sessions, commit_upload_session, get_session_dir
+)
+import server
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = str(ObjectId())
+DATA = os.urandom(MIN_CHUNK_SIZE + 10)  # two chunks, the last one 10 bytes
+
+@pytest.fixture
+def client():
+    server.app.dependency_overrides[get_current_user] = lambda: {"sub": USER_ID}
+    yield TestClient(server.app)
+    server.app.dependency_overrides.clear()
+
+def open_session(client, sha256=None) -> str:
+    upload = {"filename": "big.obj", "total_size": len(DATA), "chunk_size": MIN_CHUNK_SIZE}
+    if sha256:
+        upload["sha256"] = sha256
+    response = client.post("/api/characters/uploads", json=upload)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def put_chunk(client, session_id: str, index: int, data: bytes):
+    return client.put(f"/api/characters/uploads/{session_id}/chunks/{index}", content=data)
+
+def upload_all(client, session_id: str) -> None:
+    assert put_chunk(client, session_id, 1, DATA[MIN_CHUNK_SIZE:]).status_code == 200
+    response = put_chunk(client, session_id, 0, DATA[:MIN_CHUNK_SIZE])
+    assert response.json()["missing_chunks"] == []
+
+async def load_session(session_id: str) -> dict:
+    return await upload_sessions_collection.find_one({"_id": ObjectId(session_id)})
+
+def test_chunks_of_the_wrong_size_or_index_are_rejected(client):
+    session_id = open_session(client)
+
+    assert put_chunk(client, session_id, 1, DATA[:11]).status_code == 400
+    assert put_chunk(client, session_id, 0, DATA[:MIN_CHUNK_SIZE - 1]).status_code == 400
+    assert put_chunk(client, session_id, 2, DATA[:10]).status_code == 400
+    response = client.get(f"/api/characters/uploads/{session_id}")
+    assert response.json()["missing_chunks"] == [0, 1]
+    assert [path.name for path in get_session_dir(session_id).iterdir()] == []
+
+async def test_commit_with_missing_chunks_is_refused(client):
+    session_id = open_session(client)
+    assert put_chunk(client, session_id, 0, DATA[:MIN_CHUNK_SIZE]).status_code == 200
+
+    with pytest.raises(HTTPException) as error:
+        await commit_upload_session(await load_session(session_id))
+
+    assert error.value.status_code == 409
+    assert "[1]" in error.value.detail
+
+async def test_concurrent_commits_assemble_once(client):
+    session_id = open_session(client)
+    upload_all(client, session_id)
+    session = await load_session(session_id)
+
+    results = await asyncio.gather(
+        commit_upload_session(session), commit_upload_session(session), return_exceptions=True
+    )
+
+    stored = [result for result in results if isinstance(result, str)]
+    refused = [result for result in results if isinstance(result, HTTPException)]
+    assert len(stored) == 1 and len(refused) == 1
+    assert refused[0].status_code == 409
+    with open(stored[0], "rb") as f:
+        assert f.read() == DATA
+    assert await load_session(session_id) is None
+    assert not get_session_dir(session_id).exists()
+
+async def test_sha256_mismatch_discards_the_upload(client):
+    session_id = open_session(client, sha256=hashlib.sha256(b"something else").hexdigest())
+    upload_all(client, session_id)
+
+    with pytest.raises(HTTPException) as error:
+        await commit_upload_session(await load_session(session_id))
+
+    assert error.value.status_code == 400
+    stored_name = hashlib.sha256(DATA).hexdigest()
+    assert not any(path.name.startswith(stored_name) for path in BLOB_DIR.rglob("*"))
+    assert await load_session(session_id) is None
+
+async def test_sweeper_removes_expired_sessions_and_orphaned_chunks(client):
+    expired_id, live_id = open_session(client), open_session(client)
+    assert put_chunk(client, expired_id, 0, DATA[:MIN_CHUNK_SIZE]).status_code == 200
+    await upload_sessions_collection.update_one(
+        {"_id": ObjectId(expired_id)}, {"$set": {"expires_at": datetime.utcnow() - timedelta(minutes=1)}}
+    )
+    orphan = SESSION_DIR / str(ObjectId())
+    orphan.mkdir()
+    day_ago = time.time() - 24 * 60 * 60
+    os.utime(orphan, (day_ago, day_ago))
+
+    assert await cleanup_expired_upload_sessions() == 2
+
+    assert await load_session(expired_id) is None
+    assert not get_session_dir(expired_id).exists()
+    assert not orphan.exists()
+    assert get_session_dir(live_id).exists()